@@ -0,0 +1,87 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+# Flush a batch once it holds this many instances...
+BATCH_MAX_SIZE = int(os.environ.get("PREDICT_BATCH_MAX_SIZE", 8))
+# ...or this long after its first instance arrived
+BATCH_MAX_WAIT_MS = float(os.environ.get("PREDICT_BATCH_MAX_WAIT_MS", 20))
+# Batches in flight at once, about the endpoint's replica count
+BATCH_MAX_IN_FLIGHT = int(os.environ.get("PREDICT_BATCH_MAX_IN_FLIGHT", 1))
+
+
+class MicroBatcher:
+    """
+    Collects concurrent predictions into batched calls.
+
+    Callers submit one instance each and block on their own result. A
+    background thread gathers the pending instances for up to max_batch_size
+    items or max_wait_ms, sends them as one instances list and hands each
+    caller the prediction at its position. A failed batch fails all of its
+    callers.
+
+    Args:
+        predict: Takes a list of instances, returns the predictions in the same order
+        max_batch_size: Largest batch sent at once
+        max_wait_ms: Longest time the first instance of a batch waits for company
+        max_in_flight: Batches sent concurrently
+    """
+
+    def __init__(self, predict, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+                 max_in_flight=BATCH_MAX_IN_FLIGHT):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.stats = {"instances": 0, "batches": 0, "errors": 0}
+        threading.Thread(target=self._collect, name="micro-batcher", daemon=True).start()
+
+    def submit(self, instance) -> Future:
+        """Queue one instance, the returned future resolves to its prediction."""
+        future = Future()
+        self._queue.put((instance, future))
+        return future
+
+    def predict_one(self, instance, timeout=None):
+        """Predict one instance as part of the next batch, blocking until its prediction is back."""
+        return self.submit(instance).result(timeout=timeout)
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Wait for a free slot here, so instances keep piling into the next batch meanwhile
+            self._slots.acquire()
+            threading.Thread(target=self._send, args=(batch,), daemon=True).start()
+
+    def _send(self, batch):
+        instances = [instance for instance, _ in batch]
+        try:
+            predictions = list(self.predict(instances))
+            if len(predictions) != len(batch):
+                raise RuntimeError(f"Expected {len(batch)} predictions, got {len(predictions)}")
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.stats["instances"] += len(batch)
+                self.stats["batches"] += 1
+        for (_, future), prediction in zip(batch, predictions):
+            future.set_result(prediction)
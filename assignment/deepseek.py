@@ -1,7 +1,8 @@
 import os
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_ollama.llms import OllamaLLM
+import time
+from langchain_core.prompts import PromptTemplate
 from typing import TypedDict
+from ollama_backend import get_ollama
 
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "")
@@ -12,3 +13,50 @@ class State(TypedDict):
     model_one_assignment: str
     model_two_assignment: str
     final_assignment: str
+
+
+def gen_assignment_deepseek(state, on_text=None):
+    """
+    Draft the weekly assignments of the teaching plan with DeepSeek on Ollama.
+
+    Args:
+        state: The graph state, with the teaching_plan
+        on_text: Called with every streamed chunk of the answer, its <think> reasoning already removed
+    """
+    print(f"---------------gen_assignment_deepseek")
+
+    template = """
+        You are an instructor who favor student to focus on individual work.
+
+        Develop engaging and practical assignments for each week, ensuring they align with the teaching plan's objectives and progressively build upon each other.
+
+        For each week, provide the following:
+
+        * **Week [Number]:** A descriptive title for the assignment (e.g., "Data Exploration Project," "Model Building Exercise").
+        * **Learning Objectives Assessed:** List the specific learning objectives from the teaching plan that this assignment assesses.
+        * **Description:** A detailed description of the task, including any specific requirements or constraints.  Provide examples or scenarios if applicable.
+        * **Deliverables:** Specify what students need to submit (e.g., code, report, presentation).
+        * **Estimated Time Commitment:**  The approximate time students should dedicate to completing the assignment.
+        * **Assessment Criteria:** Briefly outline how the assignment will be graded (e.g., correctness, completeness, clarity, creativity).
+
+        The assignments should be a mix of individual and collaborative work where appropriate.  Consider different learning styles and provide opportunities for students to apply their knowledge creatively.
+
+        Based on this teaching plan: {teaching_plan}
+        """
+
+    prompt = PromptTemplate.from_template(template).format(teaching_plan=state["teaching_plan"])
+
+    # Streamed on the shared Ollama session, the <think> reasoning is dropped as it arrives
+    start = time.perf_counter()
+    first_token = []
+
+    def on_token(text):
+        if not first_token:
+            first_token.append(time.perf_counter() - start)
+            print(f"---------------gen_assignment_deepseek first token after {first_token[0]:.2f}s")
+        if on_text:
+            on_text(text)
+
+    response = get_ollama().generate(prompt, options={"temperature": 0.7}, on_token=on_token)
+    print(f"---------------gen_assignment_deepseek finished in {time.perf_counter() - start:.2f}s")
+    return {"model_two_assignment": response}
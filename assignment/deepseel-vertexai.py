@@ -1,7 +1,7 @@
 import os
-import vertexai
+import threading
 from typing import TypedDict
-from google.cloud import aiplatform
+from batching import MicroBatcher
 
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 LOCATION = os.environ.get("GOOGLE_CLOUD_REGION", "us-central1")
@@ -15,14 +15,41 @@ class State(TypedDict):
     model_two_assignment: str
     final_assignment: str
 
-aiplatform.init(project=PROJECT_ID, location=LOCATION)
-endpoint = aiplatform.Endpoint(f"projects/{PROJECT_NUMBER}/locations/{LOCATION}/endpoints/{ENDPOINT_ID}")
+_endpoint = None
+_endpoint_lock = threading.Lock()
+
+def get_endpoint():
+    """Get the DeepSeek Vertex AI endpoint, initialised on first use instead of at import time."""
+    global _endpoint
+    if _endpoint is None:
+        with _endpoint_lock:
+            if _endpoint is None:
+                from google.cloud import aiplatform
+                aiplatform.init(project=PROJECT_ID, location=LOCATION)
+                _endpoint = aiplatform.Endpoint(f"projects/{PROJECT_NUMBER}/locations/{LOCATION}/endpoints/{ENDPOINT_ID}")
+    return _endpoint
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def predict_batch(instances):
+    """One endpoint.predict call for a batch of instances, predictions come back in the same order."""
+    return get_endpoint().predict(instances=instances, use_dedicated_endpoint=True).predictions
+
+def get_batcher():
+    """Get the micro-batcher in front of the endpoint, concurrent plans share predict calls."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(predict_batch)
+    return _batcher
 
 def gen_assignment_deepseek(state):
     print(f"---------------gen_assignment_deepseek")
 
     
-    instances=[{
+    instance={
               "prompt" : f"""
         You are an instructor 
 
@@ -45,17 +72,10 @@ def gen_assignment_deepseek(state):
               "temperature": 0.7,
               "top_p": 1.0,
               "top_k": -1
-    }]
-    
+    }
 
-   
+    # Sent together with the other plans arriving within PREDICT_BATCH_MAX_WAIT_MS
+    prediction = get_batcher().predict_one(instance)
+    print(prediction)
 
-    prediction = endpoint.predict(instances=instances, use_dedicated_endpoint=True)
-    print(prediction.predictions[0])
-   
-
-    
-    
-    state["model_two_assignment"] = prediction.predictions[0]
-    
-    return state
+    return {"model_two_assignment": prediction}
@@ -2,6 +2,7 @@ import os
 from google import genai
 from typing import TypedDict
 from onramp_workaround import get_next_region
+from hedging import get_hedger
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 
 MODEL_ID = "gemini-1.5-flash" 
@@ -11,3 +12,64 @@ class State(TypedDict):
     model_one_assignment: str
     model_two_assignment: str
     final_assignment: str
+
+
+def generate_text(name: str, contents: str) -> str:
+    """
+    Generate text with MODEL_ID in the next onramp region.
+
+    Opt-in (LLM_HEDGING_ENABLED): a slow region is backed up by the next one.
+
+    Args:
+        name: Call site, each one keeps its own latency history for the hedge delay
+        contents: The prompt
+    """
+    def attempt(region):
+        client = genai.Client(vertexai=True, project=PROJECT_ID, location=region)
+        return client.models.generate_content(model=MODEL_ID, contents=contents).text
+
+    return get_hedger(name).call(attempt, get_next_region)
+
+
+def gen_assignment_gemini(state):
+    """Draft the weekly assignments of the teaching plan with Gemini."""
+    print(f"---------------gen_assignment_gemini")
+    text = generate_text("gen_assignment_gemini", f"""
+        You are an instructor
+
+        Develop engaging and practical assignments for each week, ensuring they align with the teaching plan's objectives and progressively build upon each other.
+
+        For each week, provide the following:
+
+        * **Week [Number]:** A descriptive title for the assignment (e.g., "Data Exploration Project," "Model Building Exercise").
+        * **Learning Objectives Assessed:** List the specific learning objectives from the teaching plan that this assignment assesses.
+        * **Description:** A detailed description of the task, including any specific requirements or constraints.  Provide examples or scenarios if applicable.
+        * **Deliverables:** Specify what students need to submit (e.g., code, report, presentation).
+        * **Estimated Time Commitment:**  The approximate time students should dedicate to completing the assignment.
+        * **Assessment Criteria:** Briefly outline how the assignment will be graded (e.g., correctness, completeness, clarity, creativity).
+
+        The assignments should be a mix of individual and collaborative work where appropriate.  Consider different learning styles and provide opportunities for students to apply their knowledge creatively.
+
+        Based on this teaching plan: {state["teaching_plan"]}
+        """)
+    print(f"---------------gen_assignment_gemini answer {text}")
+    # Only the branch's own key is returned, both generators run in the same superstep
+    return {"model_one_assignment": text}
+
+
+def combine_assignments(state):
+    """Merge the drafts that arrived into the final assignment."""
+    print(f"---------------combine_assignments ")
+    drafts = [draft for draft in (state.get("model_one_assignment"), state.get("model_two_assignment")) if draft]
+    if not drafts or len(state.get("truncated") or []) == len(drafts):
+        # A draft cut short by its timeout is only worth combining with a complete one, Pub/Sub retries otherwise
+        raise RuntimeError("No assignment draft arrived from either model")
+    if len(drafts) == 1:
+        # The other branch timed out or failed, there is nothing to combine
+        print(f"---------------combine_assignments using the only draft that arrived")
+        return {"final_assignment": drafts[0]}
+
+    text = generate_text("combine_assignments", f"""
+        Look at all the proposed assignment so far {drafts[0]} and {drafts[1]}, combine them and come up with a final assignment for student.
+        """)
+    return {"final_assignment": text}
@@ -0,0 +1,325 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import contextlib
+import contextvars
+from collections import OrderedDict
+from typing import Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+# Defaults mirror the `cache:` section of config/config.yaml. Every key can be
+# overridden with a CACHE_<KEY> environment variable (e.g. CACHE_TYPE=sqlite).
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "type": "redis",
+    "host": "localhost",
+    "port": 6379,
+    "ttl": 3600,
+    "max_size": 1024,
+    "sqlite_path": "/tmp/aidemy_llm_cache.db",
+}
+
+# The onramp workaround rotates the region on every call, so the location has to
+# be dropped from the LLM string or each region would get its own cache entries.
+IGNORED_LLM_PARAMS = ("location",)
+
+_bypass = contextvars.ContextVar("llm_cache_bypass", default=False)
+_lookup_listeners = []
+
+
+def load_cache_settings(config_path: Optional[str] = None) -> dict:
+    """
+    Load the cache settings from config.yaml and the environment.
+
+    Args:
+        config_path: Path to config.yaml, defaults to the AIDEMY_CONFIG env variable
+
+    Returns:
+        dict: The merged cache settings
+    """
+    settings = dict(DEFAULT_SETTINGS)
+
+    config_path = config_path or os.environ.get("AIDEMY_CONFIG")
+    if config_path and os.path.exists(config_path):
+        import yaml
+
+        with open(config_path, "r") as f:
+            settings.update((yaml.safe_load(f) or {}).get("cache") or {})
+
+    for key, default in DEFAULT_SETTINGS.items():
+        value = os.environ.get(f"CACHE_{key.upper()}")
+        if value is None:
+            continue
+        if isinstance(default, bool):
+            settings[key] = value.lower() in ("1", "true", "yes")
+        elif isinstance(default, int):
+            settings[key] = int(value)
+        else:
+            settings[key] = value
+    return settings
+
+
+class LRUBackend:
+    """In-process LRU store with TTL and size based eviction."""
+
+    def __init__(self, max_size=1024, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl if self.ttl else 0
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while self.max_size and len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """SQLite store, shared by every worker on the same instance."""
+
+    def __init__(self, path="/tmp/aidemy_llm_cache.db", max_size=1024, ttl=3600):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] and row[1] < now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else 0
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE expires_at != 0 AND expires_at < ?", (now,)
+            )
+            if self.max_size:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache "
+                    "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_size,),
+                )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class RedisBackend:
+    """Redis store, shared across instances. Redis handles TTL and eviction (maxmemory-policy)."""
+
+    def __init__(self, host="localhost", port=6379, ttl=3600, prefix="aidemy:llm:"):
+        import redis
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis(host=host, port=port, socket_timeout=1)
+        self._client.ping()
+
+    def get(self, key):
+        value = self._client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key, value):
+        self._client.set(self.prefix + key, value, ex=self.ttl or None)
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self.prefix + "*"):
+            self._client.delete(key)
+
+    def __len__(self):
+        return sum(1 for _ in self._client.scan_iter(match=self.prefix + "*"))
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain cache keyed on the model, its parameters and a hash of the prompt.
+
+    Pass an instance as the `cache` argument of a VertexAI/ChatVertexAI model to
+    cache only that model's calls.
+    """
+
+    def __init__(self, backend, ignored_params=IGNORED_LLM_PARAMS):
+        self.backend = backend
+        self._ignored = [
+            re.compile(rf'"{name}": "[^"]*",? ?|\(\'{name}\', \'[^\']*\'\),? ?') for name in ignored_params
+        ]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def _key(self, prompt, llm_string):
+        for pattern in self._ignored:
+            llm_string = pattern.sub("", llm_string)
+        llm_hash = hashlib.sha256(llm_string.encode("utf-8")).hexdigest()
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"{llm_hash}:{prompt_hash}"
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if _bypass.get():
+            self._count("bypassed")
+            _notify_lookup(False)
+            return None
+        value = self.backend.get(self._key(prompt, llm_string))
+        if value is None:
+            self._count("misses")
+            _notify_lookup(False)
+            return None
+        self._count("hits")
+        _notify_lookup(True)
+        return [loads(generation) for generation in json.loads(value)]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if _bypass.get():
+            return
+        value = json.dumps([dumps(generation) for generation in return_val])
+        self.backend.set(self._key(prompt, llm_string), value)
+
+    def clear(self, **kwargs) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        """Return the hit/miss counters of this cache."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.backend),
+        }
+
+
+def add_lookup_listener(listener):
+    """
+    Call listener(hit) after every lookup of an LLMResponseCache.
+
+    The listener runs in the context of the model call that made the lookup,
+    e.g. hedging.record_cache_lookup keeps cache hits out of the hedge delay.
+    A bypassed lookup is reported as a miss, the call goes to the model.
+    """
+    if listener not in _lookup_listeners:
+        _lookup_listeners.append(listener)
+
+
+def _notify_lookup(hit: bool):
+    for listener in _lookup_listeners:
+        listener(hit)
+
+
+@contextlib.contextmanager
+def bypass_llm_cache(active: bool = True):
+    """
+    Skip the LLM cache for the calls made inside this block.
+
+    Args:
+        active: Set to False to keep using the cache (an enclosing bypass still applies)
+    """
+    token = _bypass.set(active or _bypass.get())
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def create_backend(settings: dict):
+    """Create the cache backend named by settings['type'] (memory, sqlite or redis)."""
+    cache_type = settings["type"]
+    if cache_type == "redis":
+        try:
+            return RedisBackend(settings["host"], int(settings["port"]), int(settings["ttl"]))
+        except Exception as e:
+            print(f"LLM cache: redis unavailable ({e}), falling back to in-process cache")
+            return LRUBackend(int(settings["max_size"]), int(settings["ttl"]))
+    if cache_type == "sqlite":
+        return SQLiteBackend(settings["sqlite_path"], int(settings["max_size"]), int(settings["ttl"]))
+    if cache_type == "memory":
+        return LRUBackend(int(settings["max_size"]), int(settings["ttl"]))
+    raise ValueError(f"Unknown cache type: {cache_type}")
+
+
+_llm_cache = None
+_llm_cache_loaded = False
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Get the LLM cache configured for this service.
+
+    Returns:
+        LLMResponseCache: The shared cache, or None when caching is disabled
+    """
+    global _llm_cache, _llm_cache_loaded
+    if not _llm_cache_loaded:
+        with _llm_cache_lock:
+            if not _llm_cache_loaded:
+                settings = load_cache_settings()
+                if settings["enabled"]:
+                    _llm_cache = LLMResponseCache(create_backend(settings))
+                _llm_cache_loaded = True
+    return _llm_cache
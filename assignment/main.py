@@ -2,6 +2,10 @@ import os
 import json
 import base64
 import random
+import time
+import operator
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from google.cloud import storage
 import functions_framework
 
@@ -14,10 +18,18 @@ from langgraph.prebuilt import ToolNode
 from langgraph.prebuilt import tools_condition
 from gemini import gen_assignment_gemini,combine_assignments
 from deepseek import gen_assignment_deepseek
-from typing import TypedDict
+from ollama_backend import warm_up_in_background
+from typing import Annotated, TypedDict
+from idempotency import get_idempotency, message_id, plan_fingerprint, IN_PROGRESS, PROCESSED
 
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 ASSIGNMENT_BUCKET = os.environ.get("ASSIGNMENT_BUCKET","")
+# Per-branch limits, combine_assignments goes ahead with whichever drafts arrived in time
+GEMINI_TIMEOUT_SECONDS = float(os.environ.get("GEMINI_TIMEOUT_SECONDS", 120))
+DEEPSEEK_TIMEOUT_SECONDS = float(os.environ.get("DEEPSEEK_TIMEOUT_SECONDS", 180))
+
+# Load the DeepSeek model while the instance starts, not on the first plan event
+warm_up_in_background()
 
 
 class State(TypedDict):
@@ -25,3 +37,106 @@ class State(TypedDict):
     model_one_assignment: str
     model_two_assignment: str
     final_assignment: str
+    # Keys of the drafts cut short by their timeout, both branches may add theirs in the same superstep
+    truncated: Annotated[list, operator.add]
+
+
+def with_timeout(node, key: str, timeout: float, streamed: bool = False):
+    """
+    Wrap a generator node so it gives up after timeout seconds.
+
+    A branch that times out or fails leaves its key empty instead of failing
+    the graph, the call itself is abandoned on its worker thread. A streamed
+    node gets an on_text callback; when it times out, the text it streamed
+    so far becomes its draft and the key is listed in "truncated".
+    """
+    def run(state):
+        start = time.perf_counter()
+        streamed_text = []
+        call = partial(node, state, on_text=streamed_text.append) if streamed else partial(node, state)
+        pool = ThreadPoolExecutor(max_workers=1)
+        try:
+            update = pool.submit(call).result(timeout=timeout)
+            print(f"---------------{node.__name__} finished in {time.perf_counter() - start:.1f}s")
+            return update
+        except FutureTimeoutError:
+            print(f"---------------{node.__name__} timed out after {timeout}s")
+            draft = "".join(streamed_text).strip()
+            if draft:
+                print(f"---------------{node.__name__} keeping the {len(draft)} characters streamed so far")
+                return {key: draft, "truncated": [key]}
+        except Exception as e:
+            print(f"---------------{node.__name__} failed: {e}")
+        finally:
+            pool.shutdown(wait=False)
+        return {key: ""}
+    run.__name__ = node.__name__
+    return run
+
+
+def build_graph():
+    """Both generators fan out from START in the same superstep, combine_assignments joins them."""
+    builder = StateGraph(State)
+    builder.add_node("gen_assignment_gemini", with_timeout(gen_assignment_gemini, "model_one_assignment", GEMINI_TIMEOUT_SECONDS))
+    builder.add_node("gen_assignment_deepseek", with_timeout(gen_assignment_deepseek, "model_two_assignment",
+                                                              DEEPSEEK_TIMEOUT_SECONDS, streamed=True))
+    builder.add_node("combine_assignments", combine_assignments)
+
+    builder.add_edge(START, "gen_assignment_gemini")
+    builder.add_edge(START, "gen_assignment_deepseek")
+    builder.add_edge(["gen_assignment_gemini", "gen_assignment_deepseek"], "combine_assignments")
+    builder.add_edge("combine_assignments", END)
+
+    return builder.compile()
+
+
+def create_assignment(teaching_plan: str):
+    """Generate the assignment of a teaching plan with both models and combine them."""
+    print(f"create_assignment---->{teaching_plan}")
+    graph = build_graph()
+    state = graph.invoke({"teaching_plan": teaching_plan})
+
+    return state["final_assignment"]
+
+
+def store_assignment(teaching_plan: str) -> str:
+    """Generate the assignment of a teaching plan and store it in ASSIGNMENT_BUCKET, returning the blob name."""
+    assignment = create_assignment(teaching_plan)
+    print(f"Assignment---->{assignment}")
+    # Named after the plan, so storing the same plan twice overwrites rather than duplicates
+    file_name = f"assignment-{plan_fingerprint(teaching_plan)[:12]}.txt"
+    storage_client = storage.Client()
+    bucket = storage_client.bucket(ASSIGNMENT_BUCKET)
+    blob = bucket.blob(file_name)
+    blob.upload_from_string(assignment)
+    return file_name
+
+
+@functions_framework.cloud_event
+def generate_assignment(cloud_event):
+    """Generate the assignment of the teaching plan published on the plan topic."""
+    print(f"CloudEvent received: {cloud_event.data}")
+    try:
+        if isinstance(cloud_event.data.get('message', {}).get('data'), str):  # Pub/Sub push
+            data = json.loads(base64.b64decode(cloud_event.data['message']['data']).decode('utf-8'))
+            teaching_plan = data.get('teaching_plan')
+        elif 'teaching_plan' in cloud_event.data:  # Direct CloudEvent
+            teaching_plan = cloud_event.data["teaching_plan"]
+        else:
+            raise KeyError("teaching_plan not found")
+
+        # Redeliveries and the same plan published again reuse the stored assignment
+        outcome, file_name = get_idempotency("assignment").run(
+            message_id(cloud_event), teaching_plan, lambda: store_assignment(teaching_plan)
+        )
+        if outcome == IN_PROGRESS:
+            # The framework acknowledges whatever a cloud_event function returns, only an exception
+            # answers the push with a 500 so Pub/Sub redelivers it, in case the lease holder dies
+            raise RuntimeError(f"Assignment in progress elsewhere, retry later: {message_id(cloud_event)}")
+        if outcome != PROCESSED:
+            return f"Assignment already handled ({outcome}): {ASSIGNMENT_BUCKET}/{file_name}", 200
+        return f"Assignment generated and stored in {ASSIGNMENT_BUCKET}/{file_name}", 200
+
+    except (json.JSONDecodeError, AttributeError, KeyError) as e:
+        print(f"Error decoding CloudEvent data: {e} - Data: {cloud_event.data}")
+        return "Error processing event", 500
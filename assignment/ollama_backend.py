@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "")
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "deepseek-r1:1.5b")
+# How long Ollama keeps the model loaded after a request ("30m", "24h", "-1" for forever).
+# Ollama's default of 5 minutes unloads it between sporadic plan events.
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", 5))
+OLLAMA_READ_TIMEOUT = float(os.environ.get("OLLAMA_READ_TIMEOUT", 300))
+OLLAMA_WARMUP = os.environ.get("OLLAMA_WARMUP", "true").lower() in ("1", "true", "yes")
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+def _partial_tag(text: str, tag: str) -> int:
+    """Length of the longest suffix of text that is a prefix of tag, i.e. a tag cut in half by the stream."""
+    for size in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:size]):
+            return size
+    return 0
+
+
+class ThinkStripper:
+    """
+    Removes <think>...</think> reasoning blocks from a token stream as it arrives.
+
+    Tags split across chunks are held back until they can be decided, and the
+    whitespace DeepSeek puts after its reasoning is dropped.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._thinking = False
+        self._started = False
+
+    def _visible(self, text):
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
+    def feed(self, chunk: str) -> str:
+        """Add a streamed chunk, returns the part of the answer that can be shown now."""
+        self._buffer += chunk
+        out = ""
+        while True:
+            if self._thinking:
+                end = self._buffer.find(THINK_CLOSE)
+                if end < 0:
+                    keep = _partial_tag(self._buffer, THINK_CLOSE)
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                self._buffer = self._buffer[end + len(THINK_CLOSE):]
+                self._thinking = False
+                self._started = False
+            else:
+                start = self._buffer.find(THINK_OPEN)
+                if start < 0:
+                    keep = _partial_tag(self._buffer, THINK_OPEN)
+                    out += self._visible(self._buffer[:len(self._buffer) - keep])
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                out += self._visible(self._buffer[:start])
+                self._buffer = self._buffer[start + len(THINK_OPEN):]
+                self._thinking = True
+        return out
+
+    def finish(self) -> str:
+        """The text still held back at the end of the stream."""
+        rest, self._buffer = ("" if self._thinking else self._visible(self._buffer)), ""
+        return rest
+
+
+class OllamaBackend:
+    """
+    Streaming client for Ollama's /api/generate.
+
+    One requests.Session keeps the connection to the Ollama host open across
+    generations. Every request carries keep_alive, so the model stays loaded
+    between sporadic events.
+
+    Args:
+        host: Ollama base URL, e.g. http://10.0.0.2:11434
+        model: Model tag, as pulled by startup.sh
+        keep_alive: How long Ollama keeps the model loaded after each request
+    """
+
+    def __init__(self, host=OLLAMA_HOST, model=OLLAMA_MODEL, keep_alive=OLLAMA_KEEP_ALIVE, session=None):
+        self.host = (host or "http://localhost:11434").rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self.session = session or requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+        self.timeout = (OLLAMA_CONNECT_TIMEOUT, OLLAMA_READ_TIMEOUT)
+
+    def _keep_alive(self):
+        # Ollama reads a bare number as seconds, a string like "30m" as a duration
+        try:
+            return int(self.keep_alive)
+        except (TypeError, ValueError):
+            return self.keep_alive
+
+    def stream(self, prompt: str, options: dict = None, strip_think: bool = True):
+        """
+        Generate a completion, yielding text chunks as Ollama streams them.
+
+        Args:
+            prompt: The prompt
+            options: Ollama model options, e.g. {"temperature": 0.7}
+            strip_think: Drop the <think> reasoning blocks of DeepSeek R1
+        """
+        payload = {"model": self.model, "prompt": prompt, "stream": True, "keep_alive": self._keep_alive()}
+        if options:
+            payload["options"] = options
+        stripper = ThinkStripper() if strip_think else None
+        with self.session.post(f"{self.host}/api/generate", json=payload, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                message = json.loads(line)
+                if "error" in message:
+                    raise RuntimeError(f"Ollama error: {message['error']}")
+                text = message.get("response", "")
+                text = stripper.feed(text) if stripper else text
+                if text:
+                    yield text
+                # No break on "done": reading the stream to its end returns the connection to the pool
+        if stripper:
+            rest = stripper.finish()
+            if rest:
+                yield rest
+
+    def generate(self, prompt: str, options: dict = None, on_token=None) -> str:
+        """Generate a completion, calling on_token(text) for every streamed chunk, and return the full answer."""
+        chunks = []
+        for text in self.stream(prompt, options):
+            chunks.append(text)
+            if on_token:
+                on_token(text)
+        return "".join(chunks).strip()
+
+    def warm_up(self) -> float:
+        """Load the model into memory without generating anything, returns the seconds it took."""
+        start = time.perf_counter()
+        response = self.session.post(
+            f"{self.host}/api/generate",
+            json={"model": self.model, "prompt": "", "stream": False, "keep_alive": self._keep_alive()},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_ollama() -> OllamaBackend:
+    """Get the shared Ollama backend, created on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = OllamaBackend()
+    return _backend
+
+
+def warm_up_in_background():
+    """Load the model on a background thread at instance start-up, unless OLLAMA_WARMUP is false."""
+    if not OLLAMA_WARMUP or not OLLAMA_HOST:
+        return
+
+    def run():
+        try:
+            print(f"---------------Ollama warm-up loaded {OLLAMA_MODEL} in {get_ollama().warm_up():.1f}s")
+        except Exception as e:
+            print(f"---------------Ollama warm-up failed: {e}")
+
+    threading.Thread(target=run, name="ollama-warmup", daemon=True).start()
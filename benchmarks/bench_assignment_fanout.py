@@ -0,0 +1,67 @@
+"""
+End-to-end latency of the assignment graph, linear vs fan-out, with fake model latencies.
+
+Run from the repository root:
+    python benchmarks/bench_assignment_fanout.py
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "assignment"))
+
+import main
+import gemini
+from langgraph.graph import StateGraph, START, END
+from tests.fakes.genai import FakeGenaiClient
+
+GEMINI_LATENCY = float(os.environ.get("BENCH_GEMINI_LATENCY", 1.0))
+DEEPSEEK_LATENCY = float(os.environ.get("BENCH_DEEPSEEK_LATENCY", 1.5))
+COMBINE_LATENCY = float(os.environ.get("BENCH_COMBINE_LATENCY", 0.5))
+PLAN = "* Week 1: 2D Shapes and Angles\n* Week 2: 3D Shapes and Symmetry\n* Week 3: Position and Direction"
+
+
+def fake_generator(key, seconds):
+    def node(state, on_text=None):
+        time.sleep(seconds)
+        return {key: f"{key} draft"}
+    node.__name__ = f"fake_{key}"
+    return node
+
+
+def linear_graph():
+    """The graph before the fan-out: each generator waits for the previous one."""
+    builder = StateGraph(main.State)
+    builder.add_node("gen_assignment_gemini", main.gen_assignment_gemini)
+    builder.add_node("gen_assignment_deepseek", main.gen_assignment_deepseek)
+    builder.add_node("combine_assignments", main.combine_assignments)
+    builder.add_edge(START, "gen_assignment_gemini")
+    builder.add_edge("gen_assignment_gemini", "gen_assignment_deepseek")
+    builder.add_edge("gen_assignment_deepseek", "combine_assignments")
+    builder.add_edge("combine_assignments", END)
+    return builder.compile()
+
+
+def timed(graph):
+    start = time.perf_counter()
+    graph.invoke({"teaching_plan": PLAN})
+    return time.perf_counter() - start
+
+
+def main_bench():
+    client = FakeGenaiClient(responder=lambda contents: "combined", latency=COMBINE_LATENCY)
+    gemini.genai.Client = lambda **kwargs: client
+    main.gen_assignment_gemini = fake_generator("model_one_assignment", GEMINI_LATENCY)
+    main.gen_assignment_deepseek = fake_generator("model_two_assignment", DEEPSEEK_LATENCY)
+
+    print(f"📊 Assignment graph (gemini {GEMINI_LATENCY}s, deepseek {DEEPSEEK_LATENCY}s, combine {COMBINE_LATENCY}s)")
+    print(f"  linear                         {timed(linear_graph()):6.2f} s")
+    print(f"  fan-out                        {timed(main.build_graph()):6.2f} s")
+    main.DEEPSEEK_TIMEOUT_SECONDS = GEMINI_LATENCY + 0.2
+    print(f"  fan-out, deepseek timeout {main.DEEPSEEK_TIMEOUT_SECONDS:.1f}s {timed(main.build_graph()):6.2f} s")
+
+
+if __name__ == "__main__":
+    main_bench()
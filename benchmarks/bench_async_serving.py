@@ -0,0 +1,66 @@
+"""
+Concurrent /generate_quiz requests per portal instance: threaded Flask vs the ASGI app.
+
+Both modes get the same fake LLM with a fixed latency. The Flask app is driven
+through a pool of WSGI_THREADS threads (gunicorn gthread style), the ASGI app on
+a single event loop. Run from the repository root:
+    python benchmarks/bench_async_serving.py
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "portal"))
+os.chdir(os.path.join(ROOT, "portal"))
+
+import httpx
+import quiz
+from app import app as flask_app
+from asgi import application
+from tests.fakes.llm import FakeSlowLLM
+
+LLM_LATENCY = float(os.environ.get("BENCH_LLM_LATENCY", 0.2))
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", 100))
+WSGI_THREADS = int(os.environ.get("BENCH_WSGI_THREADS", 8))
+QUESTION = json.dumps({"question": "How many sides has a triangle?", "options": ["A. 2", "B. 3", "C. 4", "D. 5"], "answer": "B"})
+
+
+def install_fake_llm():
+    llm = FakeSlowLLM(response=QUESTION, latency=LLM_LATENCY)
+    quiz.VertexAI = lambda **kwargs: llm
+    return llm
+
+
+def run_flask():
+    llm = install_fake_llm()
+    client = flask_app.test_client()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WSGI_THREADS) as pool:
+        statuses = list(pool.map(lambda _: client.get('/generate_quiz').status_code, range(REQUESTS)))
+    return time.perf_counter() - start, statuses, llm.peak_in_flight
+
+
+async def run_asgi():
+    llm = install_fake_llm()
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(transport=transport, base_url="http://portal") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(client.get('/generate_quiz') for _ in range(REQUESTS)))
+    return time.perf_counter() - start, [r.status_code for r in responses], llm.peak_in_flight
+
+
+def main():
+    print(f"📊 {REQUESTS} x GET /generate_quiz, fake LLM latency {LLM_LATENCY * 1000:.0f} ms (3 calls per request)")
+    for name, runner in (("flask, %d threads" % WSGI_THREADS, run_flask), ("asgi, 1 event loop", lambda: asyncio.run(run_asgi()))):
+        elapsed, statuses, peak = runner()
+        assert all(status == 200 for status in statuses), statuses
+        print(f"  {name:<22} {elapsed:8.2f} s  {REQUESTS / elapsed:8.1f} req/s  peak concurrent LLM calls: {peak}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Latency of recommending N books: one call per book, one list call, or the local catalog.
+
+Run from the repository root:
+    python benchmarks/bench_book_recommendations.py
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import itertools
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bookprovider"))
+os.environ.setdefault("CACHE_ENABLED", "false")
+os.environ["BOOK_CATALOG_PATH"] = os.path.join(tempfile.mkdtemp(), "book_catalog.db")
+
+import langchain_google_vertexai
+from tests.fakes.llm import FakeSlowChatModel
+
+LLM_LATENCY = float(os.environ.get("BENCH_LLM_LATENCY", 0.5))
+
+# provider builds its ChatVertexAI on first use, hand it the fake instead
+langchain_google_vertexai.ChatVertexAI = lambda **kwargs: FakeSlowChatModel(responder=responder, latency=LLM_LATENCY)
+_counter = itertools.count()
+
+
+def fake_book():
+    n = next(_counter)
+    return {"bookname": f"Geometry Book {n}", "author": f"Author {n}", "publisher": "Aidemy Press", "publishing_date": "2020"}
+
+
+def responder(prompt):
+    if "distinct book recommendations" in prompt:
+        count = int(prompt.split("Generate ")[-1].split(" distinct")[0])
+        return json.dumps({"books": [fake_book() for _ in range(count)]})
+    return json.dumps(fake_book())
+
+
+def sequential(category, number_of_book):
+    # The original behaviour: one blocking call per book
+    return [json.loads(provider.get_recommended_books(category)) for _ in range(number_of_book)]
+
+
+import provider
+
+
+def main():
+    print(f"📊 Book recommendations, fake LLM latency {LLM_LATENCY * 1000:.0f} ms")
+    provider.recommend("Geometry", 10)  # warm the catalog
+    for number_of_book in (1, 2, 5, 10):
+        for name, fn in (
+            ("sequential per-book", sequential),
+            ("concurrent per-book", provider.get_recommended_books_per_book),
+            ("single list call", provider.generate_books),
+            ("catalog", provider.recommend),
+        ):
+            provider.get_llm().calls = 0
+            start = time.perf_counter()
+            books = fn("Geometry", number_of_book)
+            elapsed = time.perf_counter() - start
+            assert len(books) == number_of_book
+            print(f"  N={number_of_book:<3} {name:<22} {elapsed * 1000:9.1f} ms  {provider.get_llm().calls} LLM calls")
+
+
+if __name__ == "__main__":
+    main()
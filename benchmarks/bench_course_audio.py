@@ -0,0 +1,84 @@
+"""
+Peak memory and wall time of the course audio pipeline against a fake Live API.
+
+The streaming pipeline passes each audio chunk to the week's resumable upload
+as it arrives; the buffered variant keeps the whole session in memory before
+writing, as a naive implementation would. Nothing is written to the local
+disk, which is memory-backed on Cloud Run, so the tracemalloc peak of the run
+is the whole footprint: the fake bucket's upload writers buffer one
+AUDIO_UPLOAD_CHUNK_SIZE chunk like the real ones. Streaming runs stay flat
+once a week's audio is larger than one upload chunk, held once per open
+session. "upload buffer" is the largest chunk buffer of the run's writers.
+
+Run from the repository root:
+    python benchmarks/bench_course_audio.py
+"""
+import os
+import sys
+import time
+import wave
+import asyncio
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "courses"))
+
+import audio
+from tests.fakes.genai import FakeGenaiClient
+from tests.fakes.storage import FakeBucket
+
+PLAN = "\n".join(f"* Week {week}: Topic {week}" for week in range(1, 4))
+SESSION_SECONDS = [30, 120, 600, 1200]
+# Live API pacing, one 200 ms audio chunk per message
+CHUNK_DELAY = float(os.environ.get("BENCH_CHUNK_DELAY", 0.0005))
+
+
+async def buffered_stream_audio(session, prompt, write):
+    """The naive approach: collect the whole turn, then write it at once."""
+    await session.send(input=prompt, end_of_turn=True)
+    chunks = []
+    async for message in session.receive():
+        content = message.server_content
+        if content.model_turn:
+            chunks.extend(part.inline_data.data for part in content.model_turn.parts)
+        if content.turn_complete:
+            break
+    audio_data = b"".join(chunks)
+    await write(audio_data)
+    return len(audio_data)
+
+
+def run(seconds, concurrency):
+    client = FakeGenaiClient(audio_seconds=seconds, chunk_delay=CHUNK_DELAY)
+    bucket = FakeBucket(store_data=False)
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = asyncio.run(audio.process_weeks(PLAN, client=client, bucket=bucket, concurrency=concurrency))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert all("error" not in result for result in results), results
+    buffered = max(writer.peak_buffered for writer in bucket.writers)
+    return elapsed, peak / (1024 * 1024), buffered / (1024 * 1024)
+
+
+def main():
+    streaming = audio.stream_audio
+    print("📊 Course audio pipeline, 3 weeks (tracemalloc peak, nothing on local disk)")
+    for seconds in SESSION_SECONDS:
+        audio_mb = seconds * audio.SAMPLE_RATE * audio.SAMPLE_WIDTH / (1024 * 1024)
+        print(f"  {seconds:>4} s per week ({audio_mb:.1f} MiB of PCM)")
+        for name, stream, concurrency in [
+            ("buffered, sequential", buffered_stream_audio, 1),
+            ("streaming, sequential", streaming, 1),
+            ("streaming, 3 at a time", streaming, 3),
+        ]:
+            audio.stream_audio = stream
+            elapsed, peak_mb, buffer_mb = run(seconds, concurrency)
+            print(f"      {name:<24} peak {peak_mb:8.2f} MiB   upload buffer {buffer_mb:6.2f} MiB   {elapsed:7.2f} s")
+    audio.stream_audio = streaming
+
+
+if __name__ == "__main__":
+    main()
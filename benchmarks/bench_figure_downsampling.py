@@ -0,0 +1,75 @@
+"""
+Plotly JSON payload and build time of the dashboard figures, raw points vs point-budgeted.
+
+Raw figures ship every point: the time series, the box plot's values and the
+histogram's values. The budgeted ones ship LTTB-downsampled (min/max for
+error counts) time series and distributions computed here. Browser render
+time follows the payload size; it is not measured here.
+
+Run from the repository root:
+    python benchmarks/bench_figure_downsampling.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mlops.visualizations.generate_graphs import (
+    POINT_BUDGET, box_trace, downsample_frame, histogram_trace, series_frame
+)
+from tests.fakes.monitoring import ValueType, make_series
+
+SIZES = [int(size) for size in os.environ.get("BENCH_POINTS", "10000,100000,1000000").split(",")]
+LATENCY = "aiplatform.googleapis.com/endpoint/prediction_latency"
+ERRORS = "aiplatform.googleapis.com/endpoint/error_count"
+
+
+def raw_figures(latency, errors):
+    return [
+        go.Figure(go.Scatter(x=latency['timestamp'], y=latency['latency'], mode='lines+markers')),
+        go.Figure(go.Box(y=latency['latency'])),
+        go.Figure(go.Scatter(x=errors['timestamp'], y=errors['error_count'], mode='lines+markers')),
+        go.Figure(go.Histogram(x=latency['latency'], nbinsx=50)),
+    ]
+
+
+def budgeted_figures(latency, errors):
+    line = downsample_frame(latency, 'latency', method='lttb')
+    error_line = downsample_frame(errors, 'error_count', method='minmax')
+    return [
+        go.Figure(go.Scatter(x=line['timestamp'], y=line['latency'], mode='lines+markers')),
+        go.Figure(box_trace(latency['latency'], 'Latency Distribution')),
+        go.Figure(go.Scatter(x=error_line['timestamp'], y=error_line['error_count'], mode='lines+markers')),
+        go.Figure(histogram_trace(latency['latency'], 'Latency', bins=50)),
+    ]
+
+
+def measure(build, *frames):
+    start = time.perf_counter()
+    payload = sum(len(fig.to_json()) for fig in build(*frames))
+    return payload, time.perf_counter() - start
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"📊 Dashboard figure payloads, point budget {POINT_BUDGET} per trace")
+    for size in SIZES:
+        values = rng.lognormal(4, 0.3, size)
+        spikes = (rng.random(size) < 0.001) * rng.integers(1, 20, size)
+        latency = series_frame([make_series(LATENCY, size, step=10, value=lambda i: values[i])], 'latency')
+        errors = series_frame([make_series(ERRORS, size, step=10, value_type=ValueType.INT64,
+                                           value=lambda i: spikes[i])], 'error_count')
+        raw_bytes, raw_seconds = measure(raw_figures, latency, errors)
+        budget_bytes, budget_seconds = measure(budgeted_figures, latency, errors)
+        print(f"  {size:>9,} points  raw {raw_bytes / 1e6:8.2f} MB {raw_seconds * 1000:8.0f} ms  "
+              f"budgeted {budget_bytes / 1e6:6.2f} MB {budget_seconds * 1000:6.0f} ms  "
+              f"({raw_bytes / budget_bytes:,.0f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
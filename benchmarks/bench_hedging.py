@@ -0,0 +1,75 @@
+"""
+Tail latency of LLM calls with and without hedging, against a fake LLM with a heavy tail.
+
+Each call takes a log-normal latency, and a share of calls hits an overloaded
+region that is ten times slower. The same seeded latency sequence is replayed
+with hedging off and on.
+
+Run from the repository root:
+    python benchmarks/bench_hedging.py
+"""
+import os
+import sys
+import time
+import random
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "portal"))
+
+from hedging import Hedger, percentile
+from onramp_workaround import get_next_region
+
+CALLS = int(os.environ.get("BENCH_CALLS", 400))
+CONCURRENCY = int(os.environ.get("BENCH_CONCURRENCY", 16))
+MEDIAN_LATENCY = float(os.environ.get("BENCH_MEDIAN_LATENCY", 0.05))
+SLOW_SHARE = float(os.environ.get("BENCH_SLOW_SHARE", 0.02))
+
+
+def fake_llm(seed):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    calls = itertools.count()
+
+    def call(region):
+        with lock:
+            next(calls)
+            latency = rng.lognormvariate(0, 0.3) * MEDIAN_LATENCY
+            if rng.random() < SLOW_SHARE:
+                latency *= 10
+        time.sleep(latency)
+        return region
+
+    return call, calls
+
+
+def run(enabled):
+    call, calls = fake_llm(seed=7)
+    hedger = Hedger("bench", enabled=enabled, default_delay=MEDIAN_LATENCY * 3, min_samples=20)
+    served = []
+
+    def one(_):
+        start = time.perf_counter()
+        hedger.call(call, get_next_region)
+        served.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        list(pool.map(one, range(CALLS)))
+    return served, next(calls), hedger.stats()
+
+
+def main():
+    print(f"📊 Hedged LLM calls ({CALLS} calls, {CONCURRENCY} concurrent, {SLOW_SHARE:.0%} slow at 10x)")
+    for name, enabled in (("no hedging", False), ("hedging", True)):
+        served, llm_calls, stats = run(enabled)
+        print(f"  {name:<12} p50 {percentile(served, 50) * 1000:7.1f} ms  p95 {percentile(served, 95) * 1000:7.1f} ms"
+              f"  p99 {percentile(served, 99) * 1000:7.1f} ms  LLM calls {llm_calls}"
+              f"  hedge rate {stats['hedge_rate']:.1%}  hedge wins {stats['hedge_wins']}"
+              f"  final delay {stats['delay_seconds'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Cold-start import cost of each service entry module, measured with -X importtime.
+
+Every module is imported in a fresh interpreter from its service directory, so
+the numbers match what a new container pays before it can bind its port.
+
+Run from the repository root:
+    python benchmarks/bench_import_time.py [--top 10] [--json results.json]
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (service directory, entry module)
+SERVICES = [
+    ("portal", "app"),
+    ("portal", "asgi"),
+    ("planner", "app"),
+    ("planner", "asgi"),
+    ("bookprovider", "provider"),
+    ("courses", "main"),
+    ("assignment", "main"),
+]
+
+# import time: self [us] | cumulative | imported package
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(service, module):
+    """Import a module in a fresh interpreter and collect its -X importtime report."""
+    env = dict(os.environ, WARMUP_ENABLED="false", CACHE_ENABLED="false")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.join(ROOT, service), env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    # Children are printed before their parent, one extra level of indentation each
+    children, total_ms, heaviest = [], 0.0, []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        depth = (len(match.group(3)) - 1) // 2
+        cumulative_ms = int(match.group(2)) / 1000
+        if depth == 1:
+            children.append((match.group(4), cumulative_ms))
+        elif depth == 0:
+            if match.group(4) == module:
+                total_ms, heaviest = cumulative_ms, children
+            children = []
+    error = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+    return {
+        "service": service,
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": error,
+        "wall_ms": round(wall_ms, 1),
+        "import_ms": round(total_ms, 1),
+        "heaviest": sorted(heaviest, key=lambda item: item[1], reverse=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=5, help="heaviest imports listed per module")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = [measure(service, module) for service, module in SERVICES]
+
+    print("📊 Service import time (fresh interpreter)")
+    for result in results:
+        name = f"{result['service']}/{result['module']}.py"
+        status = "ok" if result["ok"] else f"FAILED: {result['error']}"
+        print(f"  {name:<26} import {result['import_ms']:9.1f} ms  wall {result['wall_ms']:9.1f} ms  {status}")
+        for package, ms in result["heaviest"][:args.top]:
+            print(f"      {package:<40} {ms:9.1f} ms")
+
+    if args.json:
+        for result in results:
+            result["heaviest"] = result["heaviest"][:args.top]
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
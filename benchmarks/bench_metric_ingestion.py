@@ -0,0 +1,62 @@
+"""
+Time to turn Cloud Monitoring time series into the DataFrame behind each MLOps graph.
+
+The previous code grew the frame with one pd.concat per point, series_frame
+reads each series into NumPy arrays and builds the frame once. The per-point
+concat is quadratic, so it is only run up to BENCH_LEGACY_MAX points.
+
+Run from the repository root:
+    python benchmarks/bench_metric_ingestion.py
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mlops.visualizations.generate_graphs import series_frame
+from tests.fakes.monitoring import make_series
+
+SIZES = [int(size) for size in os.environ.get("BENCH_POINTS", "1000,10000,100000,1000000").split(",")]
+SERIES = int(os.environ.get("BENCH_SERIES", 10))
+LEGACY_MAX = int(os.environ.get("BENCH_LEGACY_MAX", 10000))
+METRIC = "aiplatform.googleapis.com/endpoint/prediction_latency"
+
+
+def per_point_concat(results):
+    df = pd.DataFrame({'timestamp': [], 'latency': []})
+    for result in results:
+        for point in result.points:
+            df = pd.concat([df, pd.DataFrame({
+                'timestamp': [datetime.fromtimestamp(point.interval.end_time.seconds)],
+                'latency': [point.value.double_value]
+            })])
+    return df
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"📊 Metric ingestion, {SERIES} series per metric")
+    for size in SIZES:
+        results = [make_series(METRIC, size // SERIES, step=10, labels={"endpoint_id": str(n)}) for n in range(SERIES)]
+        vectorized = timed(series_frame, results, "latency")
+        line = f"  {size:>9,} points  series_frame {vectorized * 1000:9.1f} ms"
+        if size <= LEGACY_MAX:
+            legacy = timed(per_point_concat, results)
+            line += f"  per-point concat {legacy * 1000:10.1f} ms  ({legacy / vectorized:,.0f}x)"
+        else:
+            line += "  per-point concat skipped (quadratic)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Throughput of gen_assignment_deepseek against a one-replica fake Vertex endpoint, with and without micro-batching.
+
+The fake endpoint holds its replica for a fixed latency plus a small cost per
+instance, like a GPU serving a batch.
+
+Run from the repository root:
+    python benchmarks/bench_micro_batching.py
+"""
+import io
+import os
+import sys
+import time
+import contextlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "assignment"))
+
+from batching import MicroBatcher
+from tests.fakes.aiplatform import FakeEndpoint
+
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", 64))
+CONCURRENCY = int(os.environ.get("BENCH_CONCURRENCY", 16))
+LATENCY = float(os.environ.get("BENCH_PREDICT_LATENCY", 0.2))
+PER_INSTANCE = float(os.environ.get("BENCH_PER_INSTANCE", 0.02))
+
+# The module name has a dash, load it from its path
+spec = importlib.util.spec_from_file_location("deepseek_vertexai", os.path.join(ROOT, "assignment", "deepseel-vertexai.py"))
+deepseek_vertexai = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(deepseek_vertexai)
+
+
+def run(max_batch_size):
+    endpoint = FakeEndpoint(replicas=1, latency=LATENCY, per_instance=PER_INSTANCE)
+    deepseek_vertexai._endpoint = endpoint
+    deepseek_vertexai._batcher = MicroBatcher(deepseek_vertexai.predict_batch, max_batch_size=max_batch_size)
+
+    start = time.perf_counter()
+    # gen_assignment_deepseek prints every prediction
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        list(pool.map(lambda n: deepseek_vertexai.gen_assignment_deepseek({"teaching_plan": f"Plan {n}"}), range(REQUESTS)))
+    elapsed = time.perf_counter() - start
+    return REQUESTS / elapsed, endpoint.calls
+
+
+def main():
+    print(f"📊 DeepSeek endpoint, 1 replica, {LATENCY * 1000:.0f} ms + {PER_INSTANCE * 1000:.0f} ms/instance, "
+          f"{REQUESTS} plans from {CONCURRENCY} callers")
+    for name, size in (("one instance per call", 1), ("micro-batched (8)", 8), ("micro-batched (16)", 16)):
+        throughput, calls = run(size)
+        print(f"  {name:<24} {throughput:7.1f} req/s  {calls:3d} predict calls")
+
+
+if __name__ == "__main__":
+    main()
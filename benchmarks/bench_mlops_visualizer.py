@@ -0,0 +1,206 @@
+"""
+Offline benchmark of the MLOps dashboard: ingestion, figure building, export and the Dash callback.
+
+A SyntheticMetricServiceClient stands in for Cloud Monitoring, with one
+point per minute per series over each window, BENCH_FAN_OUT series per
+metric and BENCH_GAP_RATIO of the points missing. Each stage is timed
+BENCH_REPEATS times per window:
+
+    ingest_cold         first snapshot, every point fetched into an empty metric store
+    ingest_incremental  refresh of a warm store, only the late minutes are fetched again
+    figures             create_graphs from the snapshot
+    export              writing the HTML and CSV files through a new GraphExporter
+    export_unchanged    the same export again, skipped by change detection
+    callback            POST to the dashboard's update callback with a fresh snapshot, as the browser does
+
+The results go to benchmarks/results/mlops_visualizer-<commit>.json; point
+BENCH_COMPARE at the file of an earlier commit to print the change per stage.
+
+Run from the repository root:
+    python benchmarks/bench_mlops_visualizer.py
+    BENCH_COMPARE=benchmarks/results/mlops_visualizer-abc1234.json python benchmarks/bench_mlops_visualizer.py
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import statistics
+import subprocess
+import tempfile
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# PNG export needs kaleido, without it every export would only time the failure
+os.environ.setdefault("MLOPS_EXPORT_PNG", "true" if importlib.util.find_spec("kaleido") else "false")
+
+import dash
+import numpy as np
+import pandas as pd
+import plotly
+
+from mlops.visualizations.generate_graphs import (
+    POINT_BUDGET, WINDOWS, GraphExporter, MetricStore, MLOpsVisualizer, create_dashboard
+)
+from tests.fakes.monitoring import SyntheticMetricServiceClient
+
+BENCH_WINDOWS = os.environ.get("BENCH_WINDOWS", "24h,7d,30d").split(",")
+FAN_OUT = int(os.environ.get("BENCH_FAN_OUT", 4))
+GAP_RATIO = float(os.environ.get("BENCH_GAP_RATIO", 0.02))
+REPEATS = int(os.environ.get("BENCH_REPEATS", 3))
+STEP = 60
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+OUTPUT = os.environ.get("BENCH_OUTPUT")
+COMPARE = os.environ.get("BENCH_COMPARE")
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def summary(runs, **extra):
+    return {"median_ms": round(statistics.median(runs) * 1000, 2), "min_ms": round(min(runs) * 1000, 2),
+            "runs_ms": [round(run * 1000, 2) for run in runs], **extra}
+
+
+def callback_payload(app, window):
+    output = next(key for key in app.callback_map if "latency-ts-graph" in key)
+    outputs = [{"id": part.split(".")[0], "property": part.split(".")[1]}
+               for part in output.strip(".").split("...")]
+    return {
+        "output": output,
+        "outputs": outputs,
+        "inputs": [{"id": "interval-component", "property": "n_intervals", "value": 1},
+                   {"id": "window-selector", "property": "value", "value": window}],
+        "changedPropIds": ["interval-component.n_intervals"],
+        "state": [],
+    }
+
+
+def bench_window(window, workdir):
+    hours = WINDOWS[window]
+    client = SyntheticMetricServiceClient(points=hours * 3600 // STEP, fan_out=FAN_OUT, step=STEP,
+                                          gap_ratio=GAP_RATIO)
+    stages = {}
+
+    cold, snapshot, visualizer = [], None, None
+    for n in range(REPEATS):
+        if visualizer is not None:
+            visualizer.exporter.shutdown()
+        visualizer = MLOpsVisualizer(client=client, metric_store=MetricStore(os.path.join(workdir, f"cold-{n}.db")))
+        seconds, snapshot = timed(lambda: visualizer.snapshot(window))
+        cold.append(seconds)
+    rows = sum(len(frame) for frame in snapshot.values())
+    stages["ingest_cold"] = summary(cold, points=rows)
+
+    # The last visualizer's store is warm, each refresh only re-reads the late minutes
+    incremental = [timed(lambda: visualizer.metric_snapshots[window].get(max_age=0))[0] for _ in range(REPEATS)]
+    stages["ingest_incremental"] = summary(incremental)
+
+    figure_runs, graphs = [], None
+    for _ in range(REPEATS):
+        seconds, graphs = timed(lambda: visualizer.create_graphs(snapshot))
+        figure_runs.append(seconds)
+    payload = sum(len(fig.to_json()) for pair in graphs.values() for fig in pair)
+    stages["figures"] = summary(figure_runs, payload_bytes=payload)
+
+    export_runs, unchanged_runs = [], []
+    for n in range(REPEATS):
+        exporter = GraphExporter(os.path.join(workdir, f"graphs-{window}-{n}"))
+        # The first submit also starts the process pool, it is not part of a steady-state export
+        exporter._pool().submit(int).result()
+        export_runs.append(timed(lambda: exporter.submit(graphs, snapshot).result())[0])
+        unchanged_runs.append(timed(lambda: exporter.submit(graphs, snapshot).result())[0])
+        exporter.shutdown()
+    stages["export"] = summary(export_runs, png=exporter.png)
+    stages["export_unchanged"] = summary(unchanged_runs)
+
+    app = create_dashboard(visualizer)
+    http = app.server.test_client()
+    payload = callback_payload(app, window)
+    callback_runs, response_bytes = [], 0
+    # Expire the snapshot so each call refreshes it, as the first session after an interval does
+    visualizer.metric_snapshots[window].max_age = 0
+    for _ in range(REPEATS):
+        seconds, response = timed(lambda: http.post("/_dash-update-component", json=payload))
+        if response.status_code != 200:
+            raise RuntimeError(f"Callback failed with {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        callback_runs.append(seconds)
+        response_bytes = len(response.get_data())
+    stages["callback"] = summary(callback_runs, response_bytes=response_bytes)
+    visualizer.exporter.shutdown()
+
+    return {"points_per_series": client.total_points // (FAN_OUT * 4), "stored_points": rows, "stages": stages}
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\n⚖️  Against {baseline['commit']} ({baseline_path})")
+    for window, result in results["windows"].items():
+        before = baseline["windows"].get(window)
+        if not before:
+            continue
+        for stage, numbers in result["stages"].items():
+            old = before["stages"].get(stage)
+            if old:
+                change = (numbers["median_ms"] - old["median_ms"]) / old["median_ms"] * 100 if old["median_ms"] else 0
+                print(f"  {window:>4} {stage:<19} {old['median_ms']:9.1f} ms -> {numbers['median_ms']:9.1f} ms "
+                      f"({change:+.0f}%)")
+
+
+def main():
+    results = {
+        "benchmark": "mlops_visualizer",
+        "commit": commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "numpy": np.__version__, "pandas": pd.__version__, "plotly": plotly.__version__, "dash": dash.__version__,
+        },
+        "params": {"windows": BENCH_WINDOWS, "fan_out": FAN_OUT, "gap_ratio": GAP_RATIO, "step_seconds": STEP,
+                   "repeats": REPEATS, "point_budget": POINT_BUDGET},
+        "windows": {},
+    }
+
+    print(f"📊 MLOps dashboard, {FAN_OUT} series per metric, {GAP_RATIO:.0%} gaps, median of {REPEATS} runs")
+    workdir = tempfile.mkdtemp(prefix="bench-mlops-")
+    cwd = os.getcwd()
+    # MLOpsVisualizer creates its graphs directory under the working directory
+    os.chdir(workdir)
+    try:
+        for window in BENCH_WINDOWS:
+            result = results["windows"][window] = bench_window(window, workdir)
+            print(f"  {window:>4} {result['stored_points']:>9,} points")
+            for stage, numbers in result["stages"].items():
+                extra = {key: value for key, value in numbers.items() if not key.endswith("_ms")}
+                print(f"       {stage:<19} {numbers['median_ms']:9.1f} ms  {extra or ''}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = OUTPUT or os.path.join(RESULTS_DIR, f"mlops_visualizer-{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+    if COMPARE:
+        compare(results, COMPARE)
+
+
+if __name__ == "__main__":
+    main()
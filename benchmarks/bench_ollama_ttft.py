@@ -0,0 +1,72 @@
+"""
+Time-to-first-token of DeepSeek assignment drafts against a local fake Ollama server.
+
+Plan events arrive GAP seconds apart while Ollama's default keep-alive
+(scaled down to DEFAULT_KEEP_ALIVE) has already unloaded the model. The
+previous client (langchain OllamaLLM, a new client per event, no keep_alive,
+full response awaited) is compared with OllamaBackend (shared session,
+keep_alive, warm-up at start-up, streaming with <think> stripped).
+
+Run from the repository root:
+    python benchmarks/bench_ollama_ttft.py
+"""
+import os
+import sys
+import time
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "assignment"))
+
+from langchain_ollama.llms import OllamaLLM
+from ollama_backend import OllamaBackend
+from tests.fakes.ollama import FakeOllamaServer
+
+EVENTS = int(os.environ.get("BENCH_EVENTS", 4))
+GAP = float(os.environ.get("BENCH_EVENT_GAP", 1.5))
+LOAD_SECONDS = float(os.environ.get("BENCH_LOAD_SECONDS", 2.0))
+TOKEN_DELAY = float(os.environ.get("BENCH_TOKEN_DELAY", 0.02))
+DEFAULT_KEEP_ALIVE = float(os.environ.get("BENCH_DEFAULT_KEEP_ALIVE", 1.0))
+PROMPT = "Develop engaging and practical assignments for each week. Based on this teaching plan: Geometry"
+
+
+def previous_client(server):
+    samples = []
+    for _ in range(EVENTS):
+        time.sleep(GAP)
+        start = time.perf_counter()
+        OllamaLLM(model="deepseek-r1:1.5b", base_url=server.url).invoke(PROMPT)
+        # Nothing reaches the assignment state before the whole response is in
+        samples.append((time.perf_counter() - start, time.perf_counter() - start))
+    return samples
+
+
+def ollama_backend(server):
+    backend = OllamaBackend(host=server.url, keep_alive="30m")
+    backend.warm_up()  # at instance start-up
+    samples = []
+    for _ in range(EVENTS):
+        time.sleep(GAP)
+        start = time.perf_counter()
+        first = []
+        backend.generate(PROMPT, on_token=lambda text: first or first.append(time.perf_counter() - start))
+        samples.append((first[0], time.perf_counter() - start))
+    return samples
+
+
+def main():
+    print(f"📊 DeepSeek via fake Ollama: {EVENTS} events {GAP}s apart, model load {LOAD_SECONDS}s, "
+          f"default keep-alive {DEFAULT_KEEP_ALIVE}s")
+    for name, run in (("OllamaLLM per event", previous_client), ("OllamaBackend", ollama_backend)):
+        with FakeOllamaServer(load_seconds=LOAD_SECONDS, token_delay=TOKEN_DELAY,
+                              default_keep_alive=DEFAULT_KEEP_ALIVE) as server:
+            samples = run(server)
+            ttft = statistics.median(first for first, _ in samples)
+            total = statistics.median(total for _, total in samples)
+            print(f"  {name:<22} TTFT {ttft * 1000:8.1f} ms  total {total * 1000:8.1f} ms  "
+                  f"model loads {server.loads}  connections {server.connections}")
+
+
+if __name__ == "__main__":
+    main()
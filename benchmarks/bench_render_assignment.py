@@ -0,0 +1,63 @@
+"""
+Cold vs warm latency of the portal assignment render cache against a fake bucket.
+
+Run from the repository root:
+    python benchmarks/bench_render_assignment.py
+"""
+import os
+import sys
+import time
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "portal"))
+
+from render import AssignmentRenderCache
+from tests.fakes.storage import FakeBucket
+
+# Typical round-trips: GCS metadata listing, GCS download, LLM formatting call
+LIST_LATENCY = 0.02
+DOWNLOAD_LATENCY = 0.05
+FORMAT_LATENCY = 1.5
+ASSIGNMENT = "# Week 1: Geometry\n\n* Measure the angles of five triangles\n" * 50
+
+
+def slow_formatter(markdown):
+    time.sleep(FORMAT_LATENCY)
+    return f"<pre>{markdown}</pre>"
+
+
+def timed(fn, runs=1):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    bucket = FakeBucket(latency={"list": LIST_LATENCY, "download": DOWNLOAD_LATENCY})
+    bucket.blob("assignment-1.txt").upload_from_string(ASSIGNMENT)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = AssignmentRenderCache(bucket, cache_dir=cache_dir, revalidate_seconds=30, formatter=slow_formatter)
+        results = {
+            "cold (download + format)": timed(cache.render),
+            "warm (memory, inside revalidation window)": timed(cache.render, runs=100),
+            "warm (metadata-only revalidation)": timed(lambda: cache.render(force_revalidate=True), runs=20),
+        }
+
+        restarted = AssignmentRenderCache(bucket, cache_dir=cache_dir, revalidate_seconds=30, formatter=slow_formatter)
+        results["warm (disk, new instance)"] = timed(restarted.render)
+
+    print("📊 Assignment render latency (median)")
+    for name, ms in results.items():
+        print(f"  {name:<45} {ms:10.3f} ms")
+    print(f"  downloads: {bucket.downloads}, listings: {bucket.listings}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Fixtures of the pytest-benchmark suites: each service imported as it is deployed, with fake models.
+
+Run from the repository root:
+    python -m pytest benchmarks --benchmark-only
+"""
+import os
+import sys
+import contextlib
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.services import service_modules
+
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench-project")
+os.environ.setdefault("CACHE_ENABLED", "false")
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    """Enter a service's import context, e.g. service("portal"); the working directory is the service's."""
+    with contextlib.ExitStack() as stack:
+        def enter(name):
+            monkeypatch.chdir(os.path.join(ROOT, name))
+            stack.enter_context(service_modules(name))
+        monkeypatch.setenv("BOOK_CATALOG_PATH", str(tmp_path / "book_catalog.db"))
+        yield enter
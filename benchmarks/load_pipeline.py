@@ -0,0 +1,459 @@
+"""
+End-to-end load test of the plan pipeline: planner -> Pub/Sub -> courses and assignment -> portal quiz.
+
+Everything runs in this process: the planner Flask app is driven at
+BENCH_RATE plans per hour (Poisson arrivals), its plan events go through an
+in-process Pub/Sub emulator to push subscriptions running the courses and
+assignment functions, and each finished plan sends a student to the
+portal's /generate_quiz. Models are fakes with seeded lognormal latencies,
+buckets are in memory and DeepSeek is a local fake Ollama server.
+
+Recorded per plan: planner response time, plan -> audio ready, plan ->
+assignment ready and quiz latency (histograms and percentiles), plus the
+throughput of each stage and the backlog of every queue over time. The
+results go to benchmarks/results/load_pipeline-<commit>.json.
+
+Knobs (environment):
+    BENCH_RATE                  plans per hour (600)
+    BENCH_DURATION              seconds of arrivals (60), the backlog is then drained
+    BENCH_LATENCY_SCALE         multiplies every fake model latency (1.0)
+    BENCH_PLANNER_CONCURRENCY   planner requests served at once (4)
+    BENCH_COURSES_CONCURRENCY   courses deliveries at once, i.e. instances x concurrency (2)
+    BENCH_ASSIGNMENT_CONCURRENCY  assignment deliveries at once (4)
+    BENCH_QUIZ_CONCURRENCY      /generate_quiz requests at once (4)
+    BENCH_FAILURE_RATE          share of Live API sessions failing, their plans are redelivered (0)
+    BENCH_SEED                  seed of the arrivals, latencies and failures (0)
+    BENCH_LOG                   file receiving the services' output (discarded)
+
+Run from the repository root:
+    python benchmarks/load_pipeline.py
+    BENCH_RATE=1800 BENCH_COURSES_CONCURRENCY=1 python benchmarks/load_pipeline.py
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import platform
+import tempfile
+import threading
+import contextlib
+import subprocess
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.services import load_service
+from tests.fakes.genai import FakeGenaiClient, split_weeks_responder
+from tests.fakes.llm import FakeChatVertexAI, FakeVertexAI, latency_distribution, quiz_responder, tool_call
+from tests.fakes.llm import tools_then_answer
+from tests.fakes.ollama import FakeOllamaServer
+from tests.fakes.pubsub import PubSubEmulator, message_json
+from tests.fakes.sql import FakeEngine
+from tests.fakes.storage import FakeStorageClient
+
+RATE = float(os.environ.get("BENCH_RATE", 600))
+DURATION = float(os.environ.get("BENCH_DURATION", 60))
+LATENCY_SCALE = float(os.environ.get("BENCH_LATENCY_SCALE", 1.0))
+PLANNER_CONCURRENCY = int(os.environ.get("BENCH_PLANNER_CONCURRENCY", 4))
+COURSES_CONCURRENCY = int(os.environ.get("BENCH_COURSES_CONCURRENCY", 2))
+ASSIGNMENT_CONCURRENCY = int(os.environ.get("BENCH_ASSIGNMENT_CONCURRENCY", 4))
+QUIZ_CONCURRENCY = int(os.environ.get("BENCH_QUIZ_CONCURRENCY", 4))
+FAILURE_RATE = float(os.environ.get("BENCH_FAILURE_RATE", 0))
+SEED = int(os.environ.get("BENCH_SEED", 0))
+LOG = os.environ.get("BENCH_LOG", os.devnull)
+SAMPLE_SECONDS = 1.0
+DRAIN_TIMEOUT = float(os.environ.get("BENCH_DRAIN_TIMEOUT", 600))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# Median and p99 seconds of each fake model call, before BENCH_LATENCY_SCALE
+LATENCIES = {
+    "planner_chat": (0.8, 3.0),
+    "category": (0.4, 1.5),
+    "search": (1.0, 4.0),
+    "split_weeks": (0.5, 2.0),
+    "gemini": (1.5, 6.0),
+    "quiz": (0.8, 3.0),
+}
+# Each week's recap streams 20 s of audio in 0.2 s chunks, 50 ms apart
+AUDIO_SECONDS = 20.0
+AUDIO_CHUNK_DELAY = 0.05
+LIVE_CONNECT_SECONDS = 0.3
+OLLAMA_TOKEN_DELAY = 0.05
+# Histogram bucket upper bounds, in seconds
+BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf")]
+COHORT = re.compile(r"cohort (\d+)")
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def latency(name, seed):
+    median, p99 = LATENCIES[name]
+    return latency_distribution(median * LATENCY_SCALE, p99 * LATENCY_SCALE, seed=seed)
+
+
+def cohort_of(teaching_plan):
+    return int(COHORT.search(teaching_plan).group(1))
+
+
+def teaching_plan(cohort):
+    return (f"**3-Week Teaching Plan, cohort {cohort}**\n"
+            f"* Week 1: 2D Shapes and Angles (cohort {cohort})\n"
+            f"* Week 2: 3D Shapes and Symmetry (cohort {cohort})\n"
+            f"* Week 3: Position, Direction, and Problem Solving (cohort {cohort})\n")
+
+
+def histogram(samples):
+    """Count, percentiles and bucket counts of a list of seconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1 if p else 0)], 3)
+
+    counts = [0] * len(BUCKETS)
+    for sample in ordered:
+        counts[next(n for n, bound in enumerate(BUCKETS) if sample <= bound)] += 1
+    return {
+        "count": len(ordered), "mean": round(sum(ordered) / len(ordered), 3), "p50": pct(50), "p90": pct(90),
+        "p99": pct(99), "max": round(ordered[-1], 3),
+        "buckets": [{"le": "inf" if bound == float("inf") else bound, "count": count}
+                    for bound, count in zip(BUCKETS, counts) if count],
+    }
+
+
+class Recorder:
+    """Timestamps of every plan through the pipeline, relative to the start of the run."""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self._lock = threading.Lock()
+        self.plans = {}
+        self.quizzes = []
+        self.errors = []
+
+    def now(self):
+        return time.monotonic() - self.start
+
+    def mark(self, cohort, stage, value=None):
+        with self._lock:
+            self.plans.setdefault(cohort, {})[stage] = self.now() if value is None else value
+
+    def get(self, cohort):
+        with self._lock:
+            return dict(self.plans.get(cohort, {}))
+
+    def add(self, items, value):
+        with self._lock:
+            items.append(value)
+
+    def stage(self, start, end):
+        """Seconds between two marks of every plan that has both."""
+        with self._lock:
+            return [plan[end] - plan[start] for plan in self.plans.values() if start in plan and end in plan]
+
+    def count(self, *stages):
+        """Plans that reached every one of the stages."""
+        with self._lock:
+            return sum(1 for plan in self.plans.values() if all(stage in plan for stage in stages))
+
+
+def build_pipeline(workdir, recorder):
+    """Load the services with fake clients and wire them through the Pub/Sub emulator."""
+    os.environ.update({
+        "GOOGLE_CLOUD_PROJECT": "load-test", "WARMUP_ENABLED": "false", "CACHE_ENABLED": "false",
+        "METRICS_ENABLED": "false", "COURSE_BUCKET_NAME": "aidemy-course",
+        "ASSIGNMENT_BUCKET": "aidemy-assignment", "OLLAMA_WARMUP": "false",
+    })
+    emulator = PubSubEmulator(project="load-test")
+    emulator.create_topic("plan")
+    storage = FakeStorageClient()
+    ollama = FakeOllamaServer(load_seconds=2.0 * LATENCY_SCALE, token_delay=OLLAMA_TOKEN_DELAY * LATENCY_SCALE).start()
+    os.environ["OLLAMA_HOST"] = ollama.url
+
+    # Planner: the agent asks for its three tools, then answers with the plan of the requested cohort
+    planner = load_service("planner", "app", "aidemy", "book", "curriculums", "search")
+    chat = FakeChatVertexAI(latency=latency("planner_chat", SEED), responder=tools_then_answer(
+        lambda messages: [
+            tool_call("get_curriculum", year=5, subject="Mathematics"),
+            tool_call("search_latest_resource", search_text="Geometry", curriculum="2D and 3D shapes",
+                      subject="Mathematics", year=5),
+            tool_call("recommend_book", query="Geometry"),
+        ],
+        lambda messages: teaching_plan(next(cohort_of(m.content) for m in messages if COHORT.search(str(m.content)))),
+    ))
+    planner.aidemy.ChatVertexAI = chat.factory()
+    planner.book.VertexAI = FakeVertexAI(latency=latency("category", SEED + 1), responder=lambda p: "Geometry").factory()
+    planner.book.requests = SimpleNamespace(post=lambda *args, **kwargs: SimpleNamespace(text="[]"))
+    planner.curriculums.get_db = lambda: FakeEngine()
+    search = FakeGenaiClient(responder=lambda contents: "Latest geometry resources", latency=latency("search", SEED + 2))
+    planner.search.genai = SimpleNamespace(Client=lambda **kwargs: search)
+    publisher = emulator.publisher()
+    publish = publisher.publish
+
+    def publish_plan(topic, data, **attributes):
+        recorder.mark(cohort_of(json.loads(data)["teaching_plan"]), "published")
+        return publish(topic, data, **attributes)
+
+    publisher.publish = publish_plan
+    planner.app._publisher = publisher
+
+    # Courses: week split, Live API audio per week, WAV uploads to the in-memory bucket
+    os.environ["IDEMPOTENCY_DB_PATH"] = os.path.join(workdir, "courses_idempotency.db")
+    courses = load_service("courses", "main", "audio")
+    failures = random.Random(SEED + 3)
+    live = FakeGenaiClient(responder=split_weeks_responder, latency=latency("split_weeks", SEED + 4),
+                           audio_seconds=AUDIO_SECONDS, chunk_delay=AUDIO_CHUNK_DELAY * LATENCY_SCALE,
+                           connect_latency=LIVE_CONNECT_SECONDS * LATENCY_SCALE,
+                           fail_on=lambda prompt: failures.random() < FAILURE_RATE)
+    courses.audio.genai = SimpleNamespace(Client=lambda **kwargs: live)
+    courses.audio.storage = SimpleNamespace(Client=lambda: storage)
+
+    # Assignment: Gemini and DeepSeek drafts in parallel, combined by Gemini, stored in the bucket
+    os.environ["IDEMPOTENCY_DB_PATH"] = os.path.join(workdir, "assignment_idempotency.db")
+    assignment = load_service("assignment", "main", "gemini")
+    drafts = FakeGenaiClient(responder=lambda contents: "**Week 1:** Shape hunt", latency=latency("gemini", SEED + 5))
+    assignment.gemini.genai = SimpleNamespace(Client=lambda **kwargs: drafts)
+    assignment.main.storage = SimpleNamespace(Client=lambda: storage)
+
+    # Portal: the quiz a student takes once the plan's course material is ready
+    portal = load_service("portal", "app", "quiz")
+    portal.quiz.VertexAI = FakeVertexAI(latency=latency("quiz", SEED + 6), responder=quiz_responder).factory()
+
+    def handler(name, function):
+        def push(event):
+            cohort = cohort_of(message_json(event)["teaching_plan"])
+            if f"{name}_first_delivery" not in recorder.get(cohort):
+                recorder.mark(cohort, f"{name}_first_delivery")
+            return function(event)
+        return push
+
+    def ready(name):
+        def on_ack(message, attempts):
+            cohort = cohort_of(json.loads(message["data"])["teaching_plan"])
+            recorder.mark(cohort, f"{name}_ready")
+            recorder.mark(cohort, f"{name}_attempts", attempts)
+        return on_ack
+
+    subscriptions = {
+        "courses": emulator.create_subscription(
+            "courses", "plan", handler("courses", courses.main.process_teaching_plan),
+            max_concurrency=COURSES_CONCURRENCY, min_backoff=10 * LATENCY_SCALE, on_ack=ready("courses")),
+        "assignment": emulator.create_subscription(
+            "assignment", "plan", handler("assignment", assignment.main.generate_assignment),
+            max_concurrency=ASSIGNMENT_CONCURRENCY, min_backoff=10 * LATENCY_SCALE, on_ack=ready("assignment")),
+    }
+    def model_calls():
+        return {"planner_chat": chat.calls, "search": search.generate_calls, "split_weeks": live.generate_calls,
+                "live_sessions": live.sessions, "gemini": drafts.generate_calls, "ollama": ollama.requests}
+
+    return SimpleNamespace(planner=planner, portal=portal, emulator=emulator, subscriptions=subscriptions,
+                           ollama=ollama, model_calls=model_calls)
+
+
+def run(pipeline, recorder):
+    rng = random.Random(SEED)
+    planner_pool = ThreadPoolExecutor(max_workers=PLANNER_CONCURRENCY, thread_name_prefix="planner")
+    quiz_pool = ThreadPoolExecutor(max_workers=QUIZ_CONCURRENCY, thread_name_prefix="student")
+    counters = {"planner_waiting": 0, "planner_in_flight": 0, "quiz_pending": 0}
+    lock = threading.Lock()
+
+    def count(name, amount):
+        with lock:
+            counters[name] += amount
+
+    def take_quiz(cohort):
+        start = recorder.now()
+        try:
+            response = pipeline.portal.app.app.test_client().get("/generate_quiz")
+            if response.status_code != 200:
+                raise RuntimeError(f"/generate_quiz returned {response.status_code}")
+            recorder.add(recorder.quizzes, recorder.now() - start)
+        except Exception as e:
+            recorder.add(recorder.errors, {"stage": "quiz", "cohort": cohort, "error": str(e)})
+        finally:
+            count("quiz_pending", -1)
+
+    def plan(cohort):
+        count("planner_waiting", -1)
+        count("planner_in_flight", 1)
+        try:
+            response = pipeline.planner.app.app.test_client().post("/", data={
+                "year": 5, "subject": "Mathematics", "addon": f"Geometry for cohort {cohort}"})
+            if response.status_code != 200:
+                raise RuntimeError(f"Planner returned {response.status_code}")
+            recorder.mark(cohort, "planned")
+        except Exception as e:
+            recorder.add(recorder.errors, {"stage": "planner", "cohort": cohort, "error": str(e)})
+        finally:
+            count("planner_in_flight", -1)
+
+    def done(cohort):
+        plan = recorder.get(cohort)
+        return "courses_ready" in plan and "assignment_ready" in plan
+
+    timeline, stop = [], threading.Event()
+
+    def sample():
+        while not stop.wait(SAMPLE_SECONDS):
+            with lock:
+                point = {"t": round(recorder.now(), 1), **counters}
+            for name, subscription in pipeline.subscriptions.items():
+                point[f"{name}_backlog"] = subscription.backlog()
+                point[f"{name}_in_flight"] = subscription.stats["in_flight"]
+                point[f"{name}_oldest_seconds"] = round(subscription.oldest_unacked_age(), 1)
+            point["completed_plans"] = recorder.count("courses_ready", "assignment_ready")
+            timeline.append(point)
+
+    threading.Thread(target=sample, name="backlog-sampler", daemon=True).start()
+
+    # Poisson arrivals, each plan's students start their quiz once its audio and assignment are ready
+    cohort, next_arrival = 0, rng.expovariate(RATE / 3600)
+    quizzed = set()
+
+    def start_quizzes():
+        for ready in [c for c in range(cohort) if c not in quizzed and done(c)]:
+            quizzed.add(ready)
+            count("quiz_pending", 1)
+            quiz_pool.submit(take_quiz, ready)
+
+    while next_arrival < DURATION:
+        # Arrivals are scheduled on the clock, a slow planner does not slow them down
+        while recorder.now() < next_arrival:
+            start_quizzes()
+            time.sleep(min(0.1, max(0.0, next_arrival - recorder.now())))
+        recorder.mark(cohort, "arrival")
+        count("planner_waiting", 1)
+        planner_pool.submit(plan, cohort)
+        cohort += 1
+        next_arrival += rng.expovariate(RATE / 3600)
+
+    deadline = time.monotonic() + DRAIN_TIMEOUT
+    while time.monotonic() < deadline:
+        start_quizzes()
+        with lock:
+            busy = any(counters.values())
+        if not busy and not any(subscription.backlog() for subscription in pipeline.subscriptions.values()):
+            break
+        time.sleep(0.1)
+    planner_pool.shutdown(wait=True)
+    quiz_pool.shutdown(wait=True)
+    stop.set()
+    return {"plans": cohort, "end": recorder.now(), "timeline": timeline, "drained": time.monotonic() < deadline}
+
+
+def report(pipeline, recorder, outcome):
+    end = outcome["end"]
+    completed = recorder.count("courses_ready", "assignment_ready")
+    stages = {
+        "planner": histogram(recorder.stage("arrival", "planned")),
+        "plan_to_audio": histogram(recorder.stage("arrival", "courses_ready")),
+        "plan_to_assignment": histogram(recorder.stage("arrival", "assignment_ready")),
+        "courses_queue": histogram(recorder.stage("published", "courses_first_delivery")),
+        "assignment_queue": histogram(recorder.stage("published", "assignment_first_delivery")),
+        "quiz": histogram(recorder.quizzes),
+    }
+    per_hour = 3600 / end if end else 0
+    throughput = {
+        "offered_plans_per_hour": RATE,
+        "planned_per_hour": round(recorder.count("planned") * per_hour, 1),
+        "audio_ready_per_hour": round(recorder.count("courses_ready") * per_hour, 1),
+        "assignment_ready_per_hour": round(recorder.count("assignment_ready") * per_hour, 1),
+        "completed_plans_per_hour": round(completed * per_hour, 1),
+        "quizzes_per_hour": round(len(recorder.quizzes) * per_hour, 1),
+    }
+    return {
+        "benchmark": "load_pipeline",
+        "commit": commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": {
+            "rate_per_hour": RATE, "duration_seconds": DURATION, "latency_scale": LATENCY_SCALE, "seed": SEED,
+            "planner_concurrency": PLANNER_CONCURRENCY, "courses_concurrency": COURSES_CONCURRENCY,
+            "assignment_concurrency": ASSIGNMENT_CONCURRENCY, "quiz_concurrency": QUIZ_CONCURRENCY,
+            "failure_rate": FAILURE_RATE, "model_latencies": LATENCIES, "audio_seconds_per_week": AUDIO_SECONDS,
+        },
+        "plans": outcome["plans"],
+        "completed": completed,
+        "drained": outcome["drained"],
+        "wall_seconds": round(end, 1),
+        "stages": stages,
+        "throughput": throughput,
+        "subscriptions": {name: dict(subscription.stats) for name, subscription in pipeline.subscriptions.items()},
+        "model_calls": pipeline.model_calls(),
+        "errors": recorder.errors[:20],
+        "timeline": outcome["timeline"],
+    }
+
+
+def print_report(results):
+    print(f"  {results['plans']} plans offered, {results['completed']} completed in {results['wall_seconds']} s"
+          f"{'' if results['drained'] else ' (backlog not drained)'}")
+    print("\n  Stage latency (s)          count     p50     p90     p99     max")
+    for name, stats in results["stages"].items():
+        if stats["count"]:
+            print(f"    {name:<22} {stats['count']:>7} {stats['p50']:>7.2f} {stats['p90']:>7.2f} "
+                  f"{stats['p99']:>7.2f} {stats['max']:>7.2f}")
+    for name in ("plan_to_audio", "plan_to_assignment", "quiz"):
+        stats = results["stages"][name]
+        if stats["count"]:
+            print(f"\n  {name} histogram")
+            for bucket in stats["buckets"]:
+                print(f"    <= {str(bucket['le']):>6} s {bucket['count']:>5} {'#' * max(1, 40 * bucket['count'] // stats['count'])}")
+    print("\n  Throughput (per hour)")
+    for name, value in results["throughput"].items():
+        print(f"    {name:<28} {value:>8}")
+    print("\n  Backlog over time (s: planner waiting / courses / assignment / quizzes pending)")
+    timeline = results["timeline"]
+    for point in timeline[::max(1, len(timeline) // 15)]:
+        print(f"    {point['t']:>6}: {point['planner_waiting']:>3} / {point['courses_backlog']:>3} / "
+              f"{point['assignment_backlog']:>3} / {point['quiz_pending']:>3}   completed {point['completed_plans']}")
+    for name, stats in results["subscriptions"].items():
+        print(f"  {name}: {stats['acked']} acked, {stats['nacked']} redelivered, {stats['dead_lettered']} dead-lettered,"
+              f" peak {stats['peak_in_flight']} in flight")
+    if results["errors"]:
+        print(f"  ❌ {len(results['errors'])} errors, first: {results['errors'][0]}")
+
+
+def main():
+    print(f"📊 Plan pipeline at {RATE:.0f} plans/hour for {DURATION:.0f} s, latency scale {LATENCY_SCALE}, "
+          f"capacity planner {PLANNER_CONCURRENCY} / courses {COURSES_CONCURRENCY} / "
+          f"assignment {ASSIGNMENT_CONCURRENCY} / quiz {QUIZ_CONCURRENCY}")
+    workdir = tempfile.mkdtemp(prefix="bench-pipeline-")
+    cwd = os.getcwd()
+    # The portal reads teaching_plan.txt from its working directory
+    os.chdir(os.path.join(ROOT, "portal"))
+    recorder = Recorder()
+    pipeline = None
+    try:
+        with open(LOG, "w") as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            pipeline = build_pipeline(workdir, recorder)
+            recorder.start = time.monotonic()
+            outcome = run(pipeline, recorder)
+        results = report(pipeline, recorder, outcome)
+    finally:
+        os.chdir(cwd)
+        if pipeline is not None:
+            pipeline.emulator.shutdown()
+            pipeline.ollama.stop()
+
+    print_report(results)
+    output = os.environ.get("BENCH_OUTPUT") or os.path.join(RESULTS_DIR, f"load_pipeline-{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
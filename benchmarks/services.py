@@ -0,0 +1,78 @@
+"""
+Import the services side by side, each with its sibling modules imported by name as when it is deployed.
+
+The services keep their own copies of some modules (app, main, hedging,
+llm_cache, idempotency...), so those shared names are swapped out of
+sys.modules between services.
+"""
+import os
+import sys
+import importlib
+import contextlib
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = ("assignment", "bookprovider", "courses", "planner", "portal")
+
+
+def module_names(service):
+    return {name[:-3] for name in os.listdir(os.path.join(ROOT, service)) if name.endswith(".py")}
+
+
+def shared_names():
+    """Module names that more than one service has its own copy of."""
+    seen, shared = set(), set()
+    for service in SERVICES:
+        names = module_names(service)
+        shared |= seen & names
+        seen |= names
+    return shared
+
+
+def _pop(names):
+    return {name: sys.modules.pop(name) for name in list(sys.modules) if name.split(".")[0] in names}
+
+
+@contextlib.contextmanager
+def service_modules(service):
+    """
+    Let a service import its sibling modules by name for the duration of the block.
+
+    The modules another service imported are set aside meanwhile and
+    restored afterwards, and this service's are dropped.
+    """
+    names = set().union(*(module_names(other) for other in SERVICES))
+    saved = _pop(names)
+    directory = os.path.join(ROOT, service)
+    sys.path.insert(0, directory)
+    try:
+        yield
+    finally:
+        sys.path.remove(directory)
+        _pop(names)
+        sys.modules.update(saved)
+
+
+def load_service(service, *modules):
+    """
+    Import modules of a service and keep them loaded next to the other services'.
+
+    The modules only this service has stay in sys.modules, so its imports
+    made at call time (e.g. `from aidemy import prep_class` in a route)
+    still resolve; its copies of the shared ones are only reachable through
+    the modules that imported them.
+
+    Returns:
+        SimpleNamespace: The imported modules by name
+    """
+    shared = shared_names()
+    saved = _pop(shared)
+    directory = os.path.join(ROOT, service)
+    sys.path.insert(0, directory)
+    try:
+        loaded = {name: importlib.import_module(name) for name in modules}
+    finally:
+        sys.path.remove(directory)
+        _pop(shared)
+        sys.modules.update(saved)
+    return SimpleNamespace(**loaded)
@@ -0,0 +1,137 @@
+"""
+Overhead of the agent hot paths around their model calls: prep_class, generate_quiz_question, check_answers, recommended.
+
+Every model is a deterministic fake answering at once, so the timings are
+the code's own cost: prompt building, parsing, graph and tool dispatch,
+Flask handling, catalog lookups. The model calls of one run and their
+model time are in each benchmark's extra_info; BENCH_LLM_LATENCY gives the
+fakes a fixed latency per call.
+
+Run from the repository root:
+    python -m pytest benchmarks/test_agent_hot_paths.py --benchmark-only
+    python -m pytest benchmarks/test_agent_hot_paths.py --benchmark-json=benchmarks/results/agent_hot_paths.json
+"""
+import os
+import json
+import itertools
+from types import SimpleNamespace
+
+import flask
+import pytest
+import langchain_google_vertexai
+from google import genai
+
+from tests.fakes.genai import FakeGenaiClient
+from tests.fakes.llm import FakeChatVertexAI, FakeVertexAI, quiz_responder, tool_call, tools_then_answer
+from tests.fakes.sql import FakeEngine
+
+LLM_LATENCY = float(os.environ.get("BENCH_LLM_LATENCY", 0.0))
+PLAN = "Week 1: 2D Shapes and Angles\nWeek 2: 3D Shapes and Symmetry\nWeek 3: Measuring Area and Volume"
+PREP_NEEDS = ("I'm doing a course for year 5 on subject Mathematics in Geometry, get school curriculum, "
+              "and come up with few books recommendation plus search latest resources on the internet base on "
+              "the curriculum outcome. And come up with a 3 week teaching plan")
+_books = itertools.count()
+
+
+def fake_book(n):
+    return {"bookname": f"Geometry Book {n}", "author": f"Author {n}", "publisher": "Aidemy Press",
+            "publishing_date": "2020"}
+
+
+def book_responder(messages):
+    prompt = messages[-1].content
+    if "distinct book recommendations" in prompt:
+        count = int(prompt.split("Generate ")[-1].split(" distinct")[0])
+        return json.dumps({"books": [fake_book(next(_books)) for _ in range(count)]})
+    return json.dumps(fake_book(next(_books)))
+
+
+def record(benchmark, fn, *fakes):
+    """Run fn once more outside the timed rounds and put its model calls and model time in extra_info."""
+    for fake in fakes:
+        fake.calls, fake.model_seconds = 0, 0.0
+    fn()
+    benchmark.extra_info["llm_calls"] = sum(fake.calls for fake in fakes)
+    benchmark.extra_info["model_seconds"] = round(sum(fake.model_seconds for fake in fakes), 6)
+
+
+def test_prep_class(benchmark, service, monkeypatch):
+    """The planner's LangGraph agent: a tool-calling turn, the three tools, then the plan."""
+    chat = FakeChatVertexAI(latency=LLM_LATENCY, responder=tools_then_answer(
+        lambda messages: [
+            tool_call("get_curriculum", year=5, subject="Mathematics"),
+            tool_call("search_latest_resource", search_text="Geometry", curriculum="2D and 3D shapes",
+                      subject="Mathematics", year=5),
+            tool_call("recommend_book", query="Geometry"),
+        ],
+        PLAN,
+    ))
+    category = FakeVertexAI(latency=LLM_LATENCY, responder=lambda prompt: "Geometry")
+    search = FakeGenaiClient(responder=lambda contents: "Latest geometry resources", latency=LLM_LATENCY)
+    monkeypatch.setattr(langchain_google_vertexai, "ChatVertexAI", chat.factory())
+    monkeypatch.setattr(langchain_google_vertexai, "VertexAI", category.factory())
+    monkeypatch.setattr(genai, "Client", lambda **kwargs: search)
+    service("planner")
+    import aidemy
+    import book
+    import curriculums
+    monkeypatch.setattr(curriculums, "get_db", lambda: FakeEngine())
+    monkeypatch.setattr(book.requests, "post", lambda *args, **kwargs: SimpleNamespace(
+        text=json.dumps([fake_book(1), fake_book(2)])))
+
+    plan = benchmark(aidemy.prep_class, PREP_NEEDS)
+
+    assert plan == PLAN
+    assert chat.bound_tools == ["get_curriculum", "search_latest_resource", "recommend_book"]
+    record(benchmark, lambda: aidemy.prep_class(PREP_NEEDS), chat, category)
+
+
+def test_generate_quiz_question(benchmark, service, monkeypatch):
+    """A quiz question: reading the plan, prompt | VertexAI | JsonOutputParser."""
+    llm = FakeVertexAI(latency=LLM_LATENCY, responder=quiz_responder)
+    monkeypatch.setattr(langchain_google_vertexai, "VertexAI", llm.factory())
+    service("portal")
+    import quiz
+
+    question = benchmark(quiz.generate_quiz_question, "teaching_plan.txt", "easy", "us-central1")
+
+    assert question["answer"] == "B" and len(question["options"]) == 4
+    record(benchmark, lambda: quiz.generate_quiz_question("teaching_plan.txt", "easy", "us-central1"), llm)
+
+
+def test_check_answers(benchmark, service):
+    """Grading a submitted 10 question quiz through the portal's Flask route, every answer correct."""
+    service("portal")
+    from app import app
+    quiz = [json.loads(quiz_responder("")) for _ in range(10)]
+    submission = {"quiz": quiz, "answers": [question["answer"] for question in quiz]}
+    client = app.test_client()
+
+    response = benchmark(client.post, "/check_answers", json=submission)
+
+    assert response.status_code == 200
+    assert all(result["is_correct"] for result in response.get_json())
+
+
+@pytest.mark.parametrize("path", ["catalog", "llm"])
+def test_recommended(benchmark, service, monkeypatch, path):
+    """The book provider's HTTP function: served from the local catalog, or from one LLM list call."""
+    llm = FakeChatVertexAI(latency=LLM_LATENCY, responder=book_responder)
+    monkeypatch.setattr(langchain_google_vertexai, "ChatVertexAI", llm.factory())
+    service("bookprovider")
+    import provider
+    monkeypatch.setattr(provider, "refresh_in_background", lambda category, number_of_book: None)
+    app = flask.Flask(__name__)
+    categories = itertools.count()
+
+    def call():
+        # A new single-word category every round misses the catalog, even its related-category search
+        category = f"topic{next(categories)}" if path == "llm" else "Geometry"
+        with app.test_request_context(json={"category": category, "number_of_book": 2}):
+            return provider.recommended(flask.request)
+
+    call()
+    response = benchmark(call)
+
+    assert len(response.get_json()) == 2
+    record(benchmark, call, llm)
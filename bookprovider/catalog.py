@@ -0,0 +1,177 @@
+import os
+import re
+import time
+import random
+import sqlite3
+import threading
+
+BOOK_CATALOG_PATH = os.environ.get("BOOK_CATALOG_PATH", "/tmp/book_catalog.db")
+
+
+def normalize_category(category: str) -> str:
+    """Lower-case a category and reduce it to space separated words ("  Geometry!" -> "geometry")."""
+    return " ".join(re.findall(r"\w+", category.lower()))
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(re.findall(r"\w+", (text or "").lower()))
+
+
+class BookCatalog:
+    """
+    Local SQLite catalog of validated book recommendations.
+
+    Books are stored per normalized category and deduplicated by title and
+    author. An FTS5 index over category, title and author serves narrower
+    categories ("geometry" also finds books stored under "mathematics
+    geometry") and free-text search.
+    """
+
+    def __init__(self, path=BOOK_CATALOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS books (
+                id INTEGER PRIMARY KEY,
+                category TEXT NOT NULL,
+                bookname TEXT NOT NULL,
+                author TEXT NOT NULL,
+                publisher TEXT NOT NULL,
+                publishing_date TEXT NOT NULL,
+                title_key TEXT NOT NULL,
+                author_key TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                UNIQUE (category, title_key, author_key)
+            );
+            CREATE TABLE IF NOT EXISTS categories (
+                category TEXT PRIMARY KEY,
+                refreshed_at REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                category, bookname, author, content='books', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS books_ai AFTER INSERT ON books BEGIN
+                INSERT INTO books_fts (rowid, category, bookname, author)
+                VALUES (new.id, new.category, new.bookname, new.author);
+            END;
+            CREATE TRIGGER IF NOT EXISTS books_ad AFTER DELETE ON books BEGIN
+                INSERT INTO books_fts (books_fts, rowid, category, bookname, author)
+                VALUES ('delete', old.id, old.category, old.bookname, old.author);
+            END;
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _book(row):
+        return {
+            "bookname": row["bookname"],
+            "author": row["author"],
+            "publisher": row["publisher"],
+            "publishing_date": row["publishing_date"],
+        }
+
+    def add_books(self, category: str, books: list) -> int:
+        """
+        Store validated books under a category, skipping ones already known.
+
+        Args:
+            category: The requested category
+            books: Book dicts with bookname, author, publisher and publishing_date
+
+        Returns:
+            int: The number of new books stored
+        """
+        category = normalize_category(category)
+        now = time.time()
+        count = "SELECT COUNT(*) FROM books WHERE category = ?"
+        with self._lock:
+            before = self._conn.execute(count, (category,)).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO books (category, bookname, author, publisher, publishing_date, "
+                "title_key, author_key, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (category, book["bookname"], book["author"], book["publisher"], book["publishing_date"],
+                     _normalize_text(book["bookname"]), _normalize_text(book["author"]), now)
+                    for book in books
+                ],
+            )
+            added = self._conn.execute(count, (category,)).fetchone()[0] - before
+            self._conn.execute(
+                "INSERT OR REPLACE INTO categories (category, refreshed_at) VALUES (?, ?)", (category, now)
+            )
+            self._conn.commit()
+        return added
+
+    def books(self, category: str, limit: int = None) -> list:
+        """Get the books stored under exactly this (normalized) category."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM books WHERE category = ? ORDER BY id LIMIT ?",
+                (normalize_category(category), limit if limit is not None else -1),
+            ).fetchall()
+        return [self._book(row) for row in rows]
+
+    def search(self, text: str, limit: int = 20, column: str = None, match_all: bool = True,
+               prefix: bool = True) -> list:
+        """
+        Full-text search over category, title and author, best matches first.
+
+        Args:
+            text: Words to look for
+            limit: Maximum number of books returned
+            column: Restrict the match to one column, e.g. "category"
+            match_all: Require every word, otherwise any word matches and more matches rank higher
+            prefix: Match words starting with each word ("geom" finds "geometry"), otherwise whole words only
+        """
+        words = normalize_category(text).split()
+        if not words:
+            return []
+        star = "*" if prefix else ""
+        query = (" AND " if match_all else " OR ").join(f'"{word}"{star}' for word in words)
+        if column:
+            query = f"{column} : ({query})"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT books.* FROM books_fts JOIN books ON books.id = books_fts.rowid "
+                "WHERE books_fts MATCH ? ORDER BY bm25(books_fts) LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        return [self._book(row) for row in rows]
+
+    def lookup(self, category: str, number_of_book: int, min_entries: int = 0):
+        """
+        Pick number_of_book distinct books for a category from the catalog.
+
+        Args:
+            category: The requested category
+            number_of_book: Number of books wanted
+            min_entries: Only answer when at least this many books are known, for variety
+
+        Returns:
+            list: The books, or None when the catalog cannot answer
+        """
+        needed = max(number_of_book, min_entries)
+        books = self.books(category)
+        if len(books) < needed:
+            # Only narrower categories holding every requested word, whole words: "english grammar" must not be
+            # topped up with "english literature" books, nor "art" with "artificial intelligence" ones
+            seen = {(book["bookname"], book["author"]) for book in books}
+            for book in self.search(category, limit=needed * 4, column="category", match_all=True, prefix=False):
+                if (book["bookname"], book["author"]) not in seen:
+                    seen.add((book["bookname"], book["author"]))
+                    books.append(book)
+        if len(books) < needed:
+            return None
+        return random.sample(books, number_of_book)
+
+    def age(self, category: str):
+        """Seconds since the category was last refreshed from the LLM, None if never."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT refreshed_at FROM categories WHERE category = ?", (normalize_category(category),)
+            ).fetchone()
+        return time.time() - row["refreshed_at"] if row else None
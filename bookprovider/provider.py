@@ -1,11 +1,15 @@
 import functions_framework
 import json
-from flask import Flask, jsonify, request
-from langchain_google_vertexai import ChatVertexAI
+from flask import Flask, has_app_context, jsonify, request
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate
 from pydantic import BaseModel, Field
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from llm_cache import get_llm_cache, bypass_llm_cache
+from catalog import BookCatalog
+from warmup import Warmup
 
 class Book(BaseModel):
     bookname: str = Field(description="Name of the book")
@@ -13,24 +17,54 @@ class Book(BaseModel):
     publisher: str = Field(description="Name of the publisher")
     publishing_date: str = Field(description="Date of publishing")
 
+class BookList(BaseModel):
+    books: list[Book] = Field(description="List of distinct book recommendations")
+
 # ENV SETUP
 project_id = os.environ.get("GOOGLE_CLOUD_PROJECT")  # Get project ID from env
+# "list" asks for all books in one call, "per_book" makes one call per book concurrently
+RECOMMENDATION_MODE = os.environ.get("BOOK_RECOMMENDATION_MODE", "list")
+MAX_PARALLEL_BOOK_CALLS = int(os.environ.get("MAX_PARALLEL_BOOK_CALLS", 5))
+# Serve a category from the local catalog once it holds this many books
+CATALOG_MIN_ENTRIES = int(os.environ.get("CATALOG_MIN_ENTRIES", 5))
+# Ask the LLM for fresh books in the background when a category is older than this
+CATALOG_REFRESH_SECONDS = float(os.environ.get("CATALOG_REFRESH_SECONDS", 24 * 3600))
+# Batch requests: maximum categories per request and categories processed at once
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 20))
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", 4))
+
+# Connect to resourse needed from Google Cloud, on first use rather than at import time
+_llm = None
+_llm_lock = threading.Lock()
+
 
-# Connect to resourse needed from Google Cloud
-llm = ChatVertexAI(model_name="gemini-2.0-flash-001")
+def get_llm():
+    """Get the shared ChatVertexAI model, created on first use."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                from langchain_google_vertexai import ChatVertexAI
+                _llm = ChatVertexAI(model_name="gemini-2.0-flash-001", cache=get_llm_cache())
+    return _llm
 
-def get_recommended_books(category):
+
+def get_recommended_books(category, use_cache=True, exclude=()):
     """
     A simple book recommendation function. 
 
     Args:
         category (str): category
+        use_cache (bool): answer from the LLM cache when the same prompt was seen before
+        exclude (list): names of books that must not be recommended again
 
     Returns:
         str: A JSON string representing the recommended books.
     """
     parser = JsonOutputParser(pydantic_object=Book)
     question = f"Generate a book recommendation on {category} with bookname, author and publisher and publishing_date"
+    if exclude:
+        question += f". Do not recommend any of these books: {', '.join(exclude)}"
 
     prompt = PromptTemplate(
         template="Answer the user query.\n{format_instructions}\n{query}\n",
@@ -38,15 +72,234 @@ def get_recommended_books(category):
         partial_variables={"format_instructions": parser.get_format_instructions()},
     )
     
-    chain = prompt | llm | parser
-    response = chain.invoke({"query": question})
+    chain = prompt | get_llm() | parser
+    with bypass_llm_cache(not use_cache):
+        response = chain.invoke({"query": question})
 
     return  json.dumps(response)
-    
+
+
+def _book_key(book):
+    return (book["bookname"].strip().lower(), book["author"].strip().lower())
+
+
+def _add_distinct(books, candidates, number_of_book):
+    seen = {_book_key(book) for book in books}
+    for candidate in candidates:
+        try:
+            book = Book.model_validate(candidate).model_dump()
+        except Exception as e:
+            print(f"Skipping invalid book {candidate}: {e}")
+            continue
+        if _book_key(book) not in seen and len(books) < number_of_book:
+            seen.add(_book_key(book))
+            books.append(book)
+    return books
+
+
+def get_recommended_book_list(category, number_of_book, exclude=()):
+    """
+    Recommend number_of_book distinct books on a category with a single LLM call.
+
+    Args:
+        category (str): category
+        number_of_book (int): number of books wanted
+        exclude (list): names of books that must not be recommended again
+
+    Returns:
+        list: The validated book dicts, possibly fewer than number_of_book
+    """
+    parser = JsonOutputParser(pydantic_object=BookList)
+    question = (f"Generate {number_of_book} distinct book recommendations on {category}, "
+                f"each with bookname, author and publisher and publishing_date")
+    if exclude:
+        question += f". Do not recommend any of these books: {', '.join(exclude)}"
+
+    prompt = PromptTemplate(
+        template="Answer the user query.\n{format_instructions}\n{query}\n",
+        input_variables=["query"],
+        partial_variables={"format_instructions": parser.get_format_instructions()},
+    )
+
+    chain = prompt | get_llm() | parser
+    response = chain.invoke({"query": question})
+    candidates = response.get("books", []) if isinstance(response, dict) else response
+    return _add_distinct([], candidates or [], number_of_book)
+
+
+def get_recommended_books_per_book(category, number_of_book, books=None):
+    """
+    Recommend books with one LLM call per missing book, made concurrently.
+
+    Args:
+        category (str): category
+        number_of_book (int): number of books wanted
+        books (list): books already recommended, only the shortfall is requested
+    """
+    books = list(books or [])
+    for attempt in range(2):
+        missing = number_of_book - len(books)
+        if missing <= 0:
+            break
+        exclude = [book["bookname"] for book in books]
+        with ThreadPoolExecutor(max_workers=min(missing, MAX_PARALLEL_BOOK_CALLS)) as pool:
+            # The cache would hand back the same book for every call, so only a cold first call may use it
+            results = pool.map(
+                lambda i: json.loads(get_recommended_books(category, use_cache=(i == 0 and not books), exclude=exclude)),
+                range(missing),
+            )
+            _add_distinct(books, list(results), number_of_book)
+    return books
+
+
+def generate_books(category, number_of_book, exclude=()):
+    """
+    Ask the LLM for number_of_book distinct books, in one call when possible.
+
+    Args:
+        category (str): category
+        number_of_book (int): number of books wanted
+        exclude (list): names of books that must not be recommended again
+    """
+    books = []
+    if RECOMMENDATION_MODE == "list":
+        try:
+            books = get_recommended_book_list(category, number_of_book, exclude)
+        except Exception as e:
+            print(f"Book list call failed, falling back to per-book calls: {e}")
+    if len(books) < number_of_book:
+        books = get_recommended_books_per_book(category, number_of_book, books)
+    return books
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+_refreshing = set()
+
+
+def get_catalog():
+    """Get the local book catalog, opened on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = BookCatalog()
+    return _catalog
+
+
+def _refresh_category(category, number_of_book):
+    try:
+        known = [book["bookname"] for book in get_catalog().books(category, limit=20)]
+        # A refresh is only useful if it reaches the model, so the LLM cache is skipped
+        with bypass_llm_cache():
+            books = generate_books(category, number_of_book, exclude=known)
+        added = get_catalog().add_books(category, books)
+        print(f"Refreshed catalog category {category}: {added} new books")
+    except Exception as e:
+        print(f"Catalog refresh for {category} failed: {e}")
+    finally:
+        with _catalog_lock:
+            _refreshing.discard(category)
+
+
+def refresh_in_background(category, number_of_book):
+    """Add fresh books for a category on a background thread, at most one refresh per category."""
+    with _catalog_lock:
+        if category in _refreshing:
+            return
+        _refreshing.add(category)
+    threading.Thread(target=_refresh_category, args=(category, number_of_book), daemon=True).start()
+
+
+def recommend(category, number_of_book):
+    """
+    Recommend number_of_book distinct books, from the local catalog when it knows enough.
+
+    Args:
+        category (str): category
+        number_of_book (int): number of books wanted
+    """
+    try:
+        catalog = get_catalog()
+        books = catalog.lookup(category, number_of_book, min_entries=CATALOG_MIN_ENTRIES)
+        if books is not None:
+            age = catalog.age(category)
+            if age is None or age > CATALOG_REFRESH_SECONDS:
+                refresh_in_background(category, number_of_book)
+            return books
+    except Exception as e:
+        # The catalog only saves model calls, a broken one must not fail the request
+        print(f"Catalog lookup for {category} failed, asking the LLM: {e}")
+        catalog = None
+
+    # Ask for enough books to fill the catalog for the next requests as well
+    books = generate_books(category, max(number_of_book, CATALOG_MIN_ENTRIES))
+    if catalog is not None:
+        try:
+            catalog.add_books(category, books)
+        except Exception as e:
+            print(f"Storing books for {category} in the catalog failed: {e}")
+    return books[:number_of_book]
+
+
+def _recommend_one(item):
+    if not isinstance(item, dict) or 'category' not in item or 'number_of_book' not in item:
+        return {'category': item.get('category') if isinstance(item, dict) else None,
+                'error': 'Missing category or number_of_book parameters'}
+    try:
+        category = item['category']
+        number_of_book = int(item['number_of_book'])
+        return {'category': category, 'books': recommend(category, number_of_book)}
+    except Exception as e:
+        print(f"Batch item {item} failed: {e}")
+        return {'category': item['category'], 'error': str(e)}
+
+
+def recommend_batch(items):
+    """
+    Recommend books for several categories concurrently.
+
+    Args:
+        items (list): dicts with category and number_of_book
+
+    Returns:
+        list: one result per item, in order, with either books or error
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(len(items), BATCH_MAX_WORKERS))) as pool:
+        return list(pool.map(_recommend_one, items))
+
+
+warmup = Warmup()
+
+@warmup.step("llm")
+def warm_llm():
+    get_llm()
+
+@warmup.step("catalog")
+def warm_catalog():
+    get_catalog()
+
+# The functions framework executes this module inside its app context as the server starts,
+# a plain import (tests, tools) does not warm up
+if has_app_context():
+    warmup.start()
+
 
 @functions_framework.http
 def recommended(request):
+    if request.path.rstrip("/").endswith("/health"):
+        report, status = warmup.health()
+        return jsonify(report), status
+
     request_json = request.get_json(silent=True) # Get JSON data
+    if isinstance(request_json, dict) and 'requests' in request_json:
+        items = request_json['requests']
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'requests must be a non-empty list of {category, number_of_book}'}), 400
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'At most {MAX_BATCH_SIZE} categories per batch'}), 400
+        return jsonify({'results': recommend_batch(items)})
+
     if request_json and 'category' in request_json and 'number_of_book' in request_json:
         category = request_json['category']
         number_of_book = int(request_json['number_of_book'])
@@ -58,12 +311,7 @@ def recommended(request):
         return jsonify({'error': 'Missing category or number_of_book parameters'}), 400
 
 
-    recommendations_list = []
-    for i in range(number_of_book):
-        book_dict = json.loads(get_recommended_books(category))
-        print(f"book_dict=======>{book_dict}")
-    
-        recommendations_list.append(book_dict)
+    recommendations_list = recommend(category, number_of_book)
+    print(f"recommendations_list=======>{recommendations_list}")
 
-    
     return jsonify(recommendations_list)
@@ -0,0 +1,87 @@
+import os
+import time
+import threading
+
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class Warmup:
+    """
+    Runs the warm-up steps of a service on a background thread.
+
+    Heavy imports and clients are loaded lazily, so the process binds its port
+    quickly; the steps registered here load them ahead of the first request and
+    their state is reported by the /health readiness endpoint. start() is
+    called by the server entry point, not at import, so importing the app
+    (tests, tools) creates no clients.
+
+    Args:
+        enabled: Run the steps at all, otherwise start() marks them skipped
+    """
+
+    def __init__(self, enabled=WARMUP_ENABLED):
+        self.enabled = enabled
+        self._started = False
+        self._steps = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self.steps = {}
+        self.started_at = time.time()
+
+    def step(self, name):
+        """Register a warm-up step (decorator), steps run in registration order."""
+        def register(fn):
+            self._steps.append((name, fn))
+            self.steps[name] = {"status": "pending"}
+            return fn
+        return register
+
+    def _run(self):
+        for name, fn in self._steps:
+            start = time.perf_counter()
+            try:
+                fn()
+                state = {"status": "ok"}
+            except Exception as e:
+                print(f"Warm-up step {name} failed: {e}")
+                state = {"status": "failed", "error": str(e)}
+            state["ms"] = round((time.perf_counter() - start) * 1000, 1)
+            with self._lock:
+                self.steps[name] = state
+        self._done.set()
+
+    def start(self):
+        """Start the warm-up thread once, unless WARMUP_ENABLED is false."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        if not self.enabled:
+            with self._lock:
+                for name in self.steps:
+                    self.steps[name] = {"status": "skipped"}
+            self._done.set()
+            return
+        threading.Thread(target=self._run, name="warmup", daemon=True).start()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def health(self):
+        """
+        Get the readiness report.
+
+        Returns:
+            tuple: (report dict, HTTP status), 503 while warm-up is still running
+        """
+        with self._lock:
+            steps = {name: dict(state) for name, state in self.steps.items()}
+        failed = any(state["status"] == "failed" for state in steps.values())
+        status = "warming" if not self.ready else ("degraded" if failed else "ready")
+        report = {
+            "status": status,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "steps": steps,
+        }
+        return report, 200 if self.ready else 503
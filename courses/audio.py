@@ -1,15 +1,18 @@
 import os
 import json
+import uuid
 import asyncio
-import wave 
+import struct
 import time
+import hashlib
 
 import functions_framework
 import soundfile as sf
 from google import genai
-from google.cloud import storage  
+from google.cloud import storage
 from google.genai.types import (
     Content,
+    GenerateContentConfig,
     LiveConnectConfig,
     SpeechConfig,
     VoiceConfig,
@@ -18,11 +21,269 @@ from google.genai.types import (
 )
 
 MODEL_ID = "gemini-2.0-flash-exp"
+SPLIT_MODEL_ID = "gemini-2.0-flash-001"
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 LOCATION = os.environ.get("GOOGLE_CLOUD_REGION", "us-central1")
 BUCKET_NAME = os.environ.get("COURSE_BUCKET_NAME", "")
+VOICE_NAME = os.environ.get("COURSE_VOICE_NAME", "Aoede")
 
+# Weeks generated at once, each one holds a Live API session open
+AUDIO_CONCURRENCY = int(os.environ.get("AUDIO_CONCURRENCY", 3))
+# Resumable upload chunk size, a multiple of 256 KiB; the only audio buffered per week
+UPLOAD_CHUNK_SIZE = int(os.environ.get("AUDIO_UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024))
+# Where the PCM and header parts of a week's WAV are uploaded before they are composed into it
+UPLOAD_PREFIX = os.environ.get("AUDIO_UPLOAD_PREFIX", "uploads/")
+# Stored next to the course-week-N.wav blobs, records what each one was generated from
+MANIFEST_BLOB = os.environ.get("COURSE_MANIFEST_BLOB", "course-manifest.json")
 
+# The Live API returns 16-bit mono PCM at 24 kHz
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+CHANNELS = 1
 
+config = LiveConnectConfig(
+    response_modalities=["AUDIO"],
+    speech_config=SpeechConfig(
+        voice_config=VoiceConfig(
+            prebuilt_voice_config=PrebuiltVoiceConfig(voice_name=VOICE_NAME)
+        )
+    ),
+)
+
+
+def split_weeks(teaching_plan: str, client=None) -> list:
+    """
+    Split a teaching plan into the content plan of each week.
+
+    Args:
+        teaching_plan: The teaching plan in markdown
+        client: genai.Client, one for PROJECT_ID/LOCATION is created when not given
+
+    Returns:
+        list: One content plan string per week, in order
+    """
+    client = client or genai.Client(vertexai=True, project=PROJECT_ID, location=LOCATION)
+    response = client.models.generate_content(
+        model=SPLIT_MODEL_ID,
+        contents=f"""Given the following teaching plan: {teaching_plan},
+        Extract the content plan for each week, in order. Return just the plans, nothing else""",
+        # Deterministic so an unchanged plan splits into unchanged weeks and their audio is reused
+        config=GenerateContentConfig(response_schema=list[str], response_mime_type="application/json", temperature=0),
+    )
+    return json.loads(response.text)
+
+
+def recap_prompt(week_plan: str) -> str:
+    return f"""
+        Assume you are the instructor.
+        Prepare a concise and engaging recap of the key concepts and topics covered.
+        This recap should be suitable for generating a short audio summary for students.
+        Focus on the most important learnings and takeaways, and frame it as a direct address to the students.
+        Avoid overly formal language and aim for a conversational tone, tell a few jokes.
+
+        Teaching plan: {week_plan} """
+
+
+def week_fingerprint(week_plan: str) -> str:
+    """Hash of everything a week's audio is generated from: its text, the recap prompt, the voice config and the model."""
+    source = {
+        "prompt": recap_prompt(week_plan),
+        "model": MODEL_ID,
+        "config": config.model_dump(mode="json", exclude_none=True),
+        "format": [SAMPLE_RATE, SAMPLE_WIDTH, CHANNELS],
+    }
+    return hashlib.sha256(json.dumps(source, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_manifest(bucket) -> dict:
+    """Get the week manifest of the course bucket, empty when there is none or it cannot be read."""
+    try:
+        blob = bucket.get_blob(MANIFEST_BLOB)
+        if blob is None:
+            return {}
+        return json.loads(blob.download_as_text()).get("weeks", {})
+    except Exception as e:
+        print(f"Error reading {MANIFEST_BLOB}, regenerating every week: {e}")
+        return {}
+
+
+def save_manifest(bucket, weeks: dict):
+    manifest = {"version": 1, "updated_at": time.time(), "weeks": weeks}
+    bucket.blob(MANIFEST_BLOB).upload_from_string(json.dumps(manifest, indent=2), content_type="application/json")
+
+
+def is_current(bucket, entry: dict, fingerprint: str) -> bool:
+    """Whether a manifest entry matches the fingerprint and its audio blob is still in the bucket."""
+    return bool(entry) and entry.get("hash") == fingerprint and bucket.get_blob(entry["blob"]) is not None
+
+
+def summarize(results: list) -> dict:
+    """Count the week results by status (regenerated, skipped, failed)."""
+    counts = {"regenerated": 0, "skipped": 0, "failed": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return counts
+
+
+def wav_header(data_bytes: int) -> bytes:
+    """The 44 byte header of a WAV file holding data_bytes of the Live API's PCM audio."""
+    block_align = CHANNELS * SAMPLE_WIDTH
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, 1, CHANNELS, SAMPLE_RATE, SAMPLE_RATE * block_align, block_align, SAMPLE_WIDTH * 8,
+        b"data", data_bytes,
+    )
+
+
+async def stream_audio(session, prompt: str, write) -> int:
+    """
+    Send a prompt to a Live API session and pass the audio chunks to write as they arrive.
+
+    Only one chunk is held in memory at a time, whatever the length of the recap.
+
+    Args:
+        write: Coroutine function taking the bytes of a chunk
+
+    Returns:
+        int: The number of audio bytes written
+    """
+    await session.send(input=prompt, end_of_turn=True)
+    written = 0
+    async for message in session.receive():
+        server_content = message.server_content
+        if server_content is None:
+            continue
+        if server_content.model_turn and server_content.model_turn.parts:
+            for part in server_content.model_turn.parts:
+                if part.inline_data and part.inline_data.data:
+                    await write(part.inline_data.data)
+                    written += len(part.inline_data.data)
+        if server_content.turn_complete:
+            break
+    return written
+
+
+def compose_wav(bucket, blob_name: str, pcm, audio_bytes: int):
+    """
+    Store blob_name as a WAV file: its header, now that the length is known, then the uploaded PCM.
+
+    The PCM was streamed without a header, a WAV header holds the length of
+    the audio and a resumable upload cannot seek back to patch it. Compose
+    joins the two objects server side.
+    """
+    header = bucket.blob(pcm.name[:-len(".pcm")] + ".header")
+    header.upload_from_string(wav_header(audio_bytes), content_type="audio/wav")
+    blob = bucket.blob(blob_name)
+    blob.content_type = "audio/wav"
+    blob.compose([header, pcm])
+    return blob
+
+
+def delete_parts(bucket, pcm):
+    """Delete the upload parts of a week, whether they were composed or the week failed."""
+    for name in (pcm.name, pcm.name[:-len(".pcm")] + ".header"):
+        try:
+            bucket.blob(name).delete()
+        except Exception:
+            pass
+
+
+async def generate_week_audio(client, bucket, week: int, week_plan: str, slots: asyncio.Semaphore) -> dict:
+    """
+    Generate the audio recap of one week and store it as course-week-N.wav.
+
+    Args:
+        client: genai.Client used for the Live API session
+        bucket: The course bucket
+        week: Week number, starting at 1
+        week_plan: The content plan of the week
+        slots: Semaphore bounding the number of open Live API sessions
+    """
+    blob_name = f"course-week-{week}.wav"
+    start = time.perf_counter()
+    # The audio goes straight to a resumable upload, nothing of it is written to the (memory-backed) local disk
+    pcm = bucket.blob(f"{UPLOAD_PREFIX}{blob_name}.{uuid.uuid4().hex}.pcm")
+    try:
+        async with slots:
+            print(f"-------------> Generating audio for week {week}")
+            async with client.aio.live.connect(model=MODEL_ID, config=config) as session:
+                writer = pcm.open("wb", chunk_size=UPLOAD_CHUNK_SIZE, content_type="audio/L16")
+                try:
+                    # Each full upload chunk is sent by the write that fills it, keep it off the event loop
+                    audio_bytes = await stream_audio(session, recap_prompt(week_plan),
+                                                     lambda data: asyncio.to_thread(writer.write, data))
+                finally:
+                    await asyncio.to_thread(writer.close)
+
+        # The header and compose run outside the semaphore so the next week's session can start
+        await asyncio.to_thread(compose_wav, bucket, blob_name, pcm, audio_bytes)
+        print(f"-------------> Uploaded {blob_name} ({audio_bytes} bytes)")
+    finally:
+        await asyncio.to_thread(delete_parts, bucket, pcm)
+    return {
+        "week": week,
+        "blob": blob_name,
+        "audio_seconds": round(audio_bytes / (SAMPLE_RATE * SAMPLE_WIDTH * CHANNELS), 2),
+        "elapsed_seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+async def process_weeks(teaching_plan: str, client=None, bucket=None, concurrency: int = AUDIO_CONCURRENCY,
+                        force: bool = False) -> list:
+    """
+    Generate the audio recap of every changed week of a teaching plan, at most `concurrency` weeks at a time.
+
+    Weeks whose fingerprint matches the manifest keep their existing blob. A
+    week that fails is reported with its error and does not stop the others.
+
+    Args:
+        force: Regenerate every week, ignoring the manifest
+
+    Returns:
+        list: One result dict per week with a status of regenerated, skipped or failed
+    """
+    client = client or genai.Client(vertexai=True, project=PROJECT_ID, location=LOCATION)
+    bucket = bucket or storage.Client().bucket(BUCKET_NAME)
+    weeks = await asyncio.to_thread(split_weeks, teaching_plan, client)
+    manifest = {} if force else await asyncio.to_thread(load_manifest, bucket)
+    print(f"-------------> Teaching plan split into {len(weeks)} weeks")
+
+    fingerprints = {week: week_fingerprint(plan) for week, plan in enumerate(weeks, start=1)}
+    current = await asyncio.gather(*(
+        asyncio.to_thread(is_current, bucket, manifest.get(str(week)), fingerprint)
+        for week, fingerprint in fingerprints.items()
+    ))
+    changed = [week for week, unchanged in zip(fingerprints, current) if not unchanged]
+
+    slots = asyncio.Semaphore(concurrency)
+    outcomes = await asyncio.gather(
+        *(generate_week_audio(client, bucket, week, weeks[week - 1], slots) for week in changed),
+        return_exceptions=True,
+    )
+    outcomes = dict(zip(changed, outcomes))
+
+    results, entries = [], {}
+    for week, fingerprint in fingerprints.items():
+        if week not in outcomes:
+            entries[str(week)] = manifest[str(week)]
+            results.append({"week": week, "blob": manifest[str(week)]["blob"], "status": "skipped"})
+        elif isinstance(outcomes[week], Exception):
+            # Left out of the manifest, so the week is regenerated by the next event
+            print(f"Error generating audio for week {week}: {outcomes[week]}")
+            results.append({"week": week, "blob": f"course-week-{week}.wav", "status": "failed",
+                            "error": str(outcomes[week])})
+        else:
+            result = dict(outcomes[week], status="regenerated")
+            entries[str(week)] = {"hash": fingerprint, "blob": result["blob"], "generated_at": time.time()}
+            results.append(result)
+
+    if changed or set(entries) != set(manifest):
+        await asyncio.to_thread(save_manifest, bucket, entries)
+    print(f"-------------> Course audio: {summarize(results)}")
+    return results
 
 
+def breakup_sessions(teaching_plan: str, client=None, bucket=None, force: bool = False) -> list:
+    """Split a teaching plan into weeks and generate the audio recap of each changed week into the course bucket."""
+    return asyncio.run(process_weeks(teaching_plan, client=client, bucket=bucket, force=force))
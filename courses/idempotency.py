@@ -0,0 +1,309 @@
+import os
+import re
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+import contextlib
+from abc import ABC, abstractmethod
+
+IDEMPOTENCY_DB_PATH = os.environ.get("IDEMPOTENCY_DB_PATH", "/tmp/aidemy_idempotency.db")
+# An in-progress marker expires after this long without a renewal, so a crashed worker's event can be retried
+LEASE_SECONDS = float(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", 600))
+# Completed events are remembered this long, longer than Pub/Sub's 7 day message retention
+RETENTION_SECONDS = float(os.environ.get("IDEMPOTENCY_RETENTION_SECONDS", 8 * 24 * 3600))
+
+# Outcomes of Idempotency.run
+PROCESSED = "processed"
+DUPLICATE_MESSAGE = "duplicate_message"
+DUPLICATE_PLAN = "duplicate_plan"
+IN_PROGRESS = "in_progress"
+
+
+def plan_fingerprint(teaching_plan: str) -> str:
+    """Hash of a teaching plan, insensitive to whitespace differences."""
+    normalized = re.sub(r"\s+", " ", teaching_plan or "").strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def message_id(cloud_event) -> str:
+    """The Pub/Sub message id of a CloudEvent, or the CloudEvent id for direct events."""
+    message = (cloud_event.data or {}).get("message") or {}
+    return message.get("messageId") or message.get("message_id") or cloud_event["id"]
+
+
+class IdempotencyStore(ABC):
+    """
+    Interface of the store behind Idempotency, one record per key.
+
+    A record is either in progress, owned by one worker until its lease
+    expires, or done with the JSON result of the work. Implementations must
+    make acquire atomic across the workers sharing the store. A backend missing
+    a method fails when it is instantiated, not halfway through a message.
+    """
+
+    @abstractmethod
+    def acquire(self, key: str, owner: str, lease_seconds: float):
+        """
+        Take the in-progress lease of a key, unless it is done or leased by another owner.
+
+        Returns:
+            tuple: ("acquired", None), ("done", record) or ("in_progress", record)
+        """
+
+    @abstractmethod
+    def renew(self, key: str, owner: str, lease_seconds: float) -> bool:
+        ...
+
+    @abstractmethod
+    def complete(self, key: str, owner: str, result) -> None:
+        ...
+
+    @abstractmethod
+    def mark_done(self, key: str, result) -> None:
+        """Record a key as done without holding its lease."""
+
+    @abstractmethod
+    def release(self, key: str, owner: str) -> None:
+        """Drop the lease of a failed attempt so the next delivery runs the work again."""
+
+    @abstractmethod
+    def increment(self, counter: str, amount: float = 1) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+    @abstractmethod
+    def purge(self, older_than: float) -> int:
+        ...
+
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """
+    Idempotency records in a local SQLite file.
+
+    It is shared by the workers and threads of one instance. Point
+    IDEMPOTENCY_DB_PATH at shared storage, or plug in another
+    IdempotencyStore, to deduplicate across instances.
+    """
+
+    def __init__(self, path=IDEMPOTENCY_DB_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS idempotency (
+                    key TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    owner TEXT,
+                    lease_until REAL,
+                    result TEXT,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS idempotency_stats (
+                    counter TEXT PRIMARY KEY,
+                    value REAL NOT NULL
+                );
+                """
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One short-lived connection per operation, safe across threads and processes
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _record(row):
+        record = dict(row)
+        record["result"] = json.loads(record["result"]) if record["result"] is not None else None
+        return record
+
+    def acquire(self, key, owner, lease_seconds):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT * FROM idempotency WHERE key = ?", (key,)).fetchone()
+                if row is not None and row["status"] == "done":
+                    return "done", self._record(row)
+                if row is not None and row["owner"] != owner and row["lease_until"] > now:
+                    return "in_progress", self._record(row)
+                conn.execute(
+                    "INSERT OR REPLACE INTO idempotency (key, status, owner, lease_until, result, updated_at) "
+                    "VALUES (?, 'in_progress', ?, ?, NULL, ?)",
+                    (key, owner, now + lease_seconds, now),
+                )
+                return "acquired", None
+            finally:
+                conn.execute("COMMIT")
+
+    def renew(self, key, owner, lease_seconds):
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE idempotency SET lease_until = ?, updated_at = ? "
+                "WHERE key = ? AND owner = ? AND status = 'in_progress'",
+                (now + lease_seconds, now, key, owner),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, key, owner, result):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE idempotency SET status = 'done', lease_until = NULL, result = ?, updated_at = ? "
+                "WHERE key = ? AND owner = ?",
+                (json.dumps(result), time.time(), key, owner),
+            )
+
+    def mark_done(self, key, result):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency (key, status, owner, lease_until, result, updated_at) "
+                "VALUES (?, 'done', NULL, NULL, ?, ?)",
+                (key, json.dumps(result), time.time()),
+            )
+
+    def release(self, key, owner):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM idempotency WHERE key = ? AND owner = ? AND status = 'in_progress'", (key, owner))
+
+    def increment(self, counter, amount=1):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO idempotency_stats (counter, value) VALUES (?, ?) "
+                "ON CONFLICT (counter) DO UPDATE SET value = value + excluded.value",
+                (counter, amount),
+            )
+
+    def stats(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT counter, value FROM idempotency_stats").fetchall()
+        return {row["counter"]: row["value"] for row in rows}
+
+    def purge(self, older_than):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM idempotency WHERE status = 'done' AND updated_at < ?", (time.time() - older_than,)
+            )
+            return cursor.rowcount
+
+
+class Idempotency:
+    """
+    Runs the work of an at-least-once event once per message and once per teaching plan.
+
+    An event is skipped when its message id was already handled (a Pub/Sub
+    redelivery), when the same plan was already processed under another
+    message id, or when another worker currently holds the plan's lease (a
+    concurrent retry). The leases are renewed while the work runs and dropped
+    if it fails, so the next delivery retries it. An IN_PROGRESS event is not
+    done yet: the caller must not acknowledge it, so it is redelivered and
+    retried should the worker holding the lease fail or die. A cloud_event
+    function does so by raising, whatever it returns is acknowledged.
+
+    Args:
+        scope: Namespace of the keys, e.g. the service name
+        store: IdempotencyStore, a SQLiteIdempotencyStore at IDEMPOTENCY_DB_PATH by default
+        lease_seconds: Lifetime of the in-progress lease between renewals
+    """
+
+    def __init__(self, scope: str, store: IdempotencyStore = None, lease_seconds: float = LEASE_SECONDS):
+        self.scope = scope
+        self.store = store or SQLiteIdempotencyStore()
+        self.lease_seconds = lease_seconds
+
+    def _keep_lease(self, keys, owner, stop: threading.Event):
+        # Both the message and the plan lease, an expired message lease would let a redelivery run concurrently
+        while not stop.wait(self.lease_seconds / 3):
+            for key in keys:
+                if not self.store.renew(key, owner, self.lease_seconds):
+                    print(f"Lost the idempotency lease of {key}")
+                    return
+
+    def run(self, message_id: str, teaching_plan: str, work):
+        """
+        Run work() unless this message or plan was already handled.
+
+        Returns:
+            tuple: (outcome, result), outcome is PROCESSED, DUPLICATE_MESSAGE,
+            DUPLICATE_PLAN or IN_PROGRESS; result is work()'s result (JSON
+            serializable), or the original result for duplicates
+        """
+        message_key = f"{self.scope}:message:{message_id}"
+        plan_key = f"{self.scope}:plan:{plan_fingerprint(teaching_plan)}"
+        owner = f"{message_id}:{uuid.uuid4().hex}"
+
+        status, record = self.store.acquire(message_key, owner, self.lease_seconds)
+        if status == "done":
+            return self._skipped(DUPLICATE_MESSAGE, record)
+        if status == "in_progress":
+            return self._skipped(IN_PROGRESS, record)
+
+        try:
+            status, record = self.store.acquire(plan_key, owner, self.lease_seconds)
+            if status == "done":
+                self.store.complete(message_key, owner, record["result"])
+                return self._skipped(DUPLICATE_PLAN, record)
+            if status == "in_progress":
+                self.store.release(message_key, owner)
+                return self._skipped(IN_PROGRESS, record)
+        except Exception:
+            self.store.release(message_key, owner)
+            raise
+
+        stop = threading.Event()
+        threading.Thread(target=self._keep_lease, args=((message_key, plan_key), owner, stop), daemon=True).start()
+        start = time.perf_counter()
+        try:
+            result = work()
+        except Exception:
+            self.store.release(plan_key, owner)
+            self.store.release(message_key, owner)
+            self.store.increment("failed")
+            raise
+        finally:
+            stop.set()
+
+        stored = {"value": result, "seconds": round(time.perf_counter() - start, 3)}
+        self.store.complete(plan_key, owner, stored)
+        self.store.complete(message_key, owner, stored)
+        self.store.increment(PROCESSED)
+        self.store.increment("seconds_processed", stored["seconds"])
+        return PROCESSED, result
+
+    def _skipped(self, outcome, record):
+        stored = (record or {}).get("result") or {}
+        self.store.increment(outcome)
+        self.store.increment("seconds_avoided", stored.get("seconds", 0))
+        print(f"-------------> Skipping {outcome.replace('_', ' ')} in {self.scope}, stats: {self.stats()}")
+        return outcome, stored.get("value")
+
+    def stats(self) -> dict:
+        """Counts of processed and skipped events, and the seconds of work the skipped duplicates would have taken."""
+        stats = {PROCESSED: 0, DUPLICATE_MESSAGE: 0, DUPLICATE_PLAN: 0, IN_PROGRESS: 0, "failed": 0,
+                 "seconds_processed": 0.0, "seconds_avoided": 0.0}
+        stats.update(self.store.stats())
+        return stats
+
+
+_idempotency = {}
+_idempotency_lock = threading.Lock()
+
+
+def get_idempotency(scope: str) -> Idempotency:
+    """Get the Idempotency of a scope, created on first use; old records are purged at that point."""
+    with _idempotency_lock:
+        if scope not in _idempotency:
+            idempotency = Idempotency(scope)
+            idempotency.store.purge(RETENTION_SECONDS)
+            _idempotency[scope] = idempotency
+        return _idempotency[scope]
@@ -4,7 +4,49 @@ import time
 import base64
 from google.cloud import pubsub_v1, storage
 import functions_framework
-from audio import breakup_sessions 
+from audio import breakup_sessions, summarize
+from idempotency import get_idempotency, message_id, IN_PROGRESS, PROCESSED
 
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 
+
+def generate_course_audio(teaching_plan: str) -> dict:
+    """Generate the weekly audio recaps of a teaching plan, raising when a week failed."""
+    results = breakup_sessions(teaching_plan)
+    counts = summarize(results)
+    print(f"-------------> Weeks regenerated: {counts['regenerated']}, skipped: {counts['skipped']}, failed: {counts['failed']}")
+    failed = [result["week"] for result in results if result["status"] == "failed"]
+    if failed:
+        # Let Pub/Sub redeliver the event
+        raise RuntimeError(f"Audio generation failed for weeks {failed}")
+    return counts
+
+
+@functions_framework.cloud_event
+def process_teaching_plan(cloud_event):
+    """Generate the weekly audio recaps of the teaching plan published on the plan topic."""
+    print(f"CloudEvent received: {cloud_event.data}")
+    try:
+        if isinstance(cloud_event.data.get('message', {}).get('data'), str):  # Pub/Sub push
+            data = json.loads(base64.b64decode(cloud_event.data['message']['data']).decode('utf-8'))
+            teaching_plan = data.get('teaching_plan')
+        elif 'teaching_plan' in cloud_event.data:  # Direct CloudEvent, e.g. courses/temp
+            teaching_plan = cloud_event.data["teaching_plan"]
+        else:
+            raise KeyError("teaching_plan not found")
+
+        # Redeliveries and the same plan published again are acknowledged without redoing the audio
+        outcome, _ = get_idempotency("courses").run(
+            message_id(cloud_event), teaching_plan, lambda: generate_course_audio(teaching_plan)
+        )
+        if outcome == IN_PROGRESS:
+            # The framework acknowledges whatever a cloud_event function returns, only an exception
+            # answers the push with a 500 so Pub/Sub redelivers it, in case the lease holder dies
+            raise RuntimeError(f"Teaching plan in progress elsewhere, retry later: {message_id(cloud_event)}")
+        if outcome != PROCESSED:
+            return f"Teaching plan skipped ({outcome})", 200
+        return "Teaching plan processed successfully", 200
+
+    except (json.JSONDecodeError, AttributeError, KeyError) as e:
+        print(f"Error decoding CloudEvent data: {e} - Data: {cloud_event.data}")
+        return "Error processing event", 500
@@ -0,0 +1,206 @@
+import os
+import time
+import atexit
+import threading
+
+# Custom metrics are billed, services only write them when enabled
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRIC_PREFIX = os.environ.get("METRIC_PREFIX", "custom.googleapis.com/aidemy/")
+# Pending points are written this often, Monitoring accepts one point per series every 5 seconds
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("METRICS_FLUSH_INTERVAL_SECONDS", 10))
+# Distinct series buffered at once, points of new series are dropped beyond it
+MAX_SERIES = int(os.environ.get("METRICS_MAX_SERIES", 1000))
+# create_time_series accepts at most 200 time series per call
+BATCH_SIZE = 200
+# Monitoring rejects a second point of a series within 5 seconds
+MIN_FLUSH_GAP_SECONDS = 5
+
+GAUGE = "gauge"
+COUNTER = "counter"
+
+
+class MetricsWriter:
+    """
+    Buffers custom metric points in memory and writes them to Cloud Monitoring in batches.
+
+    record() and increment() only update an in-memory aggregate, so callers on
+    the request path never wait for the API. Each logical metric is its own
+    series, custom.googleapis.com/aidemy/<name>, one per label set. A
+    background thread writes the pending series every FLUSH_INTERVAL_SECONDS,
+    up to BATCH_SIZE per call, and a last flush runs at exit.
+
+    The points of a series are aggregated between flushes, since Monitoring
+    takes one point per series per call: a gauge writes the mean of the
+    interval (and its max as <name>_max), a counter its running total as a
+    CUMULATIVE point. Beyond max_series pending series, points of new series
+    are dropped and counted.
+
+    Args:
+        client: monitoring_v3.MetricServiceClient, created on the first flush when not given
+        project_id: Project the metrics are written to
+        labels: Labels added to every series, e.g. {"service": "portal"}
+        enabled: Write at all, otherwise points are discarded
+        gauge_max: Also write the max of each gauge as <name>_max
+    """
+
+    def __init__(self, client=None, project_id=None, labels=None, enabled=True,
+                 flush_interval=FLUSH_INTERVAL_SECONDS, max_series=MAX_SERIES, prefix=METRIC_PREFIX, gauge_max=True):
+        self._client = client
+        self.project_id = project_id or os.environ.get("GOOGLE_CLOUD_PROJECT")
+        self.labels = dict(labels or {})
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.max_series = max_series
+        self.prefix = prefix
+        self.gauge_max = gauge_max
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._gauges = {}
+        self._counters = {}
+        self._dirty_counters = set()
+        self._thread = None
+        self.stats = {"recorded": 0, "dropped": 0, "points_written": 0, "api_calls": 0, "errors": 0}
+
+    def _key(self, name, labels):
+        return name, tuple(sorted({**self.labels, **(labels or {})}.items()))
+
+    def _pending(self):
+        return len(self._gauges) + len(self._dirty_counters)
+
+    def _start(self):
+        # Started on the first point, so importing the module costs nothing
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def record(self, name: str, value: float, labels: dict = None):
+        """Record a gauge point, e.g. a request latency; the mean and max of each flush interval are written."""
+        if not self.enabled or self._stop.is_set():
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            aggregate = self._gauges.get(key)
+            if aggregate is None:
+                if self._pending() >= self.max_series:
+                    self.stats["dropped"] += 1
+                    return
+                aggregate = self._gauges[key] = [0, 0.0, value]
+            aggregate[0] += 1
+            aggregate[1] += value
+            aggregate[2] = max(aggregate[2], value)
+            self.stats["recorded"] += 1
+            self._start()
+            if self._pending() >= BATCH_SIZE:
+                self._wake.set()
+
+    def increment(self, name: str, amount: float = 1, labels: dict = None):
+        """Add to a counter, its running total since the writer started is written."""
+        if not self.enabled or self._stop.is_set():
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self._dirty_counters and self._pending() >= self.max_series:
+                self.stats["dropped"] += 1
+                return
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._dirty_counters.add(key)
+            self.stats["recorded"] += 1
+            self._start()
+            if self._pending() >= BATCH_SIZE:
+                self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self.flush()
+            self._stop.wait(MIN_FLUSH_GAP_SECONDS)
+
+    def _series(self, name, labels, value, kind, now):
+        from google.api import metric_pb2
+        from google.cloud import monitoring_v3
+
+        series = monitoring_v3.TimeSeries()
+        series.metric.type = self.prefix + name
+        for key, label in labels:
+            series.metric.labels[key] = str(label)
+        series.resource.type = "global"
+        series.resource.labels["project_id"] = self.project_id
+        interval = {"end_time": {"seconds": int(now), "nanos": int((now % 1) * 1e9)}}
+        if kind == COUNTER:
+            series.metric_kind = metric_pb2.MetricDescriptor.MetricKind.CUMULATIVE
+            interval["start_time"] = {"seconds": int(self.started_at), "nanos": int((self.started_at % 1) * 1e9)}
+        point = monitoring_v3.Point({"interval": interval, "value": {"double_value": float(value)}})
+        series.points = [point]
+        return series
+
+    def flush(self) -> int:
+        """Write every pending series now, returns the number of points written."""
+        with self._flush_lock:
+            with self._lock:
+                gauges, self._gauges = self._gauges, {}
+                counters = {key: self._counters[key] for key in self._dirty_counters}
+                self._dirty_counters = set()
+            if not gauges and not counters:
+                return 0
+
+            now = time.time()
+            series = []
+            for (name, labels), (count, total, peak) in gauges.items():
+                series.append(self._series(name, labels, total / count, GAUGE, now))
+                if self.gauge_max:
+                    series.append(self._series(f"{name}_max", labels, peak, GAUGE, now))
+            for (name, labels), total in counters.items():
+                series.append(self._series(name, labels, total, COUNTER, now))
+
+            written = 0
+            for start in range(0, len(series), BATCH_SIZE):
+                batch = series[start:start + BATCH_SIZE]
+                try:
+                    self.client.create_time_series(name=f"projects/{self.project_id}", time_series=batch)
+                    written += len(batch)
+                except Exception as e:
+                    # Not retried: gauges are superseded by the next interval, counters carry their total
+                    print(f"Error writing {len(batch)} metric points: {e}")
+                    self.stats["errors"] += 1
+                self.stats["api_calls"] += 1
+            self.stats["points_written"] += written
+            return written
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google.cloud import monitoring_v3
+            self._client = monitoring_v3.MetricServiceClient()
+        return self._client
+
+    def close(self):
+        """Stop the background thread after a last flush."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_metrics_writer(service: str = None) -> MetricsWriter:
+    """Get the shared MetricsWriter of the process, created on first use; it discards points unless METRICS_ENABLED."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                labels = {"environment": os.environ.get("ENVIRONMENT", "development")}
+                if service:
+                    labels["service"] = service
+                _writer = MetricsWriter(labels=labels, enabled=METRICS_ENABLED)
+    return _writer
@@ -2,7 +2,22 @@ from google.cloud import aiplatform
 from google.cloud.aiplatform import pipeline_jobs
 import yaml
 import os
+import time
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Models deployed or configured at once, each deploy is a long-running operation
+MAX_PARALLEL_MODELS = int(os.getenv('MLOPS_MAX_PARALLEL_MODELS', 4))
+
+class ModelStepError(RuntimeError):
+    """Raised by run_pipeline when the step of one or more models failed, after the other models completed."""
+
+    def __init__(self, step, failures):
+        self.step = step
+        self.failures = failures
+        super().__init__(f"{step} failed for {', '.join(sorted(failures))}: "
+                         + "; ".join(f"{name}: {error}" for name, error in sorted(failures.items())))
 
 class LLMPipeline:
     def __init__(self, config_path):
@@ -11,6 +26,12 @@ class LLMPipeline:
         self.project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
         self.region = self.config['monitoring']['region']
         
+        # Endpoints by display name, resolved once and shared by every step
+        self._endpoints = {}
+        self._endpoints_lock = threading.Lock()
+        self._endpoint_locks = {}
+        self.max_parallel = int(self.config.get('deployment', {}).get('max_parallel_models', MAX_PARALLEL_MODELS))
+        
         # Initialize Vertex AI
         aiplatform.init(
             project=self.project_id,
@@ -22,59 +43,118 @@ class LLMPipeline:
         with open(config_path, 'r') as f:
             return yaml.safe_load(f)
 
-    def create_endpoints(self):
-        """Create or update Vertex AI endpoints for LLM models."""
-        for model in self.config['models']:
-            endpoint = aiplatform.Endpoint.create(
-                display_name=model['endpoint'],
-                project=self.project_id,
-                location=self.region
-            )
-            print(f"Created endpoint: {endpoint.display_name}")
-
-    def deploy_models(self):
-        """Deploy models to their respective endpoints."""
-        for model in self.config['models']:
-            endpoint = aiplatform.Endpoint.list(
-                filter=f"display_name={model['endpoint']}",
-                project=self.project_id,
-                location=self.region
-            )[0]
-            
-            # Deploy model with monitoring
-            endpoint.deploy_all(
-                model=model['name'],
-                deployed_model_display_name=f"{model['name']}-{datetime.now().strftime('%Y%m%d')}",
-                machine_type="n1-standard-4",
-                accelerator_type="NVIDIA_TESLA_T4",
-                accelerator_count=1,
-                min_replica_count=self.config['deployment']['min_instances'],
-                max_replica_count=self.config['deployment']['max_instances'],
-                traffic_split={"0": 100},
-                service_account=self.config['security']['authentication']['service_account'],
-                enable_request_response_logging=True,
-                request_response_logging_sampling_rate=1.0,
-                enable_access_logging=True,
-                enable_container_logging=True
-            )
-            print(f"Deployed model {model['name']} to endpoint {endpoint.display_name}")
-
-    def setup_monitoring(self):
-        """Set up monitoring for deployed models."""
-        for model in self.config['models']:
-            endpoint = aiplatform.Endpoint.list(
-                filter=f"display_name={model['endpoint']}",
-                project=self.project_id,
-                location=self.region
-            )[0]
-            
-            # Configure monitoring
-            endpoint.set_monitoring_config(
-                metrics=self.config['monitoring']['metrics'],
-                alerts=self.config['monitoring']['alerts'],
-                logging_config=self.config['logging']
-            )
-            print(f"Set up monitoring for endpoint {endpoint.display_name}")
+    def get_endpoint(self, display_name):
+        """Get the endpoint with this display name, created when it does not exist yet, cached for later steps."""
+        with self._endpoints_lock:
+            if display_name in self._endpoints:
+                return self._endpoints[display_name]
+            lock = self._endpoint_locks.setdefault(display_name, threading.Lock())
+        
+        # One lookup per name, concurrent callers for the same name wait for it
+        with lock:
+            if display_name not in self._endpoints:
+                existing = aiplatform.Endpoint.list(
+                    filter=f'display_name="{display_name}"',
+                    project=self.project_id,
+                    location=self.region
+                )
+                if existing:
+                    endpoint = existing[0]
+                    print(f"Reusing endpoint: {endpoint.display_name}")
+                else:
+                    endpoint = aiplatform.Endpoint.create(
+                        display_name=display_name,
+                        project=self.project_id,
+                        location=self.region
+                    )
+                    print(f"Created endpoint: {endpoint.display_name}")
+                with self._endpoints_lock:
+                    self._endpoints[display_name] = endpoint
+        return self._endpoints[display_name]
+
+    def _for_each_model(self, step, fn, models=None):
+        """
+        Run fn(model) for every model concurrently, at most max_parallel at a time.
+        
+        A failing model does not stop the others. Progress is printed as each
+        model finishes.
+        
+        Returns:
+            dict: Model name -> {'status': 'ok' or 'failed', 'seconds', 'error'}
+        """
+        models = self.config['models'] if models is None else models
+        results = {}
+        if not models:
+            return results
+        
+        def run(model):
+            start = time.perf_counter()
+            fn(model)
+            return time.perf_counter() - start
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_parallel, len(models)))) as pool:
+            futures = {pool.submit(run, model): model['name'] for model in models}
+            for done, future in enumerate(as_completed(futures), start=1):
+                name = futures[future]
+                try:
+                    seconds = future.result()
+                    results[name] = {'status': 'ok', 'seconds': round(seconds, 1)}
+                    print(f"[{step} {done}/{len(models)}] {name} done in {seconds:.1f}s")
+                except Exception as e:
+                    results[name] = {'status': 'failed', 'error': str(e)}
+                    print(f"[{step} {done}/{len(models)}] {name} failed: {e}")
+        return results
+
+    def create_endpoints(self, models=None):
+        """Create or reuse the Vertex AI endpoints of the LLM models."""
+        return self._for_each_model('create_endpoints', lambda model: self.get_endpoint(model['endpoint']), models)
+
+    def _deploy_model(self, model):
+        endpoint = self.get_endpoint(model['endpoint'])
+        
+        # Deploy model with monitoring
+        endpoint.deploy_all(
+            model=model['name'],
+            deployed_model_display_name=f"{model['name']}-{datetime.now().strftime('%Y%m%d')}",
+            machine_type="n1-standard-4",
+            accelerator_type="NVIDIA_TESLA_T4",
+            accelerator_count=1,
+            min_replica_count=self.config['deployment']['min_instances'],
+            max_replica_count=self.config['deployment']['max_instances'],
+            traffic_split={"0": 100},
+            service_account=self.config['security']['authentication']['service_account'],
+            enable_request_response_logging=True,
+            request_response_logging_sampling_rate=1.0,
+            enable_access_logging=True,
+            enable_container_logging=True
+        )
+        print(f"Deployed model {model['name']} to endpoint {endpoint.display_name}")
+
+    def _setup_model_monitoring(self, model):
+        endpoint = self.get_endpoint(model['endpoint'])
+        
+        # Configure monitoring
+        endpoint.set_monitoring_config(
+            metrics=self.config['monitoring']['metrics'],
+            alerts=self.config['monitoring']['alerts'],
+            logging_config=self.config['logging']
+        )
+        print(f"Set up monitoring for endpoint {endpoint.display_name}")
+
+    def deploy_models(self, models=None):
+        """Deploy models to their respective endpoints, concurrently."""
+        return self._for_each_model('deploy_models', self._deploy_model, models)
+
+    def setup_monitoring(self, models=None):
+        """Set up monitoring for deployed models, concurrently."""
+        return self._for_each_model('setup_monitoring', self._setup_model_monitoring, models)
+
+    def deploy_and_monitor(self, models=None):
+        """Deploy each model and set up its monitoring as soon as it is deployed, models running concurrently."""
+        def deploy_and_monitor(model):
+            self._deploy_model(model)
+            self._setup_model_monitoring(model)
+        return self._for_each_model('deploy_and_monitor', deploy_and_monitor, models)
 
     def setup_cost_management(self):
         """Set up cost management and budgeting."""
@@ -118,18 +198,18 @@ class LLMPipeline:
         """Run the complete pipeline."""
         print("Starting LLM pipeline...")
         
-        # Create endpoints
+        # Create or reuse endpoints
         self.create_endpoints()
         
-        # Deploy models
-        self.deploy_models()
-        
-        # Set up monitoring
-        self.setup_monitoring()
+        # Deploy models and set up their monitoring
+        results = self.deploy_and_monitor()
         
         # Set up cost management
         self.setup_cost_management()
         
+        failures = {name: result['error'] for name, result in results.items() if result['status'] == 'failed'}
+        if failures:
+            raise ModelStepError('deploy_and_monitor', failures)
         print("Pipeline completed successfully!")
 
 def main():
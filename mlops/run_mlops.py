@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
 from pipelines.llm_pipeline import LLMPipeline
+from metrics_writer import MetricsWriter
 from google.cloud import monitoring_v3
 from google.cloud import logging
 import json
@@ -32,34 +33,27 @@ def create_logging_client():
     client = logging.Client()
     return client
 
+_metrics_writer = None
+
 def log_metrics(client, project_name, metrics):
-    """Log custom metrics to Cloud Monitoring."""
-    series = monitoring_v3.TimeSeries()
-    series.metric.type = "custom.googleapis.com/aidemy/metrics"
-    
-    # Add metric labels
-    series.metric.labels["service"] = "aidemy"
-    series.metric.labels["environment"] = os.getenv('ENVIRONMENT', 'development')
-    
-    # Create time series data
-    point = monitoring_v3.Point()
-    point.value.double_value = metrics['value']
-    
-    # Set timestamp
-    now = datetime.utcnow()
-    seconds = int(now.timestamp())
-    nanos = int(now.microsecond * 1000)
-    interval = monitoring_v3.TimeInterval(
-        {"end_time": {"seconds": seconds, "nanos": nanos}}
-    )
-    point.interval = interval
-    
-    series.points = [point]
-    
-    # Write time series
-    client.create_time_series(
-        request={"name": project_name, "time_series": [series]}
-    )
+    """Log a custom metric to Cloud Monitoring as custom.googleapis.com/aidemy/<metric>, batched in the background."""
+    global _metrics_writer
+    if _metrics_writer is None:
+        _metrics_writer = MetricsWriter(
+            client=client,
+            project_id=project_name.split('/')[-1],
+            labels={
+                "service": "aidemy",
+                "environment": os.getenv('ENVIRONMENT', 'development')
+            },
+            gauge_max=False
+        )
+    _metrics_writer.record(metrics['metric'], metrics['value'])
+
+def flush_metrics():
+    """Write the buffered metric points now."""
+    if _metrics_writer is not None:
+        _metrics_writer.flush()
 
 def main():
     """Main function to demonstrate MLOps functionality."""
@@ -100,19 +94,21 @@ def main():
             "metric": "endpoints_created"
         })
         
-        # 2. Deploy models
+        # 2. Deploy models, concurrently; a failed model does not stop the others
         print("\n2️⃣ Deploying models...")
-        pipeline.deploy_models()
+        deployed = pipeline.deploy_models()
+        deployed_models = [model for model in pipeline.config['models']
+                           if deployed[model['name']]['status'] == 'ok']
         log_metrics(monitoring_client, project_name, {
-            "value": len(pipeline.config['models']),
+            "value": len(deployed_models),
             "metric": "models_deployed"
         })
         
-        # 3. Set up monitoring
+        # 3. Set up monitoring of the deployed models
         print("\n3️⃣ Setting up monitoring...")
-        pipeline.setup_monitoring()
+        monitored = pipeline.setup_monitoring(deployed_models)
         log_metrics(monitoring_client, project_name, {
-            "value": 1,
+            "value": sum(result['status'] == 'ok' for result in monitored.values()),
             "metric": "monitoring_configured"
         })
         
@@ -128,9 +124,10 @@ def main():
         logger.info("Pipeline completed successfully", extra={
             "pipeline_name": pipeline.config['pipeline']['name'],
             "timestamp": datetime.utcnow().isoformat(),
-            "models_deployed": len(pipeline.config['models'])
+            "models_deployed": len(deployed_models)
         })
         
+        flush_metrics()
         print("\n✅ Pipeline completed successfully!")
         
         # Display monitoring dashboard URL
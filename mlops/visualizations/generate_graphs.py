@@ -8,59 +8,681 @@ import dash
 from dash import dcc, html
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output
+import re
 import json
+import time
+import sqlite3
+import hashlib
+import contextlib
+import functools
+import threading
+import multiprocessing
 import numpy as np
 from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from google.api import metric_pb2
+
+ValueType = metric_pb2.MetricDescriptor.ValueType
+
+# Graph name -> (Cloud Monitoring metric type, value column)
+METRICS = {
+    'latency': ('aiplatform.googleapis.com/endpoint/prediction_latency', 'latency'),
+    'error_rate': ('aiplatform.googleapis.com/endpoint/error_count', 'error_count'),
+    'token_usage': ('aiplatform.googleapis.com/endpoint/token_count', 'token_count'),
+    'cost': ('aiplatform.googleapis.com/endpoint/cost', 'cost'),
+}
+
+# Windows the dashboard can plot, in hours
+WINDOWS = {'24h': 24, '7d': 7 * 24, '30d': 30 * 24}
+DEFAULT_WINDOW = '24h'
+
+# Local store of the fetched points, so each refresh only queries the new ones
+METRIC_STORE_PATH = os.getenv('MLOPS_METRIC_STORE_PATH', 'mlops/visualizations/metric_store.db')
+# Points older than this are deleted from the store, longer than the longest window
+METRIC_STORE_RETENTION_HOURS = float(os.getenv('MLOPS_METRIC_STORE_RETENTION_HOURS', 35 * 24))
+# Monitoring aligns each series to one point per ALIGNMENT_SECONDS before sending it, 0 fetches raw points
+ALIGNMENT_SECONDS = int(os.getenv('MLOPS_ALIGNMENT_SECONDS', 60))
+# The last minutes before the high-water mark are fetched again, Monitoring ingests points late;
+# a whole number of alignment periods, so each refresh starts on a bucket boundary
+METRIC_STORE_LATE_SECONDS = int(os.getenv('MLOPS_METRIC_STORE_LATE_SECONDS', 300))
+if ALIGNMENT_SECONDS:
+    METRIC_STORE_LATE_SECONDS = -(-METRIC_STORE_LATE_SECONDS // ALIGNMENT_SECONDS) * ALIGNMENT_SECONDS
+METRIC_STORE_COMPACT_SECONDS = float(os.getenv('MLOPS_METRIC_STORE_COMPACT_SECONDS', 3600))
+ALIGNERS = {
+    'latency': monitoring_v3.Aggregation.Aligner.ALIGN_MEAN,
+    'error_rate': monitoring_v3.Aggregation.Aligner.ALIGN_SUM,
+    'token_usage': monitoring_v3.Aggregation.Aligner.ALIGN_SUM,
+    'cost': monitoring_v3.Aggregation.Aligner.ALIGN_SUM,
+}
+# Points sent to the browser per time series trace, the rest are downsampled away
+POINT_BUDGET = int(os.getenv('MLOPS_POINT_BUDGET', 2000))
+
+# Dashboard refresh interval, a metric snapshot younger than SNAPSHOT_MAX_AGE_SECONDS is reused
+REFRESH_INTERVAL_MS = 5 * 60 * 1000
+SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv('MLOPS_SNAPSHOT_MAX_AGE_SECONDS', 240))
+
+# Processes writing the HTML, PNG and CSV files of the dashboard graphs
+EXPORT_WORKERS = int(os.getenv('MLOPS_EXPORT_WORKERS', 2))
+# Start method of the export processes. A forked child would inherit the Dash server's threads and the
+# dispatcher's locks mid-use, and could deadlock; spawn (or forkserver) starts it from a clean interpreter
+EXPORT_START_METHOD = os.getenv('MLOPS_EXPORT_START_METHOD', 'spawn')
+# Exports kept per metric in the graphs directory, older ones are deleted...
+GRAPHS_KEEP = int(os.getenv('MLOPS_GRAPHS_KEEP', 5))
+# ...as are exports older than this, whatever their number
+GRAPHS_RETENTION_HOURS = float(os.getenv('MLOPS_GRAPHS_RETENTION_HOURS', 7 * 24))
+# PNG export needs kaleido and a browser, set to false where they are not installed
+EXPORT_PNG = os.getenv('MLOPS_EXPORT_PNG', 'true').lower() in ('1', 'true', 'yes')
+
+def series_label(series):
+    """Label of a time series built from its resource and metric labels, e.g. 'endpoint_id=123, response_code=500'."""
+    labels = {**series.resource.labels, **series.metric.labels}
+    labels.pop('project_id', None)
+    return ', '.join(f'{key}={labels[key]}' for key in sorted(labels)) or series.metric.type
+
+def _point_values(series):
+    """Values of the points of a raw TimeSeries according to its value type."""
+    points = series.points
+    if series.value_type == ValueType.INT64:
+        return (point.value.int64_value for point in points)
+    if series.value_type == ValueType.DISTRIBUTION:
+        return (point.value.distribution_value.mean for point in points)
+    return (point.value.double_value for point in points)
+
+def empty_frame(value_column):
+    """A frame shaped like those of series_frame, without rows."""
+    return pd.DataFrame({
+        'timestamp': pd.Series([], dtype='datetime64[ns]'),
+        value_column: pd.Series([], dtype=np.float64),
+        'series': pd.Categorical([]),
+    })
+
+def series_frame(results, value_column):
+    """
+    Build one DataFrame from the time series returned by list_time_series.
+    
+    The points of each series are read into NumPy arrays and the frame is
+    built once, instead of growing it point by point. Rows are sorted by time.
+    
+    Args:
+        results: Iterable of TimeSeries (proto-plus or raw protobuf)
+        value_column: Name of the value column, e.g. 'latency'
+    
+    Returns:
+        pd.DataFrame: Columns timestamp (datetime64, UTC), value_column (float)
+        and series (categorical label of the series each point belongs to)
+    """
+    seconds, values, labels, counts = [], [], [], []
+    for result in results:
+        # The raw protobuf is several times faster to walk than the proto-plus wrapper
+        series = monitoring_v3.TimeSeries.pb(result) if isinstance(result, monitoring_v3.TimeSeries) else result
+        count = len(series.points)
+        if not count:
+            continue
+        seconds.append(np.fromiter((point.interval.end_time.seconds for point in series.points),
+                                   dtype=np.int64, count=count))
+        values.append(np.fromiter(_point_values(series), dtype=np.float64, count=count))
+        labels.append(series_label(series))
+        counts.append(count)
+    
+    if not counts:
+        return empty_frame(value_column)
+    
+    # Series sharing a label (e.g. split across pages) share a category
+    categories = {}
+    series_codes = np.array([categories.setdefault(label, len(categories)) for label in labels])
+    seconds = np.concatenate(seconds)
+    order = np.argsort(seconds, kind='stable')
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(seconds[order], unit='s'),
+        value_column: np.concatenate(values)[order],
+        'series': pd.Categorical.from_codes(np.repeat(series_codes, counts)[order], categories=list(categories)),
+    })
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling of a line.
+    
+    Keeps the first and last points and, from each of threshold - 2 buckets,
+    the point forming the largest triangle with the point kept before it and
+    the average of the next bucket, which preserves the visual shape.
+    
+    Returns:
+        np.ndarray: Sorted indices of the kept points
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+def minmax_downsample(y, threshold):
+    """
+    Keep the minimum and maximum of threshold / 2 equal buckets, so isolated spikes survive.
+    
+    Returns:
+        np.ndarray: Sorted indices of the kept points
+    """
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, threshold // 2 + 1).astype(np.int64)
+    kept = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            bucket = y[start:end]
+            kept += [start + int(np.argmin(bucket)), start + int(np.argmax(bucket))]
+    return np.unique(kept)
+
+def downsample_frame(df, value_column, budget=POINT_BUDGET, method='lttb'):
+    """
+    The rows of a time-sorted frame kept for a time series trace of at most `budget` points.
+    
+    Args:
+        method: 'lttb' for smooth lines, 'minmax' for spiky counts
+    """
+    if len(df) <= budget:
+        return df
+    if method == 'minmax':
+        kept = minmax_downsample(df[value_column].to_numpy(), budget)
+    else:
+        seconds = df['timestamp'].to_numpy().astype('datetime64[s]').astype(np.int64)
+        kept = lttb(seconds - seconds[0], df[value_column].to_numpy(), budget)
+    return df.iloc[kept]
+
+def box_trace(values, name):
+    """A box plot trace from precomputed quartiles, so the browser does not receive every value."""
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return go.Box(y=[], name=name)
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    # Tukey fences, at the most extreme values within 1.5 IQR of the box
+    lower = values[values >= q1 - 1.5 * iqr].min()
+    upper = values[values <= q3 + 1.5 * iqr].max()
+    return go.Box(q1=[q1], median=[median], q3=[q3], lowerfence=[lower], upperfence=[upper],
+                  mean=[values.mean()], x=[name], name=name)
+
+def histogram_trace(values, name, bins=50):
+    """A histogram trace binned here, so the browser receives the bin counts instead of every value."""
+    counts, edges = np.histogram(np.asarray(values, dtype=np.float64), bins=bins)
+    return go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), name=name)
+
+class MetricStore:
+    """
+    The points of every metric fetched so far, in a local SQLite file.
+    
+    Each metric records the time range its stored points cover, from its
+    oldest fetch to its high-water mark. missing() gives the ranges still to
+    be queried for a window: the new points since the high-water mark (minus
+    a margin for late points, which are upserted) and, for a window longer
+    than any fetched before, the older points. compact() applies the
+    retention.
+    
+    Args:
+        path: SQLite file, shared by the threads of the dashboard
+        retention_hours: Age after which points are deleted
+        late_seconds: Margin fetched again before the high-water mark
+    """
+    
+    def __init__(self, path=METRIC_STORE_PATH, retention_hours=METRIC_STORE_RETENTION_HOURS,
+                 late_seconds=METRIC_STORE_LATE_SECONDS, compact_seconds=METRIC_STORE_COMPACT_SECONDS):
+        self.path = str(path)
+        self.retention_hours = retention_hours
+        self.late_seconds = late_seconds
+        self.compact_seconds = compact_seconds
+        self._compacted_at = 0
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS series (
+                    id INTEGER PRIMARY KEY,
+                    metric TEXT NOT NULL,
+                    label TEXT NOT NULL,
+                    UNIQUE (metric, label)
+                );
+                CREATE TABLE IF NOT EXISTS points (
+                    series_id INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    value REAL NOT NULL,
+                    PRIMARY KEY (series_id, ts)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS watermarks (
+                    metric TEXT PRIMARY KEY,
+                    start_time INTEGER NOT NULL,
+                    end_time INTEGER NOT NULL
+                );
+                """
+            )
+    
+    @contextlib.contextmanager
+    def _connect(self):
+        # One short-lived connection per operation, safe across the snapshot's fetch threads
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def watermark(self, metric):
+        """(start_time, end_time) covered by the stored points of a metric, None before its first fetch."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT start_time, end_time FROM watermarks WHERE metric = ?", (metric,)).fetchone()
+        return tuple(row) if row else None
+    
+    def missing(self, metric, start, end):
+        """The (start, end) ranges, in epoch seconds, to fetch so the store covers [start, end]."""
+        covered = self.watermark(metric)
+        if covered is not None and covered[1] < start:
+            # Nothing stored overlaps the window, it is fetched whole and covered from there on
+            with self._connect() as conn:
+                conn.execute("DELETE FROM watermarks WHERE metric = ?", (metric,))
+            covered = None
+        if covered is None:
+            return [(start, end)]
+        covered_start, covered_end = covered
+        ranges = []
+        if start < covered_start:
+            ranges.append((start, covered_start))
+        ranges.append((max(covered_start, min(covered_end, end) - self.late_seconds), end))
+        return ranges
+    
+    def append(self, metric, df, start, end):
+        """Store the points of a series_frame fetched for [start, end] and extend the metric's covered range."""
+        value_column = df.columns[1]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = {}
+                for label in df['series'].cat.categories:
+                    conn.execute("INSERT OR IGNORE INTO series (metric, label) VALUES (?, ?)", (metric, label))
+                    ids[label] = conn.execute(
+                        "SELECT id FROM series WHERE metric = ? AND label = ?", (metric, label)
+                    ).fetchone()[0]
+                series_ids = np.array([ids[label] for label in df['series'].cat.categories], dtype=np.int64)
+                rows = zip(
+                    series_ids[df['series'].cat.codes.to_numpy()].tolist(),
+                    (df['timestamp'].to_numpy().astype('datetime64[s]').astype(np.int64)).tolist(),
+                    df[value_column].to_numpy(dtype=np.float64).tolist(),
+                )
+                conn.executemany("INSERT OR REPLACE INTO points (series_id, ts, value) VALUES (?, ?, ?)", rows)
+                conn.execute(
+                    "INSERT INTO watermarks (metric, start_time, end_time) VALUES (?, ?, ?) "
+                    "ON CONFLICT (metric) DO UPDATE SET start_time = MIN(start_time, excluded.start_time), "
+                    "end_time = MAX(end_time, excluded.end_time)",
+                    (metric, int(start), int(end)),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def frame(self, metric, value_column, start, end=None):
+        """The stored points of a metric from start (epoch seconds), as a series_frame-shaped DataFrame."""
+        query = ("SELECT p.ts, p.value, s.label FROM points p JOIN series s ON s.id = p.series_id "
+                 "WHERE s.metric = ? AND p.ts >= ?")
+        params = [metric, int(start)]
+        if end is not None:
+            query += " AND p.ts <= ?"
+            params.append(int(end))
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY p.ts", params).fetchall()
+        if not rows:
+            return empty_frame(value_column)
+        ts, values, labels = zip(*rows)
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(np.array(ts, dtype=np.int64), unit='s'),
+            value_column: np.array(values, dtype=np.float64),
+            'series': pd.Categorical(labels),
+        })
+    
+    def compact(self, force=False):
+        """
+        Delete the points older than the retention and reclaim their space.
+        
+        Runs at most once per compact_seconds unless forced. Returns the
+        number of deleted points.
+        """
+        now = time.time()
+        if not force and now - self._compacted_at < self.compact_seconds:
+            return 0
+        self._compacted_at = now
+        cutoff = int(now - self.retention_hours * 3600)
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM points WHERE ts < ?", (cutoff,)).rowcount
+            conn.execute("DELETE FROM series WHERE id NOT IN (SELECT DISTINCT series_id FROM points)")
+            conn.execute("UPDATE watermarks SET start_time = ? WHERE start_time < ?", (cutoff, cutoff))
+            if deleted:
+                conn.execute("VACUUM")
+        return deleted
+
+class MetricSnapshot:
+    """
+    The frames of every metric, fetched together and shared until they are max_age seconds old.
+    
+    A refresh runs one query per metric concurrently. Callers arriving while a
+    refresh is in flight wait for it instead of starting their own, so
+    concurrent dashboard sessions and the exporter cost one round of queries.
+    When a query fails, the previous frame of that metric is kept if there is
+    one.
+    
+    Args:
+        fetch: fetch(name) returns the DataFrame of a metric of METRICS
+        names: Metrics in the snapshot
+        max_age: Seconds a snapshot is reused
+    """
+    
+    def __init__(self, fetch, names=tuple(METRICS), max_age=SNAPSHOT_MAX_AGE_SECONDS):
+        self.fetch = fetch
+        self.names = list(names)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._frames = None
+        self._fetched_at = None
+        self._inflight = None
+        self.stats = {'refreshes': 0, 'hits': 0, 'joined': 0, 'errors': 0}
+    
+    def get(self, max_age=None):
+        """Get the frames keyed by metric name, refreshing them when the snapshot is too old."""
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            if self._frames is not None and time.monotonic() - self._fetched_at < max_age:
+                self.stats['hits'] += 1
+                return self._frames
+            if self._inflight is not None:
+                self.stats['joined'] += 1
+                future, leader = self._inflight, False
+            else:
+                self._inflight = future = Future()
+                self.stats['refreshes'] += 1
+                leader = True
+        
+        if leader:
+            try:
+                frames = self._refresh()
+            except Exception as e:
+                with self._lock:
+                    self._inflight = None
+                    self.stats['errors'] += 1
+                future.set_exception(e)
+                raise
+            with self._lock:
+                self._frames, self._fetched_at, self._inflight = frames, time.monotonic(), None
+            future.set_result(frames)
+        return future.result()
+    
+    def _refresh(self):
+        with ThreadPoolExecutor(max_workers=len(self.names)) as pool:
+            futures = {name: pool.submit(self.fetch, name) for name in self.names}
+        frames = {}
+        for name, future in futures.items():
+            try:
+                frames[name] = future.result()
+            except Exception as e:
+                if not self._frames or name not in self._frames:
+                    raise
+                print(f"❌ Error fetching {name}, keeping the previous data: {str(e)}")
+                frames[name] = self._frames[name]
+        return frames
+
+def frame_hash(df):
+    """Hash of the content of a DataFrame, its column names included."""
+    digest = hashlib.sha256(json.dumps(list(map(str, df.columns))).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+def prune_graphs(graphs_dir, metric, keep=GRAPHS_KEEP, retention_hours=GRAPHS_RETENTION_HOURS):
+    """
+    Delete the old exports of a metric from the graphs directory.
+    
+    The newest `keep` exports are kept unless they are older than
+    retention_hours. Returns the deleted paths.
+    """
+    pattern = re.compile(rf'{re.escape(metric)}_(ts|alt|data)_(\d{{8}}_\d{{6}})\.(html|png|csv)$')
+    exports = {}
+    for path in Path(graphs_dir).iterdir():
+        match = pattern.match(path.name)
+        if match:
+            exports.setdefault(match.group(2), []).append(path)
+    
+    cutoff = (datetime.now() - timedelta(hours=retention_hours)).strftime("%Y%m%d_%H%M%S")
+    removed = []
+    for n, timestamp in enumerate(sorted(exports, reverse=True)):
+        if n < keep and timestamp >= cutoff:
+            continue
+        for path in exports[timestamp]:
+            path.unlink(missing_ok=True)
+            removed.append(path)
+    return removed
+
+def export_figures(graphs_dir, metric, timestamp, fig_ts_json, fig_alt_json, data_csv,
+                   keep=GRAPHS_KEEP, retention_hours=GRAPHS_RETENTION_HOURS, png=EXPORT_PNG):
+    """
+    Write the HTML, PNG and CSV files of one metric's figures, then prune its old exports.
+    
+    Runs in the export process pool, the figures arrive as plotly JSON and the
+    time series data as CSV text. Returns the written paths.
+    """
+    import plotly.io as pio
+    
+    graphs_dir = Path(graphs_dir)
+    fig_ts, fig_alt = pio.from_json(fig_ts_json), pio.from_json(fig_alt_json)
+    written = []
+    for kind, fig in (('ts', fig_ts), ('alt', fig_alt)):
+        fig.write_html(graphs_dir / f'{metric}_{kind}_{timestamp}.html')
+        written.append(graphs_dir / f'{metric}_{kind}_{timestamp}.html')
+    
+    (graphs_dir / f'{metric}_data_{timestamp}.csv').write_text(data_csv)
+    written.append(graphs_dir / f'{metric}_data_{timestamp}.csv')
+    
+    # PNG export needs kaleido and a browser, the other files are kept when it fails
+    for kind, fig in (('ts', fig_ts), ('alt', fig_alt)) if png else ():
+        try:
+            fig.write_image(graphs_dir / f'{metric}_{kind}_{timestamp}.png')
+            written.append(graphs_dir / f'{metric}_{kind}_{timestamp}.png')
+        except Exception as e:
+            print(f"❌ Error writing {metric}_{kind}_{timestamp}.png: {str(e).strip()}")
+    
+    prune_graphs(graphs_dir, metric, keep=keep, retention_hours=retention_hours)
+    return [str(path) for path in written]
+
+class GraphExporter:
+    """
+    Exports the dashboard graphs off the request path.
+    
+    submit() returns at once. A dispatcher thread hashes each metric's frame,
+    skips the metrics whose data has not changed since their last export, and
+    hands the others to a process pool that writes their files and prunes
+    the old ones. A failed export is retried on the next submit.
+    
+    Args:
+        graphs_dir: Directory of the exported files
+        workers: Export processes
+        executor: Executor running export_figures, a ProcessPoolExecutor by default
+        start_method: multiprocessing start method of the default pool, "spawn" or "forkserver"
+    """
+    
+    def __init__(self, graphs_dir, workers=EXPORT_WORKERS, keep=GRAPHS_KEEP,
+                 retention_hours=GRAPHS_RETENTION_HOURS, executor=None, png=EXPORT_PNG,
+                 start_method=EXPORT_START_METHOD):
+        self.graphs_dir = Path(graphs_dir)
+        self.png = png
+        self.graphs_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.start_method = start_method
+        self.keep = keep
+        self.retention_hours = retention_hours
+        self._executor = executor
+        self._dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='graph-export')
+        self._lock = threading.Lock()
+        self._hashes = {}
+        self.stats = {'exported': 0, 'unchanged': 0, 'errors': 0}
+    
+    def _pool(self):
+        # Created on first export, so the dashboard starts without waiting for the workers
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context(self.start_method))
+            return self._executor
+    
+    def submit(self, graphs, snapshot):
+        """
+        Export the figures of create_graphs in the background.
+        
+        Args:
+            graphs: {metric: (fig_ts, fig_alt)}
+            snapshot: {metric: DataFrame} the figures were built from
+        
+        Returns:
+            Future: Resolves to {metric: list of written paths, or 'unchanged'}
+        """
+        return self._dispatcher.submit(self._export, graphs, snapshot)
+    
+    def _export(self, graphs, snapshot):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        futures, results = {}, {}
+        for metric, (fig_ts, fig_alt) in graphs.items():
+            data_hash = frame_hash(snapshot[metric])
+            if self._hashes.get(metric) == data_hash:
+                results[metric] = 'unchanged'
+                self.stats['unchanged'] += 1
+                continue
+            self._hashes[metric] = data_hash
+            # Every point of the metric, the time series figure only holds the downsampled ones
+            frame = snapshot[metric]
+            data_csv = pd.DataFrame({
+                'timestamp': frame['timestamp'],
+                'value': frame[frame.columns[1]]
+            }).to_csv(index=False)
+            futures[metric] = self._pool().submit(
+                export_figures, str(self.graphs_dir), metric, timestamp, fig_ts.to_json(), fig_alt.to_json(),
+                data_csv, self.keep, self.retention_hours, self.png
+            )
+        
+        for metric, future in futures.items():
+            try:
+                results[metric] = future.result()
+                self.stats['exported'] += 1
+            except Exception as e:
+                print(f"❌ Error exporting {metric} graphs: {str(e)}")
+                self._hashes.pop(metric, None)
+                self.stats['errors'] += 1
+                results[metric] = []
+        return results
+    
+    def shutdown(self):
+        self._dispatcher.shutdown(wait=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
 
 class MLOpsVisualizer:
-    def __init__(self):
+    def __init__(self, client=None, metric_store=None):
         """Initialize the MLOps visualizer."""
-        self.client = monitoring_v3.MetricServiceClient()
+        self.client = client or monitoring_v3.MetricServiceClient()
         self.project_name = f"projects/{os.getenv('GOOGLE_CLOUD_PROJECT')}"
         self.graphs_dir = Path('mlops/visualizations/graphs')
         self.graphs_dir.mkdir(parents=True, exist_ok=True)
-        
-    def get_metric_data(self, metric_type, hours=24):
-        """Fetch metric data from Cloud Monitoring."""
-        now = datetime.utcnow()
-        seconds = int(now.timestamp())
-        nanos = int(now.microsecond * 1000)
+        self.metric_store = metric_store or MetricStore()
+        self.metric_snapshots = {}
+        self._snapshots_lock = threading.Lock()
+        self.exporter = GraphExporter(self.graphs_dir)
+        
+    def get_metric_data(self, metric_type, hours=24, start=None, end=None, aligner=None,
+                        alignment_seconds=ALIGNMENT_SECONDS):
+        """
+        Fetch metric data from Cloud Monitoring, for the last `hours` or between start and end (epoch seconds).
+        
+        With an aligner, Monitoring returns one point per alignment_seconds
+        per series instead of every raw point.
+        """
+        end = time.time() if end is None else end
+        start = end - hours * 3600 if start is None else start
         interval = monitoring_v3.TimeInterval({
-            "end_time": {"seconds": seconds, "nanos": nanos},
-            "start_time": {"seconds": int((now - timedelta(hours=hours)).timestamp())}
+            "end_time": {"seconds": int(end), "nanos": int((end % 1) * 1e9)},
+            "start_time": {"seconds": int(start)}
         })
         
-        results = self.client.list_time_series(
-            request={
-                "name": self.project_name,
-                "filter": f'metric.type = "{metric_type}"',
-                "interval": interval,
+        request = {
+            "name": self.project_name,
+            "filter": f'metric.type = "{metric_type}"',
+            "interval": interval,
+        }
+        if aligner is not None and alignment_seconds:
+            request["aggregation"] = {
+                "alignment_period": {"seconds": alignment_seconds},
+                "per_series_aligner": aligner,
             }
-        )
+        results = self.client.list_time_series(request=request)
         
         return results
 
-    def create_latency_graph(self):
+    def fetch_frame(self, name, hours=24):
+        """
+        Get the DataFrame of a metric of METRICS for the last `hours`.
+        
+        Only the ranges the metric store does not cover yet are queried from
+        Cloud Monitoring, usually the few minutes since the previous refresh.
+        
+        Aligned points are buckets ending on a multiple of ALIGNMENT_SECONDS
+        and covering the period before. A bucket cut by the query interval or
+        still open holds a partial sum, and its upsert would replace the
+        complete bucket stored before, so each range is widened to bucket
+        boundaries and only its complete, closed buckets are stored.
+        """
+        metric_type, value_column = METRICS[name]
+        end = int(time.time())
+        start = end - int(hours * 3600)
+        period = ALIGNMENT_SECONDS if name in ALIGNERS else 0
+        for range_start, range_end in self.metric_store.missing(metric_type, start, end):
+            fetch_start, fetch_end = range_start, range_end
+            if period:
+                range_start = range_start // period * period
+                range_end = min(-(-range_end // period) * period, end // period * period)
+                # From one period earlier, so the bucket ending at range_start is complete
+                fetch_start, fetch_end = range_start - period, -(-fetch_end // period) * period
+            results = self.get_metric_data(metric_type, start=fetch_start, end=fetch_end, aligner=ALIGNERS.get(name))
+            frame = series_frame(results, value_column)
+            if period:
+                seconds = frame['timestamp'].to_numpy().astype('datetime64[s]').astype(np.int64)
+                frame = frame[(seconds > fetch_start) & (seconds <= range_end)]
+            self.metric_store.append(metric_type, frame, range_start, range_end)
+        self.metric_store.compact()
+        return self.metric_store.frame(metric_type, value_column, start)
+    
+    def snapshot(self, window=DEFAULT_WINDOW):
+        """The shared snapshot of every metric's DataFrame over a window of WINDOWS, see MetricSnapshot."""
+        with self._snapshots_lock:
+            if window not in self.metric_snapshots:
+                self.metric_snapshots[window] = MetricSnapshot(functools.partial(self.fetch_frame, hours=WINDOWS[window]))
+            snapshot = self.metric_snapshots[window]
+        return snapshot.get()
+
+    def create_latency_graph(self, df=None):
         """Create latency trend graph with box plot."""
-        results = self.get_metric_data("aiplatform.googleapis.com/endpoint/prediction_latency")
-        
-        df = pd.DataFrame({
-            'timestamp': [],
-            'latency': []
-        })
-        
-        for result in results:
-            for point in result.points:
-                df = pd.concat([df, pd.DataFrame({
-                    'timestamp': [datetime.fromtimestamp(point.interval.end_time.seconds)],
-                    'latency': [point.value.double_value]
-                })])
+        # The snapshot's frames are shared, the graph works on its own copy
+        df = (self.snapshot()['latency'] if df is None else df).copy()
         
         # Create time series plot
         fig_ts = go.Figure()
+        line = downsample_frame(df, 'latency', method='lttb')
         fig_ts.add_trace(go.Scatter(
-            x=df['timestamp'],
-            y=df['latency'],
+            x=line['timestamp'],
+            y=line['latency'],
             mode='lines+markers',
             name='Latency'
         ))
@@ -74,10 +696,7 @@ class MLOpsVisualizer:
         
         # Create box plot
         fig_box = go.Figure()
-        fig_box.add_trace(go.Box(
-            y=df['latency'],
-            name='Latency Distribution'
-        ))
+        fig_box.add_trace(box_trace(df['latency'], 'Latency Distribution'))
         
         fig_box.update_layout(
             title='Latency Distribution',
@@ -87,27 +706,16 @@ class MLOpsVisualizer:
         
         return fig_ts, fig_box
 
-    def create_error_rate_graph(self):
+    def create_error_rate_graph(self, df=None):
         """Create error rate trend graph with heatmap."""
-        results = self.get_metric_data("aiplatform.googleapis.com/endpoint/error_count")
-        
-        df = pd.DataFrame({
-            'timestamp': [],
-            'error_count': []
-        })
-        
-        for result in results:
-            for point in result.points:
-                df = pd.concat([df, pd.DataFrame({
-                    'timestamp': [datetime.fromtimestamp(point.interval.end_time.seconds)],
-                    'error_count': [point.value.double_value]
-                })])
+        df = (self.snapshot()['error_rate'] if df is None else df).copy()
         
         # Create time series plot
         fig_ts = go.Figure()
+        line = downsample_frame(df, 'error_count', method='minmax')
         fig_ts.add_trace(go.Scatter(
-            x=df['timestamp'],
-            y=df['error_count'],
+            x=line['timestamp'],
+            y=line['error_count'],
             mode='lines+markers',
             name='Error Count'
         ))
@@ -145,27 +753,16 @@ class MLOpsVisualizer:
         
         return fig_ts, fig_heat
 
-    def create_token_usage_graph(self):
+    def create_token_usage_graph(self, df=None):
         """Create token usage trend graph with histogram."""
-        results = self.get_metric_data("aiplatform.googleapis.com/endpoint/token_count")
-        
-        df = pd.DataFrame({
-            'timestamp': [],
-            'token_count': []
-        })
-        
-        for result in results:
-            for point in result.points:
-                df = pd.concat([df, pd.DataFrame({
-                    'timestamp': [datetime.fromtimestamp(point.interval.end_time.seconds)],
-                    'token_count': [point.value.double_value]
-                })])
+        df = (self.snapshot()['token_usage'] if df is None else df).copy()
         
         # Create time series plot
         fig_ts = go.Figure()
+        line = downsample_frame(df, 'token_count', method='lttb')
         fig_ts.add_trace(go.Scatter(
-            x=df['timestamp'],
-            y=df['token_count'],
+            x=line['timestamp'],
+            y=line['token_count'],
             mode='lines+markers',
             name='Token Usage'
         ))
@@ -179,11 +776,7 @@ class MLOpsVisualizer:
         
         # Create histogram
         fig_hist = go.Figure()
-        fig_hist.add_trace(go.Histogram(
-            x=df['token_count'],
-            name='Token Usage Distribution',
-            nbinsx=50
-        ))
+        fig_hist.add_trace(histogram_trace(df['token_count'], 'Token Usage Distribution', bins=50))
         
         fig_hist.update_layout(
             title='Token Usage Distribution',
@@ -194,27 +787,16 @@ class MLOpsVisualizer:
         
         return fig_ts, fig_hist
 
-    def create_cost_graph(self):
+    def create_cost_graph(self, df=None):
         """Create cost trend graph with pie chart."""
-        results = self.get_metric_data("aiplatform.googleapis.com/endpoint/cost")
-        
-        df = pd.DataFrame({
-            'timestamp': [],
-            'cost': []
-        })
-        
-        for result in results:
-            for point in result.points:
-                df = pd.concat([df, pd.DataFrame({
-                    'timestamp': [datetime.fromtimestamp(point.interval.end_time.seconds)],
-                    'cost': [point.value.double_value]
-                })])
+        df = (self.snapshot()['cost'] if df is None else df).copy()
         
         # Create time series plot
         fig_ts = go.Figure()
+        line = downsample_frame(df, 'cost', method='lttb')
         fig_ts.add_trace(go.Scatter(
-            x=df['timestamp'],
-            y=df['cost'],
+            x=line['timestamp'],
+            y=line['cost'],
             mode='lines+markers',
             name='Cost'
         ))
@@ -243,43 +825,44 @@ class MLOpsVisualizer:
         
         return fig_ts, fig_pie
 
-    def save_graphs(self):
-        """Save all graphs dynamically."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Generate and save all graphs
-        graphs = {
-            'latency': self.create_latency_graph(),
-            'error_rate': self.create_error_rate_graph(),
-            'token_usage': self.create_token_usage_graph(),
-            'cost': self.create_cost_graph()
+    def create_graphs(self, snapshot=None):
+        """Create the (time series, alternative) figure pair of every metric from one snapshot."""
+        snapshot = snapshot or self.snapshot()
+        return {
+            'latency': self.create_latency_graph(snapshot['latency']),
+            'error_rate': self.create_error_rate_graph(snapshot['error_rate']),
+            'token_usage': self.create_token_usage_graph(snapshot['token_usage']),
+            'cost': self.create_cost_graph(snapshot['cost'])
         }
+
+    def save_graphs(self, graphs=None, snapshot=None):
+        """Save all graphs dynamically through the background exporter, waiting until they are written."""
+        snapshot = snapshot or self.snapshot()
         
-        for metric, (fig_ts, fig_alt) in graphs.items():
-            # Save time series plots
-            fig_ts.write_html(self.graphs_dir / f'{metric}_ts_{timestamp}.html')
-            fig_ts.write_image(self.graphs_dir / f'{metric}_ts_{timestamp}.png')
-            
-            # Save alternative visualizations
-            fig_alt.write_html(self.graphs_dir / f'{metric}_alt_{timestamp}.html')
-            fig_alt.write_image(self.graphs_dir / f'{metric}_alt_{timestamp}.png')
-            
-            # Save data as CSV
-            df = pd.DataFrame({
-                'timestamp': fig_ts.data[0].x,
-                'value': fig_ts.data[0].y
-            })
-            df.to_csv(self.graphs_dir / f'{metric}_data_{timestamp}.csv', index=False)
-
-def create_dashboard():
-    """Create an interactive dashboard with MLOps metrics."""
+        # Generate and save all graphs
+        graphs = graphs or self.create_graphs(snapshot)
+        return self.exporter.submit(graphs, snapshot).result()
+
+def create_dashboard(visualizer=None):
+    """Create an interactive dashboard with MLOps metrics, from the given MLOpsVisualizer or a new one."""
     app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY])
     
-    visualizer = MLOpsVisualizer()
+    visualizer = visualizer or MLOpsVisualizer()
     
     app.layout = dbc.Container([
         html.H1("AiDemy MLOps Dashboard", className="text-center my-4"),
         
+        dbc.Row([
+            dbc.Col([
+                dbc.RadioItems(
+                    id='window-selector',
+                    options=[{'label': window, 'value': window} for window in WINDOWS],
+                    value=DEFAULT_WINDOW,
+                    inline=True
+                )
+            ], className="text-center mb-3")
+        ]),
+        
         dbc.Row([
             dbc.Col([
                 dcc.Graph(id='latency-ts-graph')
@@ -318,7 +901,7 @@ def create_dashboard():
         
         dcc.Interval(
             id='interval-component',
-            interval=5*60*1000,  # update every 5 minutes
+            interval=REFRESH_INTERVAL_MS,  # update every 5 minutes
             n_intervals=0
         )
     ])
@@ -332,16 +915,22 @@ def create_dashboard():
          Output('token-hist-graph', 'figure'),
          Output('cost-ts-graph', 'figure'),
          Output('cost-pie-graph', 'figure')],
-        [Input('interval-component', 'n_intervals')]
+        [Input('interval-component', 'n_intervals'),
+         Input('window-selector', 'value')]
     )
-    def update_graphs(n):
-        latency_ts, latency_box = visualizer.create_latency_graph()
-        error_ts, error_heat = visualizer.create_error_rate_graph()
-        token_ts, token_hist = visualizer.create_token_usage_graph()
-        cost_ts, cost_pie = visualizer.create_cost_graph()
-        
-        # Save graphs on each update
-        visualizer.save_graphs()
+    def update_graphs(n, window):
+        # One shared snapshot per window and interval, whatever the number of open sessions
+        snapshot = visualizer.snapshot(window or DEFAULT_WINDOW)
+        graphs = visualizer.create_graphs(snapshot)
+        latency_ts, latency_box = graphs['latency']
+        error_ts, error_heat = graphs['error_rate']
+        token_ts, token_hist = graphs['token_usage']
+        cost_ts, cost_pie = graphs['cost']
+        
+        # Save graphs on each update, in the background so the callback only builds figures.
+        # Only the default window is exported, so the saved files always cover the same span
+        if (window or DEFAULT_WINDOW) == DEFAULT_WINDOW:
+            visualizer.exporter.submit(graphs, snapshot)
         
         return (
             latency_ts, latency_box,
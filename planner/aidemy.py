@@ -1,10 +1,8 @@
 import os
 import random
 import requests
-import vertexai
 import json
 from typing import TypedDict, Literal
-from vertexai.preview import reasoning_engines
 from langchain_google_vertexai import ChatVertexAI
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -19,36 +17,48 @@ from curriculums import get_curriculum
 from search import search_latest_resource 
 from book import recommend_book 
 from onramp_workaround import get_next_region
-
-from google.cloud import pubsub_v1
+from hedging import get_hedger
 
 
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")  # Get project ID from env
 
 tools = [get_curriculum, search_latest_resource, recommend_book]
 
-def determine_tool(state: MessagesState):
-    llm = ChatVertexAI(model_name="gemini-2.0-flash-001", location=get_next_region())
-    sys_msg = SystemMessage(
-                    content=(
-                        f"""You are a helpful teaching assistant that helps gather all needed information. 
+DETERMINE_TOOL_PROMPT = f"""You are a helpful teaching assistant that helps gather all needed information. 
                             Your ultimate goal is to create a detailed 3-week teaching plan. 
                             You have access to tools that help you gather information.  
                             Based on the user request, decide which tool(s) are needed. 
 
                         """
-                    )
-                )
 
-    llm_with_tools = llm.bind_tools(tools)
-    return {"messages": llm_with_tools.invoke([sys_msg] + state["messages"])} 
+def _llm_with_tools(region: str):
+    llm = ChatVertexAI(model_name="gemini-2.0-flash-001", location=region)
+    return llm.bind_tools(tools)
+
+def determine_tool(state: MessagesState):
+    sys_msg = SystemMessage(content=DETERMINE_TOOL_PROMPT)
+
+    # Opt-in (LLM_HEDGING_ENABLED): a slow region is backed up by the next one
+    message = get_hedger("determine_tool").call(
+        lambda region: _llm_with_tools(region).invoke([sys_msg] + state["messages"]), get_next_region
+    )
+    return {"messages": message}
+
+async def adetermine_tool(state: MessagesState):
+    """Async version of determine_tool, used by aprep_class."""
+    sys_msg = SystemMessage(content=DETERMINE_TOOL_PROMPT)
+
+    async def attempt(region):
+        return await _llm_with_tools(region).ainvoke([sys_msg] + state["messages"])
+
+    return {"messages": await get_hedger("determine_tool").acall(attempt, get_next_region)}
 
 ###
 
-def prep_class(prep_needs):
+def build_graph(determine_tool_node=determine_tool):
    
     builder = StateGraph(MessagesState)
-    builder.add_node("determine_tool", determine_tool)
+    builder.add_node("determine_tool", determine_tool_node)
     builder.add_node("tools", ToolNode(tools))
     
     builder.add_edge(START, "determine_tool")
@@ -57,18 +67,32 @@ def prep_class(prep_needs):
 
     
     memory = MemorySaver()
-    graph = builder.compile(checkpointer=memory)
+    return builder.compile(checkpointer=memory)
 
-    config = {"configurable": {"thread_id": "1"}}
-    messages = graph.invoke({"messages": prep_needs},config)
+def _teaching_plan(messages):
     print(messages)
     for m in messages['messages']:
         m.pretty_print()
-    teaching_plan_result = messages["messages"][-1].content  
+    return messages["messages"][-1].content
+
+def prep_class(prep_needs):
+    graph = build_graph(determine_tool)
+
+    config = {"configurable": {"thread_id": "1"}}
+    messages = graph.invoke({"messages": prep_needs},config)
+    teaching_plan_result = _teaching_plan(messages)
 
 
     return teaching_plan_result
 
+async def aprep_class(prep_needs):
+    """Async version of prep_class, the LLM calls run on the event loop and the tools in threads."""
+    graph = build_graph(adetermine_tool)
+
+    config = {"configurable": {"thread_id": "1"}}
+    messages = await graph.ainvoke({"messages": prep_needs},config)
+    return _teaching_plan(messages)
+
 '''
 ### First test
 if __name__ == "__main__":
@@ -1,12 +1,68 @@
 import os
 import json
-from flask import Flask, render_template, request, jsonify, send_file, render_template_string
-from aidemy import prep_class  
-from google.cloud import pubsub_v1
+import time
+from flask import Flask, render_template, request, jsonify, send_file, render_template_string, g
+import threading
+from static_assets import init_static_assets
+from warmup import Warmup
+from metrics_writer import get_metrics_writer
 
+# aidemy (LangGraph, Vertex AI, Cloud SQL) and Pub/Sub are imported on first use
+# or by the warm-up thread, so the container binds its port without paying for them
 app = Flask(__name__)
+init_static_assets(app)
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher():
+    """Get the Pub/Sub publisher, created on first use and reused across requests."""
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                from google.cloud import pubsub_v1
+                _publisher = pubsub_v1.PublisherClient()
+    return _publisher
+
+
+warmup = Warmup()
+
+metrics = get_metrics_writer("planner")
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Request count and latency per route, buffered and written in the background by the metrics writer."""
+    if request.url_rule is not None and request.endpoint != 'static' and 'request_start' in g:
+        labels = {"route": request.url_rule.rule, "status": str(response.status_code)}
+        metrics.record("request_latency_ms", (time.perf_counter() - g.request_start) * 1000, labels)
+        metrics.increment("requests", labels=labels)
+    return response
+
+@warmup.step("import_aidemy")
+def warm_aidemy():
+    import aidemy
+
+@warmup.step("publisher_client")
+def warm_publisher():
+    get_publisher()
+
+@warmup.step("curriculum_db")
+def warm_curriculum_db():
+    from curriculums import get_db
+    get_db()
+
+@app.route('/health', methods=['GET'])
+def health():
+    report, status = warmup.health()
+    return jsonify(report), status
+
 ##ADD SEND PLAN EVENT FUNCTION HERE
 def send_plan_event(teaching_plan:str):
     """
@@ -15,7 +71,7 @@ def send_plan_event(teaching_plan:str):
     Args:
         teaching_plan: teaching plan
     """
-    publisher = pubsub_v1.PublisherClient()
+    publisher = get_publisher()
     print(f"-------------> Sending event to topic plan: {teaching_plan}")
     topic_path = publisher.topic_path(PROJECT_ID, "plan")
 
@@ -27,6 +83,17 @@ def send_plan_event(teaching_plan:str):
     return f"Published message ID: {future.result()}"
 
 
+def plan_request(selected_year: int, selected_subject: str, addon_request: str) -> str:
+    """Build the prep_class request for the planner form."""
+    return f"""For a year {selected_year} course on {selected_subject} covering {addon_request}, 
+            Incorporate the school curriculum, 
+            book recommendations, 
+            and relevant online resources aligned with the curriculum outcome. 
+            generate a highly detailed, day-by-day 3-week teaching plan, 
+            return the teaching plan in markdown format
+            """
+
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     subjects = ['English', 'Mathematics', 'Science', 'Computer Science']
@@ -38,15 +105,8 @@ def index():
         addon_request = request.form['addon']
 
         # Call prep_class to get teaching plan and assignment
-        teaching_plan = prep_class(
-            f"""For a year {selected_year} course on {selected_subject} covering {addon_request}, 
-            Incorporate the school curriculum, 
-            book recommendations, 
-            and relevant online resources aligned with the curriculum outcome. 
-            generate a highly detailed, day-by-day 3-week teaching plan, 
-            return the teaching plan in markdown format
-            """
-        )
+        from aidemy import prep_class
+        teaching_plan = prep_class(plan_request(selected_year, selected_subject, addon_request))
 
         ### ADD send_plan_event CALL
         send_plan_event(teaching_plan)
@@ -54,7 +114,6 @@ def index():
         return jsonify({'teaching_plan': teaching_plan})
     return render_template('index.html', years=years, subjects=subjects, teaching_plan=None, assignment=None)
 
-
-
 if __name__ == "__main__":
+    warmup.start()
     app.run(debug=True, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
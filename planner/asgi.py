@@ -0,0 +1,68 @@
+import os
+import asyncio
+import contextlib
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Mount
+
+from app import app as flask_app, metrics, warmup, plan_request, send_plan_event
+from asgi_middleware import llm_route
+from static_assets import GZIP_MIN_SIZE
+
+# Tunables for the production entry point
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))  # worker processes
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", 1000))  # in-flight requests per worker
+LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", 100))  # plans generated at once per worker
+WSGI_THREADS = int(os.environ.get("WSGI_THREADS", 8))  # threads serving the remaining Flask routes
+
+_llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)
+
+
+async def generate_plan(request):
+    """POST / of the planner form, the teaching plan is generated on the event loop."""
+    from aidemy import aprep_class
+
+    form = await request.form()
+    # A missing field is a 400, as request.form[...] makes it on the Flask route
+    try:
+        selected_year = int(form['year'])
+        selected_subject = form['subject']
+        addon_request = form['addon']
+    except (KeyError, ValueError):
+        return PlainTextResponse("Bad Request: year, subject and addon are required", status_code=400)
+
+    async with _llm_slots:
+        teaching_plan = await aprep_class(plan_request(selected_year, selected_subject, addon_request))
+
+    # The Pub/Sub publisher blocks on the future, keep it off the event loop
+    await asyncio.to_thread(send_plan_event, teaching_plan)
+
+    return JSONResponse({'teaching_plan': teaching_plan})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Warm-up starts in each worker as it begins serving, importing the app does not start it
+    warmup.start()
+    yield
+
+
+# The plan POST runs on the event loop, GET / and the static files are served by the Flask app
+application = Starlette(lifespan=lifespan, routes=[
+    llm_route('/', generate_plan, ['POST'], metrics, GZIP_MIN_SIZE),
+    Mount('/', app=WSGIMiddleware(flask_app, workers=WSGI_THREADS)),
+])
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "asgi:application",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8080)),
+        workers=WEB_CONCURRENCY,
+        limit_concurrency=MAX_CONCURRENCY,
+    )
@@ -0,0 +1,150 @@
+import time
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+class RequestMetricsMiddleware:
+    """
+    Request count and latency of an event-loop route, as record_request_metrics does for the Flask routes.
+
+    Args:
+        app: The ASGI app of the route
+        metrics: The service's MetricsWriter
+        route: Route label of the points, e.g. "/generate_quiz"
+    """
+
+    def __init__(self, app, metrics, route):
+        self.app = app
+        self.metrics = metrics
+        self.route = route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            labels = {"route": self.route, "status": str(status)}
+            self.metrics.record("request_latency_ms", (time.perf_counter() - start) * 1000, labels)
+            self.metrics.increment("requests", labels=labels)
+
+
+class RateLimitMiddleware:
+    """
+    The service's RateLimiter on an event-loop route, as the portal's limit_request_rate does for its Flask routes.
+
+    A client over its limit is answered with a 429, every counted response
+    gets the X-RateLimit-* headers.
+    """
+
+    def __init__(self, app, rate_limiter):
+        self.app = app
+        self.rate_limiter = rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client = self.rate_limiter.client_address(Headers(scope=scope).get("x-forwarded-for"),
+                                                  scope["client"][0] if scope.get("client") else None)
+        allowed, rate_limit_headers = self.rate_limiter.hit(client)
+        if not allowed:
+            response = JSONResponse({"error": "Rate limit exceeded"}, status_code=429, headers=rate_limit_headers)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message["headers"]))
+                headers.update(rate_limit_headers)
+                message = {**message, "headers": headers.raw}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class ETagMiddleware:
+    """
+    Weak ETag and 304 Not Modified for GET responses, as compress_and_tag does for the Flask routes.
+
+    Only complete 200 responses are tagged; the ETag is the hash of the
+    uncompressed body, so the middleware sits inside GZipMiddleware.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        start, body = None, []
+
+        async def buffer(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+            await self._send(scope, start, b"".join(body), send)
+
+        await self.app(scope, receive, buffer)
+
+    @staticmethod
+    async def _send(scope, start, body, send):
+        headers = MutableHeaders(raw=list(start["headers"]))
+        if start["status"] != 200 or "etag" in headers or "content-encoding" in headers:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+        headers["ETag"] = etag
+        if etag in Headers(scope=scope).get("if-none-match", ""):
+            headers = MutableHeaders(raw=[(name, value) for name, value in headers.raw
+                                          if name not in (b"content-length", b"content-type")])
+            await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({**start, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
+
+
+def llm_route(path, endpoint, methods, metrics, gzip_min_size, rate_limiter=None):
+    """
+    A Route of the event loop with the Flask routes' before and after_request behaviour.
+
+    Responses of gzip_min_size bytes or more are gzipped, GET responses get
+    a weak ETag and every request is counted in the service's metrics, and
+    in the rate_limiter when given. The middleware is per route, so the Flask
+    app mounted beside it, which compresses, counts and limits its own
+    responses, is left alone.
+    """
+    middleware = [Middleware(RequestMetricsMiddleware, metrics=metrics, route=path)]
+    if rate_limiter is not None:
+        middleware.append(Middleware(RateLimitMiddleware, rate_limiter=rate_limiter))
+    return Route(path, endpoint, methods=methods, middleware=middleware + [
+        Middleware(GZipMiddleware, minimum_size=gzip_min_size),
+        Middleware(ETagMiddleware),
+    ])
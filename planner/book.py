@@ -2,6 +2,7 @@ import os
 import requests
 from langchain_google_vertexai import VertexAI
 from onramp_workaround import get_next_region
+from llm_cache import get_llm_cache
 
 
 BOOK_PROVIDER_URL =  os.environ.get("BOOK_PROVIDER_URL")
@@ -15,9 +16,9 @@ def recommend_book(query: str):
     """
 
     region = get_next_region();
-    llm = VertexAI(model_name="gemini-1.5-pro", location=region)
+    llm = VertexAI(model_name="gemini-1.5-pro", location=region, cache=get_llm_cache())
 
-    query = f"""The user is trying to plan a education course, you are the teaching assistant. Help define the category of what the user requested to teach, respond the categroy with no more than two word.
+    query = f"""The user is trying to plan a education course, you are the teaching assistant. Help define the category of what the user requested to teach, respond the categroy with no more than two word. If the user requested several distinct topics, respond one category per topic separated by commas.
 
     user request:   {query}
     """
@@ -26,10 +27,14 @@ def recommend_book(query: str):
     print(f"CATEGORY RESPONSE------------>: {response}")
     
     # call this using python and parse the json back to dict
-    category = response.strip()
+    categories = [category.strip() for category in response.split(",") if category.strip()]
     
     headers = {"Content-Type": "application/json"}
-    data = {"category": category, "number_of_book": 2}
+    if len(categories) > 1:
+        # One round-trip for all topics, the book provider handles them concurrently
+        data = {"requests": [{"category": category, "number_of_book": 2} for category in categories]}
+    else:
+        data = {"category": response.strip(), "number_of_book": 2}
 
     books = requests.post(BOOK_PROVIDER_URL, headers=headers, json=data)
    
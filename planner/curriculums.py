@@ -1,8 +1,6 @@
 import os
 import base64
-import sqlalchemy
-from google.cloud.sql.connector import Connector, IPTypes
-import pg8000
+import threading
 
 
 project_id = os.environ.get("GOOGLE_CLOUD_PROJECT")
@@ -11,7 +9,9 @@ instance_name = os.environ.get("INSTANCE_NAME")
 instance_connection_name = f"{project_id}:{location}:{instance_name}"
 print(f"--------------------------->Instance connection name: {instance_connection_name}")
 
-def connect_with_connector() -> sqlalchemy.engine.base.Engine:
+def connect_with_connector() -> "sqlalchemy.engine.base.Engine":
+    import sqlalchemy
+    from google.cloud.sql.connector import Connector
 
     db_user = os.environ["DB_USER"]
     db_pass = os.environ["DB_PASS"]
@@ -39,6 +39,18 @@ def connect_with_connector() -> sqlalchemy.engine.base.Engine:
     )
     return pool
 
+_db = None
+_db_lock = threading.Lock()
+
+def get_db():
+    """Get the Cloud SQL engine, connected on first use instead of at import time."""
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = connect_with_connector()
+    return _db
+
 def get_curriculum(year: int, subject: str):
     """
     Get school curriculum
@@ -48,11 +60,12 @@ def get_curriculum(year: int, subject: str):
         year: User's request year int
     """
     try:
+        import sqlalchemy
         stmt = sqlalchemy.text(
             "SELECT description FROM curriculums WHERE year = :year AND subject = :subject"
         )
 
-        with db.connect() as conn:
+        with get_db().connect() as conn:
             result = conn.execute(stmt, parameters={"year": year, "subject": subject})
             row = result.fetchone()
         if row:
@@ -64,4 +77,3 @@ def get_curriculum(year: int, subject: str):
         print(e)
         return None
 
-db = connect_with_connector()
@@ -0,0 +1,149 @@
+import os
+import gzip
+import json
+import logging
+import shutil
+import hashlib
+import mimetypes
+from flask import request, send_from_directory
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+COMPRESSIBLE_SUFFIXES = (".css", ".js", ".svg", ".html", ".json", ".txt", ".md")
+# Dynamic responses smaller than this are not worth a gzip pass
+GZIP_MIN_SIZE = int(os.environ.get("GZIP_MIN_SIZE", 1024))
+GZIP_MIMETYPES = ("application/json", "text/html", "text/markdown", "text/plain")
+
+logger = logging.getLogger(__name__)
+
+
+def _brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def build_assets(static_dir: str) -> dict:
+    """
+    Fingerprint and precompress every file in static_dir into static_dir/dist.
+
+    Args:
+        static_dir: The Flask static folder
+
+    Returns:
+        dict: The manifest mapping original file names to fingerprinted ones
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    os.makedirs(dist_dir)
+    brotli = _brotli()
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_dir]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                content = f.read()
+
+            stem, ext = os.path.splitext(relative)
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            fingerprinted = f"{stem}.{digest}{ext}"
+            target = os.path.join(dist_dir, fingerprinted)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(content)
+
+            if ext in COMPRESSIBLE_SUFFIXES:
+                with open(target + ".gz", "wb") as f:
+                    f.write(gzip.compress(content, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(target + ".br", "wb") as f:
+                        f.write(brotli.compress(content, quality=11))
+
+            manifest[relative] = f"{DIST_DIR}/{fingerprinted}"
+            logger.debug("%s -> %s", relative, manifest[relative])
+
+    with open(os.path.join(dist_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_dir: str) -> dict:
+    """Load the manifest written by build_assets, empty when the build step has not run."""
+    path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _accepts(encoding: str) -> bool:
+    # Parsed codings with their q-values: "br;q=0" refuses br, "x-gzip" is not gzip, "*" accepts any
+    return request.accept_encodings.quality(encoding) > 0
+
+
+def init_static_assets(app):
+    """
+    Serve fingerprinted, precompressed static files and compress/ETag dynamic responses.
+
+    Args:
+        app: The Flask application
+    """
+    static_dir = app.static_folder
+    manifest = load_manifest(static_dir)
+    fingerprinted = set(manifest.values())
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        # url_for('static', filename='style.css') in the templates picks up the fingerprinted file
+        if endpoint == "static" and values.get("filename") in manifest:
+            values["filename"] = manifest[values["filename"]]
+
+    def serve_static(filename):
+        if filename not in fingerprinted:
+            return app.send_static_file(filename)
+
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if _accepts(encoding) and os.path.exists(os.path.join(static_dir, filename + suffix)):
+                response = send_from_directory(
+                    static_dir, filename + suffix, mimetype=mimetypes.guess_type(filename)[0]
+                )
+                response.headers["Content-Encoding"] = encoding
+                break
+        else:
+            response = send_from_directory(static_dir, filename)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add("Accept-Encoding")
+        return response
+
+    app.view_functions["static"] = serve_static
+
+    @app.after_request
+    def compress_and_tag(response):
+        if request.endpoint == "static" or response.direct_passthrough or response.is_streamed:
+            return response
+        if response.status_code != 200 or "Content-Encoding" in response.headers:
+            return response
+
+        if request.method in ("GET", "HEAD"):
+            response.add_etag(weak=True)
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        if response.mimetype in GZIP_MIMETYPES and _accepts("gzip"):
+            data = response.get_data()
+            if len(data) >= GZIP_MIN_SIZE:
+                response.set_data(gzip.compress(data, compresslevel=6))
+                response.headers["Content-Encoding"] = "gzip"
+                response.vary.add("Accept-Encoding")
+        return response
+
+
+if __name__ == "__main__":
+    build_assets(os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
@@ -1,6 +1,7 @@
 import json
 import os
 import time
+import asyncio
 from langchain_google_vertexai import VertexAI
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -8,3 +9,7 @@ from langchain_core.messages import HumanMessage, SystemMessage
 
 def answer_thinking(question, options, user_response, answer, region):
     return ""
+
+async def aanswer_thinking(question, options, user_response, answer, region):
+    """Async version of answer_thinking for the ASGI app."""
+    return await asyncio.to_thread(answer_thinking, question, options, user_response, answer, region)
@@ -2,15 +2,16 @@ import os
 import json
 import time
 import base64
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, g
 
-from langchain_google_vertexai import ChatVertexAI
-from quiz import generate_quiz_question
-from answer import answer_thinking
+# The LLM and Cloud Storage modules are imported on first use (or by the warm-up
+# thread) so the container binds its port without paying for them
 from onramp_workaround import get_next_region,get_next_thinking_region
-from google.cloud import storage  
-
-from render import render_assignment_page
+from clients import get_storage_client
+from static_assets import init_static_assets
+from warmup import Warmup
+from metrics_writer import get_metrics_writer
+from rate_limit import RateLimiter
 
 # ENV SETUP
 project_id = os.environ.get("GOOGLE_CLOUD_PROJECT")  # Get project ID from env
@@ -18,6 +19,52 @@ COURSE_BUCKET_NAME = os.environ.get("COURSE_BUCKET_NAME", "aidemy-course")
 
 
 app = Flask(__name__)
+init_static_assets(app)
+warmup = Warmup()
+
+metrics = get_metrics_writer("portal")
+rate_limiter = RateLimiter()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Request count and latency per route, buffered and written in the background by the metrics writer."""
+    if request.url_rule is not None and request.endpoint != 'static' and 'request_start' in g:
+        labels = {"route": request.url_rule.rule, "status": str(response.status_code)}
+        metrics.record("request_latency_ms", (time.perf_counter() - g.request_start) * 1000, labels)
+        metrics.increment("requests", labels=labels)
+    return response
+
+@app.before_request
+def limit_request_rate():
+    """Answer a client over its rate limit with a 429, static files and health checks are not counted."""
+    if request.endpoint in ('static', 'health'):
+        return None
+    allowed, g.rate_limit_headers = rate_limiter.hit(
+        rate_limiter.client_address(request.headers.get('X-Forwarded-For'), request.remote_addr))
+    if not allowed:
+        return jsonify({"error": "Rate limit exceeded"}), 429
+
+@app.after_request
+def add_rate_limit_headers(response):
+    response.headers.update(g.get('rate_limit_headers', {}))
+    return response
+
+@warmup.step("import_llm_modules")
+def warm_llm_modules():
+    import quiz, answer, render
+
+@warmup.step("storage_client")
+def warm_storage_client():
+    get_storage_client()
+
+@app.route('/health', methods=['GET'])
+def health():
+    report, status = warmup.health()
+    return jsonify(report), status
 
 @app.route('/',methods=['GET'])
 def index():
@@ -30,7 +77,8 @@ def courses():
     return render_template('courses.html')
 @app.route('/assignment',methods=['GET'])
 def assignment():
-    return render_template('assignment.html')
+    from render import render_assignment_page
+    return render_template('assignment.html', assignment_html=render_assignment_page())
 
 
 
@@ -42,6 +90,7 @@ def generate_quiz():
     """Generates a quiz with a specified number of questions."""
     #num_questions = 5  # Default number of questions
     # Can I turn this into Langgraph
+    from quiz import generate_quiz_question
     quiz = []
     quiz.append(generate_quiz_question("teaching_plan.txt", "easy", get_next_region()))
     quiz.append(generate_quiz_question("teaching_plan.txt", "medium", get_next_region()))
@@ -53,6 +102,7 @@ def generate_quiz():
 
 @app.route('/check_answers', methods=['POST'])
 def check_answers():
+    from answer import answer_thinking
     try:
         submitted_data = request.json  # Get the complete submitted data
         quiz = submitted_data.get('quiz')  # Extract the quiz data
@@ -105,7 +155,7 @@ def download_course_audio(week):
     filename = f"course-week-{week}.wav"
     local_path = "/tmp" 
     try:
-        storage_client = storage.Client()
+        storage_client = get_storage_client()
         bucket = storage_client.bucket(COURSE_BUCKET_NAME)
         blob = bucket.blob(filename)
 
@@ -122,8 +172,16 @@ def download_course_audio(week):
 
 
 ## Add your code here
-        
+
+@app.route('/render_assignment', methods=['POST'])
+def render_assignment():
+    """Re-render the assignment page when a new assignment lands in the bucket (Eventarc)."""
+    from render import render_assignment_page
+    render_assignment_page(force_revalidate=True)
+    return jsonify({'message': 'Assignment rendered successfully'})
+
 ## Add your code here
 
 if __name__ == "__main__":
+    warmup.start()
     app.run(debug=True, host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
@@ -0,0 +1,106 @@
+import os
+import asyncio
+import contextlib
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount
+
+from app import app as flask_app, metrics, rate_limiter, warmup
+from asgi_middleware import llm_route
+from onramp_workaround import get_next_region, get_next_thinking_region
+from static_assets import GZIP_MIN_SIZE
+
+# Tunables for the production entry point
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))  # worker processes
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", 1000))  # in-flight requests per worker
+LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", 100))  # in-flight LLM calls per worker
+WSGI_THREADS = int(os.environ.get("WSGI_THREADS", 8))  # threads serving the remaining Flask routes
+
+_llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)
+
+
+async def generate_quiz(request):
+    """Generates the easy, medium and hard questions concurrently."""
+    from quiz import agenerate_quiz_question
+
+    async def question(difficulty):
+        async with _llm_slots:
+            return await agenerate_quiz_question("teaching_plan.txt", difficulty, get_next_region())
+
+    quiz = await asyncio.gather(*(question(difficulty) for difficulty in ("easy", "medium", "hard")))
+    return JSONResponse(list(quiz))
+
+
+async def check_answers(request):
+    from answer import aanswer_thinking
+    try:
+        submitted_data = await request.json()  # Get the complete submitted data
+        quiz = submitted_data.get('quiz')  # Extract the quiz data
+        user_answers = submitted_data.get('answers') # Extract answers
+        print(f"submitted_data: {submitted_data}")
+
+        if quiz is None or user_answers is None:
+            return JSONResponse({"error": "Missing quiz or answer data"}, status_code=400)
+
+        results = []
+        for i in range(len(user_answers)):
+            question_data = quiz[i]
+            question = question_data['question']
+            options = question_data['options']
+            correct_answer = question_data['answer']
+            user_answer = user_answers[i]
+
+            is_correct = (user_answer == correct_answer)
+
+            reasoning=None
+            if(not is_correct):
+                # Same back-off as the Flask route, but it only parks this request, not a worker
+                await asyncio.sleep(60)
+                region = get_next_thinking_region()
+                async with _llm_slots:
+                    reasoning = await aanswer_thinking(question, options, user_answer, correct_answer, region)
+            else:
+                reasoning = "You are correct!"
+
+            results.append({
+                "question": question,
+                "user_answer": user_answer,
+                "correct_answer": correct_answer,
+                "is_correct": is_correct,
+                "reasoning": reasoning
+            })
+
+        return JSONResponse(results)
+
+    except Exception as e:
+        print(f"Error checking answers: {e}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Warm-up starts in each worker as it begins serving, importing the app does not start it
+    warmup.start()
+    yield
+
+
+# The LLM-bound routes run on the event loop, everything else is served by the Flask app
+application = Starlette(lifespan=lifespan, routes=[
+    llm_route('/generate_quiz', generate_quiz, ['GET'], metrics, GZIP_MIN_SIZE, rate_limiter),
+    llm_route('/check_answers', check_answers, ['POST'], metrics, GZIP_MIN_SIZE, rate_limiter),
+    Mount('/', app=WSGIMiddleware(flask_app, workers=WSGI_THREADS)),
+])
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "asgi:application",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8080)),
+        workers=WEB_CONCURRENCY,
+        limit_concurrency=MAX_CONCURRENCY,
+    )
@@ -0,0 +1,15 @@
+import threading
+
+_storage_client = None
+_lock = threading.Lock()
+
+
+def get_storage_client():
+    """Get the Cloud Storage client, created (and google.cloud.storage imported) on first use."""
+    global _storage_client
+    if _storage_client is None:
+        with _lock:
+            if _storage_client is None:
+                from google.cloud import storage
+                _storage_client = storage.Client()
+    return _storage_client
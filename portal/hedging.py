@@ -0,0 +1,235 @@
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Hedging is opt-in, it trades a few extra LLM calls for a shorter latency tail
+HEDGING_ENABLED = os.environ.get("LLM_HEDGING_ENABLED", "false").lower() in ("1", "true", "yes")
+# A backup request is sent once the primary is slower than this percentile of recent calls
+HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", 95))
+# At most this fraction of calls may send a backup request
+HEDGE_BUDGET = float(os.environ.get("LLM_HEDGE_BUDGET", 0.1))
+HEDGE_MIN_DELAY = float(os.environ.get("LLM_HEDGE_MIN_DELAY", 0.2))
+# Delay used until HEDGE_MIN_SAMPLES latencies have been observed
+HEDGE_DEFAULT_DELAY = float(os.environ.get("LLM_HEDGE_DEFAULT_DELAY", 5.0))
+HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", 20))
+HEDGE_WINDOW = int(os.environ.get("LLM_HEDGE_WINDOW", 500))
+
+# LLM cache outcome of the attempt running in this context, see record_cache_lookup
+_attempt_lookups = contextvars.ContextVar("hedge_attempt_lookups", default=None)
+
+
+def record_cache_lookup(hit: bool):
+    """
+    Tell the hedged attempt running in this context whether its LLM cache lookup was a hit.
+
+    An attempt answered from the cache alone never reached the model, its
+    latency is kept out of the history the hedge delay is taken from.
+    Outside a hedged attempt this does nothing. Register it with
+    llm_cache.add_lookup_listener.
+    """
+    lookups = _attempt_lookups.get()
+    if lookups is not None:
+        lookups["hits" if hit else "misses"] += 1
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of a list of numbers, None when empty."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+
+class Hedger:
+    """
+    Hedged LLM calls across regions.
+
+    The call goes to a primary region. If it has not answered after the
+    HEDGE_PERCENTILE latency of recent calls, the same call is sent to the
+    next region and the first success is used; the loser is cancelled (async)
+    or abandoned (sync). A token bucket refilled by HEDGE_BUDGET per call caps
+    the share of calls that hedge. Only attempts that reached the model
+    count towards the latency history, cache hits are counted apart.
+
+    Args:
+        name: Name reported in the stats, e.g. "quiz"
+        enabled: Hedge at all, otherwise calls go straight to the primary region
+    """
+
+    def __init__(self, name, enabled=HEDGING_ENABLED, percentile=HEDGE_PERCENTILE, budget=HEDGE_BUDGET,
+                 min_delay=HEDGE_MIN_DELAY, default_delay=HEDGE_DEFAULT_DELAY,
+                 min_samples=HEDGE_MIN_SAMPLES, window=HEDGE_WINDOW):
+        self.name = name
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._attempts = deque(maxlen=window)  # seconds taken by successful attempts that reached the model
+        self._served = deque(maxlen=window)  # seconds callers waited
+        self._tokens = 1.0
+        self._counts = {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0, "errors": 0, "cache_hits": 0}
+
+    def delay(self) -> float:
+        """Seconds to wait for the primary before hedging."""
+        with self._lock:
+            if len(self._attempts) < self.min_samples:
+                return self.default_delay
+            return max(self.min_delay, percentile(self._attempts, self.percentile))
+
+    def _start_call(self):
+        with self._lock:
+            self._counts["calls"] += 1
+            self._tokens = min(max(1.0, self.budget * 10), self._tokens + self.budget)
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._counts["hedged"] += 1
+                return True
+            self._counts["budget_denied"] += 1
+            return False
+
+    def _finish_call(self, start, hedge_won=False, failed=False):
+        with self._lock:
+            if failed:
+                self._counts["errors"] += 1
+                return
+            self._served.append(time.perf_counter() - start)
+            if hedge_won:
+                self._counts["hedge_wins"] += 1
+
+    def _record_attempt(self, start, lookups):
+        with self._lock:
+            if lookups["hits"] and not lookups["misses"]:
+                self._counts["cache_hits"] += 1
+                return
+            self._attempts.append(time.perf_counter() - start)
+
+    def _attempt(self, fn, region):
+        start = time.perf_counter()
+        lookups = {"hits": 0, "misses": 0}
+        token = _attempt_lookups.set(lookups)
+        try:
+            result = fn(region)
+        finally:
+            _attempt_lookups.reset(token)
+        self._record_attempt(start, lookups)
+        return result
+
+    def call(self, fn, next_region, region=None):
+        """
+        Call fn(region), hedging to next_region() when the primary is slow.
+
+        Args:
+            fn: The LLM call, takes the region to use
+            next_region: Returns the region of the next call (the onramp rotation)
+            region: Primary region, next_region() when not given
+        """
+        region = region or next_region()
+        if not self.enabled:
+            return fn(region)
+
+        start = time.perf_counter()
+        self._start_call()
+        pool = ThreadPoolExecutor(max_workers=2)
+        try:
+            # Attempts run in a copy of the caller's context, so e.g. bypass_llm_cache still applies
+            primary = pool.submit(contextvars.copy_context().run, self._attempt, fn, region)
+            pending = {primary}
+            done, _ = wait(pending, timeout=self.delay())
+            if not done and self._take_token():
+                print(f"-------------> Hedging {self.name} from {region}")
+                pending.add(pool.submit(contextvars.copy_context().run, self._attempt, fn, next_region()))
+
+            error = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        for loser in pending:
+                            loser.cancel()
+                        self._finish_call(start, hedge_won=future is not primary)
+                        return future.result()
+                    error = future.exception()
+            self._finish_call(start, failed=True)
+            raise error
+        finally:
+            # A sync call cannot be interrupted, the losing attempt finishes on its own
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def acall(self, afn, next_region, region=None):
+        """Async version of call, afn(region) is a coroutine function and the losing attempt is cancelled."""
+        region = region or next_region()
+        if not self.enabled:
+            return await afn(region)
+
+        async def attempt(attempt_region):
+            attempt_start = time.perf_counter()
+            lookups = {"hits": 0, "misses": 0}
+            # Each attempt is its own task, with its own copy of the context
+            _attempt_lookups.set(lookups)
+            result = await afn(attempt_region)
+            self._record_attempt(attempt_start, lookups)
+            return result
+
+        start = time.perf_counter()
+        self._start_call()
+        primary = asyncio.ensure_future(attempt(region))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.delay())
+            if not done and self._take_token():
+                print(f"-------------> Hedging {self.name} from {region}")
+                pending.add(asyncio.ensure_future(attempt(next_region())))
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._finish_call(start, hedge_won=task is not primary)
+                        return task.result()
+                    error = task.exception()
+            self._finish_call(start, failed=True)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        """Hedge rate, wins, budget denials, cache hits and the latency percentiles callers saw."""
+        with self._lock:
+            counts = dict(self._counts)
+            served = list(self._served)
+        counts["hedge_rate"] = counts["hedged"] / counts["calls"] if counts["calls"] else 0.0
+        for p in (50, 95, 99):
+            counts[f"p{p}_seconds"] = percentile(served, p)
+        counts["delay_seconds"] = self.delay()
+        return counts
+
+
+_hedgers = {}
+_hedgers_lock = threading.Lock()
+
+
+def get_hedger(name: str) -> Hedger:
+    """Get the Hedger of a call site, created on first use so each keeps its own latency history."""
+    with _hedgers_lock:
+        if name not in _hedgers:
+            _hedgers[name] = Hedger(name)
+        return _hedgers[name]
+
+
+def hedging_stats() -> dict:
+    """Stats of every Hedger, keyed by name."""
+    with _hedgers_lock:
+        hedgers = list(_hedgers.values())
+    return {hedger.name: hedger.stats() for hedger in hedgers}
@@ -4,6 +4,12 @@ from langchain_google_vertexai import VertexAI
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate
 from pydantic import BaseModel, Field
+from llm_cache import add_lookup_listener, get_llm_cache
+from hedging import get_hedger, record_cache_lookup
+from onramp_workaround import get_next_region
+
+# Quiz questions served from the LLM cache stay out of the hedge delay's latency history
+add_lookup_listener(record_cache_lookup)
 
 class QuizQuestion(BaseModel):
     question: str = Field(description="The question itself")
@@ -14,21 +20,12 @@ class QuizQuestion(BaseModel):
 # ENV SETUP
 project_id = os.environ.get("GOOGLE_CLOUD_PROJECT")  # Get project ID from env
 
-def generate_quiz_question(file_name: str, difficulty: str, region:str ):
-    """Generates a single multiple-choice quiz question using the LLM.
-   
-    ```json
-    {
-      "question": "The question itself",
-      "options": ["Option A", "Option B", "Option C", "Option D"],
-      "answer": "The correct answer letter (A, B, C, or D)"
-    }
-    ```
-    """
+def _quiz_chain(file_name: str, difficulty: str, region: str):
+    """Build the quiz prompt | llm | parser chain and its instruction for one difficulty."""
 
     print(f"region: {region}")
     # Connect to resourse needed from Google Cloud
-    llm = VertexAI(model_name="gemini-1.5-pro", location=region)
+    llm = VertexAI(model_name="gemini-1.5-pro", location=region, cache=get_llm_cache())
 
 
     plan=None
@@ -47,11 +44,40 @@ def generate_quiz_question(file_name: str, difficulty: str, region:str ):
         partial_variables={"format_instructions": parser.get_format_instructions()},
     )
     
-    chain = prompt | llm | parser
-    response = chain.invoke({"instruction": instruction})
+    return prompt | llm | parser, instruction
+
+def generate_quiz_question(file_name: str, difficulty: str, region:str ):
+    """Generates a single multiple-choice quiz question using the LLM.
+   
+    ```json
+    {
+      "question": "The question itself",
+      "options": ["Option A", "Option B", "Option C", "Option D"],
+      "answer": "The correct answer letter (A, B, C, or D)",
+      "difficulty": "The difficulty asked for"
+    }
+    ```
+    """
+    def attempt(attempt_region):
+        chain, instruction = _quiz_chain(file_name, difficulty, attempt_region)
+        return chain.invoke({"instruction": instruction})
+
+    # Opt-in (LLM_HEDGING_ENABLED): a slow region is backed up by the next one
+    response = get_hedger("quiz").call(attempt, get_next_region, region=region)
+
+    print(f"{response}")
+    return  {**response, "difficulty": difficulty}
+
+async def agenerate_quiz_question(file_name: str, difficulty: str, region: str):
+    """Async version of generate_quiz_question, the LLM call does not block the event loop."""
+    async def attempt(attempt_region):
+        chain, instruction = _quiz_chain(file_name, difficulty, attempt_region)
+        return await chain.ainvoke({"instruction": instruction})
+
+    response = await get_hedger("quiz").acall(attempt, get_next_region, region=region)
 
     print(f"{response}")
-    return  response
+    return  {**response, "difficulty": difficulty}
 
 
 
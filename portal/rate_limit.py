@@ -0,0 +1,67 @@
+import os
+import time
+import threading
+
+# Opt-in, the limit of docs/api.md: RATE_LIMIT requests per client IP every RATE_LIMIT_WINDOW_SECONDS
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "false").lower() in ("1", "true", "yes")
+RATE_LIMIT = int(os.environ.get("RATE_LIMIT", 100))
+RATE_LIMIT_WINDOW_SECONDS = int(os.environ.get("RATE_LIMIT_WINDOW_SECONDS", 60))
+
+
+class RateLimiter:
+    """
+    Fixed-window request counter per client, in memory of one instance.
+
+    Windows are aligned to the clock, so the counts of every client start over
+    together and the previous window's counts are dropped at once. hit()
+    counts a request and returns whether it is allowed, with the
+    X-RateLimit-* headers of the response.
+
+    Args:
+        limit: Requests a client may make per window
+        window: Window length in seconds
+        enabled: Count at all, otherwise every request is allowed without headers
+    """
+
+    def __init__(self, limit=RATE_LIMIT, window=RATE_LIMIT_WINDOW_SECONDS, enabled=RATE_LIMIT_ENABLED):
+        self.limit = limit
+        self.window = window
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._window_start = 0
+        self._counts = {}
+
+    @staticmethod
+    def client_address(forwarded_for, remote_addr):
+        """
+        The client IP a request is counted against.
+
+        Cloud Run appends the address it received the request from to
+        X-Forwarded-For, so the last entry is the one a client cannot forge.
+        """
+        if forwarded_for:
+            return forwarded_for.split(",")[-1].strip()
+        return remote_addr
+
+    def hit(self, client, now=None):
+        """Count a request of client, returns (allowed, headers)."""
+        if not self.enabled:
+            return True, {}
+        now = time.time() if now is None else now
+        window_start = int(now // self.window) * self.window
+        with self._lock:
+            if window_start != self._window_start:
+                self._window_start = window_start
+                self._counts = {}
+            count = self._counts[client] = self._counts.get(client, 0) + 1
+
+        reset = window_start + self.window
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(self.limit - count, 0)),
+            "X-RateLimit-Reset": str(reset),
+        }
+        if count > self.limit:
+            headers["Retry-After"] = str(max(int(reset - now), 1))
+            return False, headers
+        return True, headers
@@ -1,12 +1,234 @@
 import os
-import json
-import random
-from google.cloud import storage
+import html
+import time
+import hashlib
+import threading
+from html.parser import HTMLParser
 
-from langchain_google_vertexai import VertexAI
-from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
-from langchain_core.messages import HumanMessage, SystemMessage
-from onramp_workaround import get_next_region
+ASSIGNMENT_BUCKET = os.environ.get("ASSIGNMENT_BUCKET", "")
+ASSIGNMENT_PREFIX = os.environ.get("ASSIGNMENT_PREFIX", "assignment")
+RENDER_CACHE_DIR = os.environ.get("RENDER_CACHE_DIR", "/tmp/assignment_render")
+# How long a rendered page is served before GCS is asked whether a newer assignment exists
+REVALIDATE_SECONDS = float(os.environ.get("ASSIGNMENT_REVALIDATE_SECONDS", 30))
 
-def render_assignment_page():
-    return ""
+NO_ASSIGNMENT_HTML = "<p>No assignment has been published yet.</p>"
+
+# The only markup kept in a rendered assignment, it is shown unescaped in the portal
+ALLOWED_TAGS = {
+    "h1", "h2", "h3", "h4", "h5", "h6", "p", "br", "hr", "div", "span", "blockquote", "pre", "code",
+    "strong", "b", "em", "i", "u", "s", "sub", "sup", "ul", "ol", "li", "dl", "dt", "dd",
+    "table", "caption", "thead", "tbody", "tfoot", "tr", "th", "td", "a",
+}
+VOID_TAGS = {"br", "hr"}
+ALLOWED_ATTRIBUTES = {"a": {"href", "title"}, "th": {"colspan", "rowspan", "scope"}, "td": {"colspan", "rowspan"},
+                      "ol": {"start"}}
+ALLOWED_URL_SCHEMES = ("http:", "https:", "mailto:", "#")
+# Elements dropped with everything inside them, not only their tags
+DROPPED_CONTENT_TAGS = {"script", "style", "iframe", "object", "embed", "template", "noscript", "svg", "math",
+                        "head", "title", "textarea", "select"}
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_CONTENT_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+        kept = []
+        for name, value in attrs:
+            if name not in ALLOWED_ATTRIBUTES.get(tag, ()) or value is None:
+                continue
+            if name == "href" and not value.strip().lower().startswith(ALLOWED_URL_SCHEMES):
+                continue
+            kept.append(f' {name}="{html.escape(value, quote=True)}"')
+        if tag == "a":
+            kept.append(' rel="noopener noreferrer nofollow"')
+        self.out.append(f"<{tag}{''.join(kept)}>")
+        if tag not in VOID_TAGS:
+            self.open.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in DROPPED_CONTENT_TAGS:
+            self.dropping -= 1
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_CONTENT_TAGS:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping or tag not in self.open:
+            return
+        # Close whatever the fragment left open inside this element
+        while self.open:
+            open_tag = self.open.pop()
+            self.out.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.out.append(html.escape(data, quote=False))
+
+
+def sanitize_html(fragment: str) -> str:
+    """
+    Reduce an HTML fragment to ALLOWED_TAGS and ALLOWED_ATTRIBUTES, escaping all text.
+
+    Scripts, styles and embedded content are dropped with their content,
+    comments and event handler or style attributes are removed, links keep
+    only http(s), mailto and in-page targets, and unclosed tags are closed.
+    """
+    sanitizer = _Sanitizer()
+    sanitizer.feed(fragment or "")
+    sanitizer.close()
+    return "".join(sanitizer.out + [f"</{tag}>" for tag in reversed(sanitizer.open)])
+
+
+def format_assignment_html(assignment: str) -> str:
+    """
+    Format an assignment written in markdown as an HTML fragment using the LLM.
+
+    Args:
+        assignment: The assignment markdown
+    """
+    from langchain_google_vertexai import VertexAI
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from onramp_workaround import get_next_region
+
+    llm = VertexAI(model_name="gemini-2.0-flash-001", location=get_next_region())
+    prompt_template = ChatPromptTemplate.from_messages(
+        [
+            SystemMessage(
+                content=(
+                    """
+                    As a frontend developer, format the student assignment below as an HTML fragment.
+                    Use headings, lists and tables where they help, and keep the full assignment content.
+                    Do not include <html>, <head>, <body>, <nav>, scripts or inline styles.
+                    Respond with only HTML.
+                    """
+                )
+            ),
+            HumanMessage(content=assignment),
+        ]
+    )
+    response = llm.invoke(prompt_template.format())
+    return response.replace("```html", "").replace("```", "").strip()
+
+
+class AssignmentRenderCache:
+    """
+    Renders the latest assignment once per blob generation.
+
+    The rendered HTML is kept in memory and on disk, keyed on the blob name and
+    generation. Within revalidate_seconds the cached page is served without any
+    GCS call; after that a metadata-only listing decides whether to re-render.
+    The formatter's HTML comes from an LLM given the bucket's content, it is
+    sanitized before it is cached or served.
+    """
+
+    def __init__(self, bucket, prefix=ASSIGNMENT_PREFIX, cache_dir=RENDER_CACHE_DIR,
+                 revalidate_seconds=REVALIDATE_SECONDS, formatter=format_assignment_html):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.cache_dir = cache_dir
+        self.revalidate_seconds = revalidate_seconds
+        self.formatter = formatter
+        self._lock = threading.Lock()
+        self._key = None
+        self._html = None
+        self._checked_at = 0.0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _latest_blob(self):
+        # Only name/generation/updated are requested, the content is not downloaded
+        blobs = self.bucket.list_blobs(prefix=self.prefix, fields="items(name,generation,updated),nextPageToken")
+        return max(blobs, key=lambda blob: blob.updated, default=None)
+
+    def _disk_path(self, key):
+        name, generation = key
+        digest = hashlib.sha256(name.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{digest}-{generation}.html")
+
+    def _load(self, key):
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return f.read()
+
+    def _store(self, key, html):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+
+    def render(self, force_revalidate=False):
+        """
+        Get the HTML of the latest assignment.
+
+        Args:
+            force_revalidate: Check GCS for a newer assignment even inside the revalidation window
+        """
+        if not force_revalidate and self._html is not None and time.time() - self._checked_at < self.revalidate_seconds:
+            return self._html
+
+        with self._lock:
+            blob = self._latest_blob()
+            self._checked_at = time.time()
+            if blob is None:
+                self._key, self._html = None, NO_ASSIGNMENT_HTML
+                return self._html
+
+            key = (blob.name, blob.generation)
+            if key == self._key:
+                return self._html
+
+            page = self._load(key)
+            if page is None:
+                print(f"-------------> Rendering assignment {blob.name} generation {blob.generation}")
+                page = sanitize_html(self.formatter(blob.download_as_text()))
+                self._store(key, page)
+            else:
+                # Files rendered by an earlier version, or written by anyone else, are not trusted either
+                page = sanitize_html(page)
+            self._key, self._html = key, page
+            return page
+
+
+_render_cache = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> AssignmentRenderCache:
+    """Get the render cache for ASSIGNMENT_BUCKET, created on first use."""
+    global _render_cache
+    if _render_cache is None:
+        with _render_cache_lock:
+            if _render_cache is None:
+                from clients import get_storage_client
+                bucket = get_storage_client().bucket(ASSIGNMENT_BUCKET)
+                _render_cache = AssignmentRenderCache(bucket)
+    return _render_cache
+
+
+def render_assignment_page(force_revalidate=False):
+    """
+    Render the latest assignment as an HTML fragment.
+
+    Args:
+        force_revalidate: Check GCS for a newer assignment straight away, e.g. when a new one was uploaded
+    """
+    try:
+        return get_render_cache().render(force_revalidate=force_revalidate)
+    except Exception as e:
+        print(f"Error rendering assignment: {e}")
+        return f"<p>Unable to load the assignment at this time. Due to the following reason: {html.escape(str(e))}</p>"
@@ -1,12 +1,26 @@
 import pytest
 import os
+import sys
+from types import SimpleNamespace
 from flask import Flask
+
+# Importing the apps must not start their warm-up threads (real storage, Cloud SQL and Pub/Sub clients)
+os.environ['WARMUP_ENABLED'] = 'false'
 from portal.app import app as portal_app
 from planner.app import app as planner_app
 
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def portal_workdir(monkeypatch):
+    """Run in the portal's directory, the working directory it reads teaching_plan.txt from when deployed."""
+    monkeypatch.chdir(os.path.join(ROOT, 'portal'))
+
 @pytest.fixture
-def portal_client():
-    """Create a test client for the portal application."""
+def portal_client(portal_workdir, monkeypatch):
+    """Create a test client for the portal application, with a fresh rate limit."""
+    from portal.rate_limit import RateLimiter
+    monkeypatch.setattr(sys.modules['portal.app'], 'rate_limiter', RateLimiter(enabled=True))
     portal_app.config['TESTING'] = True
     with portal_app.test_client() as client:
         yield client
@@ -31,10 +45,39 @@ def mock_storage_client(mocker):
     return mock_client
 
 @pytest.fixture
-def mock_vertex_ai(mocker):
-    """Mock Google Cloud Vertex AI client."""
-    mock_client = mocker.patch('google.cloud.aiplatform.gapic.PredictionServiceClient')
-    return mock_client
+def mock_vertex_ai(monkeypatch):
+    """
+    Replace the VertexAI, ChatVertexAI and genai.Client the services construct with deterministic fakes.
+
+    The services import the model classes by name (from langchain_google_vertexai
+    import VertexAI), so the names already bound in their modules, e.g.
+    quiz.VertexAI or aidemy.ChatVertexAI, are patched as well as the package's.
+    """
+    import langchain_google_vertexai
+    from google import genai
+    from tests.fakes.genai import FakeGenaiClient
+    from tests.fakes.llm import FakeChatVertexAI, FakeVertexAI, quiz_responder
+
+    fakes = SimpleNamespace(
+        llm=FakeVertexAI(responder=quiz_responder),
+        chat=FakeChatVertexAI(responder=lambda messages: quiz_responder(messages[-1].content)),
+        genai=FakeGenaiClient(),
+    )
+    replacements = {
+        langchain_google_vertexai.VertexAI: fakes.llm.factory(),
+        langchain_google_vertexai.ChatVertexAI: fakes.chat.factory(),
+    }
+    for module in list(sys.modules.values()):
+        if module is langchain_google_vertexai or not (getattr(module, '__file__', None) or '').startswith(ROOT):
+            continue
+        for name in ('VertexAI', 'ChatVertexAI'):
+            if getattr(module, name, None) in replacements:
+                monkeypatch.setattr(module, name, replacements[getattr(module, name)])
+    # Modules imported from here on bind the fakes
+    monkeypatch.setattr(langchain_google_vertexai, 'VertexAI', replacements[langchain_google_vertexai.VertexAI])
+    monkeypatch.setattr(langchain_google_vertexai, 'ChatVertexAI', replacements[langchain_google_vertexai.ChatVertexAI])
+    monkeypatch.setattr(genai, 'Client', lambda **kwargs: fakes.genai)
+    return fakes
 
 @pytest.fixture
 def test_quiz_data():
@@ -0,0 +1 @@
+"""In-process stand-ins for the Google Cloud clients, used by the tests and benchmarks."""
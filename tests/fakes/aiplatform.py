@@ -0,0 +1,106 @@
+import time
+import threading
+from types import SimpleNamespace
+
+
+class FakeEndpoint:
+    """
+    A Vertex AI Endpoint serving a model on a fixed number of replicas.
+
+    A predict call holds one replica for latency + per_instance * len(instances)
+    seconds and answers each instance with a prediction derived from its prompt.
+    """
+
+    def __init__(self, replicas=1, latency=0.2, per_instance=0.01, respond=None):
+        self.latency = latency
+        self.per_instance = per_instance
+        self.respond = respond or (lambda instance: f"prediction for {instance['prompt'][:40]}")
+        self._replicas = threading.Semaphore(replicas)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.batch_sizes = []
+
+    def predict(self, instances, use_dedicated_endpoint=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.batch_sizes.append(len(instances))
+        with self._replicas:
+            time.sleep(self.latency + self.per_instance * len(instances))
+        return SimpleNamespace(predictions=[self.respond(instance) for instance in instances])
+
+
+class FakeDeployableEndpoint:
+    """A Vertex AI Endpoint as LLMPipeline uses it: deploy_all is a long-running operation, set_monitoring_config is quick."""
+
+    def __init__(self, platform, display_name):
+        self.platform = platform
+        self.display_name = display_name
+        self.deployed = []
+        self.monitoring = None
+
+    def deploy_all(self, model, **kwargs):
+        self.platform._enter("deploy")
+        try:
+            time.sleep(self.platform.deploy_latency)
+            if model in self.platform.fail_on:
+                raise RuntimeError(f"Deployment of {model} failed")
+            self.deployed.append(model)
+        finally:
+            self.platform._leave("deploy")
+
+    def set_monitoring_config(self, **kwargs):
+        time.sleep(self.platform.monitoring_latency)
+        self.monitoring = kwargs
+
+
+class FakeAiplatform:
+    """
+    Stand-in for the google.cloud.aiplatform module: init(), Endpoint.list() and Endpoint.create().
+
+    Patch it over the module's aiplatform to run LLMPipeline offline. Counts
+    the list and create calls and the peak number of concurrent deploys.
+
+    Args:
+        existing: Display names of endpoints that already exist
+        deploy_latency: Seconds a deploy_all call takes
+        list_latency: Seconds an Endpoint.list call takes
+        fail_on: Model names whose deployment fails
+    """
+
+    def __init__(self, existing=(), deploy_latency=0.1, list_latency=0.0, monitoring_latency=0.0, fail_on=()):
+        self.deploy_latency = deploy_latency
+        self.list_latency = list_latency
+        self.monitoring_latency = monitoring_latency
+        self.fail_on = set(fail_on)
+        self.endpoints = {name: FakeDeployableEndpoint(self, name) for name in existing}
+        self.calls = {"init": 0, "list": 0, "create": 0}
+        self.in_flight = {"deploy": 0}
+        self.peak_in_flight = {"deploy": 0}
+        self._lock = threading.Lock()
+        self.Endpoint = SimpleNamespace(list=self._list, create=self._create)
+
+    def _enter(self, kind):
+        with self._lock:
+            self.in_flight[kind] += 1
+            self.peak_in_flight[kind] = max(self.peak_in_flight[kind], self.in_flight[kind])
+
+    def _leave(self, kind):
+        with self._lock:
+            self.in_flight[kind] -= 1
+
+    def init(self, **kwargs):
+        self.calls["init"] += 1
+
+    def _list(self, filter="", **kwargs):
+        with self._lock:
+            self.calls["list"] += 1
+        time.sleep(self.list_latency)
+        name = filter.split("=", 1)[1].strip('"')
+        with self._lock:
+            return [self.endpoints[name]] if name in self.endpoints else []
+
+    def _create(self, display_name, **kwargs):
+        with self._lock:
+            self.calls["create"] += 1
+            endpoint = self.endpoints[display_name] = FakeDeployableEndpoint(self, display_name)
+            return endpoint
@@ -0,0 +1,111 @@
+import re
+import json
+import time
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+# The Live API streams 16-bit mono PCM at 24 kHz
+PCM_BYTES_PER_SECOND = 24000 * 2
+
+
+def split_weeks_responder(contents):
+    """Answer a week split prompt with one entry per "Week N" line of the teaching plan."""
+    weeks = re.findall(r"Week \d+:?[^\n]*", str(contents))
+    return json.dumps(weeks or [str(contents)])
+
+
+class FakeModels:
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, model, contents, config=None):
+        self._client.generate_calls += 1
+        if self._client.faults is not None:
+            self._client.faults.check(str(contents))
+        latency = self._client.latency() if callable(self._client.latency) else self._client.latency
+        if latency:
+            time.sleep(latency)
+        return SimpleNamespace(text=self._client.responder(contents))
+
+
+class FakeLiveSession:
+    """
+    A Live API session answering every turn with silent PCM audio.
+
+    The audio arrives in chunk_bytes messages, chunk_delay seconds apart, and
+    every chunk is a fresh bytes object like a real websocket frame.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._prompts = []
+
+    async def send(self, input=None, end_of_turn=False):
+        self._prompts.append(input)
+
+    async def receive(self):
+        prompt = self._prompts[-1]
+        if self._client.fail_on(prompt):
+            raise RuntimeError("Injected Live API failure")
+        remaining = int(self._client.audio_seconds(prompt) * PCM_BYTES_PER_SECOND)
+        while remaining > 0:
+            size = min(self._client.chunk_bytes, remaining)
+            remaining -= size
+            if self._client.chunk_delay:
+                await asyncio.sleep(self._client.chunk_delay)
+            part = SimpleNamespace(inline_data=SimpleNamespace(data=bytes(size), mime_type="audio/pcm"))
+            yield SimpleNamespace(server_content=SimpleNamespace(
+                model_turn=SimpleNamespace(parts=[part]), turn_complete=False))
+        yield SimpleNamespace(server_content=SimpleNamespace(model_turn=None, turn_complete=True))
+
+
+class FakeLive:
+    def __init__(self, client):
+        self._client = client
+
+    @contextlib.asynccontextmanager
+    async def connect(self, model, config=None):
+        client = self._client
+        client.sessions += 1
+        client.open_sessions += 1
+        client.peak_sessions = max(client.peak_sessions, client.open_sessions)
+        try:
+            if client.connect_latency:
+                await asyncio.sleep(client.connect_latency)
+            yield FakeLiveSession(client)
+        finally:
+            client.open_sessions -= 1
+
+
+class FakeGenaiClient:
+    """
+    A google.genai Client for offline tests: models.generate_content and aio.live.connect.
+
+    Args:
+        responder: Maps the generate_content contents to the response text
+        latency: Seconds each generate_content call takes, or a sampler from tests.fakes.llm.latency_distribution
+        audio_seconds: Seconds of audio per Live API turn, or a callable of the prompt
+        chunk_bytes: Size of each audio message
+        chunk_delay: Seconds between audio messages
+        connect_latency: Seconds to open a Live API session
+        fail_on: Callable of the prompt, True makes that turn fail
+        faults: tests.fakes.llm.FaultInjector deciding which generate_content calls raise
+    """
+
+    def __init__(self, responder=split_weeks_responder, latency=0.0, audio_seconds=5.0, chunk_bytes=9600,
+                 chunk_delay=0.0, connect_latency=0.0, fail_on=None, faults=None):
+        self.responder = responder
+        self.latency = latency
+        self.audio_seconds = audio_seconds if callable(audio_seconds) else (lambda prompt: audio_seconds)
+        self.chunk_bytes = chunk_bytes
+        self.chunk_delay = chunk_delay
+        self.connect_latency = connect_latency
+        self.fail_on = fail_on or (lambda prompt: False)
+        self.faults = faults
+        self.generate_calls = 0
+        self.sessions = 0
+        self.open_sessions = 0
+        self.peak_sessions = 0
+        self.models = FakeModels(self)
+        self.aio = SimpleNamespace(live=FakeLive(self))
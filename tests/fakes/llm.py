@@ -0,0 +1,296 @@
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import threading
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.llms import LLM
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class FakeSlowLLM(LLM):
+    """
+    A LangChain text LLM that answers with a fixed response after a fixed latency.
+
+    invoke() blocks the calling thread with time.sleep, ainvoke() only parks the
+    coroutine, which is what the async serving mode relies on.
+    """
+
+    response: str = ""
+    latency: float = 0.0
+    calls: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    lock: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-slow"
+
+    def _enter(self):
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def _call(self, prompt: str, stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> str:
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            return self.response
+        finally:
+            self._exit()
+
+    async def _acall(self, prompt: str, stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> str:
+        self._enter()
+        try:
+            await asyncio.sleep(self.latency)
+            return self.response
+        finally:
+            self._exit()
+
+
+class FakeSlowChatModel(BaseChatModel):
+    """
+    A LangChain chat model that answers after a fixed latency.
+
+    responder maps the last prompt text to the reply, so one fake can serve
+    several prompt shapes (e.g. a single book vs a list of books).
+    """
+
+    responder: Any = None
+    latency: float = 0.0
+    calls: int = 0
+    lock: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-slow-chat"
+
+    def _reply(self, messages):
+        with self.lock:
+            self.calls += 1
+        text = self.responder(messages[-1].content)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+def latency_distribution(median=0.0, p99=None, seed=0):
+    """
+    A seeded latency sampler: returns a callable giving the seconds of the next call.
+
+    Without p99 every call takes median seconds. With it, latencies are
+    lognormal around median with that 99th percentile, the long tail LLM
+    endpoints have. The same seed gives the same sequence.
+    """
+    if not p99 or not median:
+        return lambda: median
+    rng = random.Random(seed)
+    sigma = math.log(p99 / median) / 2.326
+    lock = threading.Lock()
+
+    def sample():
+        with lock:
+            return rng.lognormvariate(math.log(median), sigma)
+
+    return sample
+
+
+class FaultInjector:
+    """
+    Decides which fake model calls fail.
+
+    Args:
+        rate: Share of calls failing, drawn from a seeded generator
+        every: Every n-th call fails, 0 for none
+        match: Callable of the prompt text, True makes that call fail
+        error: Exception type raised
+        seed: Seed of the rate draws
+    """
+
+    def __init__(self, rate=0.0, every=0, match=None, error=RuntimeError, seed=0):
+        self.rate = rate
+        self.every = every
+        self.match = match
+        self.error = error
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def check(self, prompt: str):
+        """Raise the injected error if this call is one that fails."""
+        with self._lock:
+            self.calls += 1
+            fail = ((self.every and self.calls % self.every == 0)
+                    or (self.rate and self._rng.random() < self.rate)
+                    or (self.match is not None and self.match(prompt)))
+            if fail:
+                self.failures += 1
+        if fail:
+            raise self.error(f"Injected failure of call {self.calls}")
+
+
+def tool_call(name: str, **args) -> dict:
+    """A tool call as a chat model returns it, for responders of FakeChatVertexAI."""
+    return {"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "tool_call"}
+
+
+class _FakeModelMixin:
+    """Latency, fault injection and call accounting shared by the VertexAI and ChatVertexAI stand-ins."""
+
+    def _setup(self):
+        self.lock = threading.Lock()
+        if not callable(self.latency):
+            self.latency = latency_distribution(self.latency)
+
+    def _before(self, prompt):
+        with self.lock:
+            self.calls += 1
+            self.prompts.append(prompt)
+        if self.faults is not None:
+            self.faults.check(prompt)
+        seconds = self.latency()
+        with self.lock:
+            self.model_seconds += seconds
+        return seconds
+
+    def factory(self, **defaults):
+        """A stand-in for the model class: every construction returns this fake and records its kwargs."""
+        def create(**kwargs):
+            with self.lock:
+                self.created.append({**defaults, **kwargs})
+            return self
+        return create
+
+
+class FakeVertexAI(_FakeModelMixin, LLM):
+    """
+    A deterministic stand-in for langchain_google_vertexai.VertexAI.
+
+    Args:
+        responder: Maps the prompt text to the reply, e.g. a JSON document for JsonOutputParser chains
+        latency: Seconds per call, or a sampler from latency_distribution
+        faults: FaultInjector deciding which calls raise
+    """
+
+    responder: Any = None
+    latency: Any = 0.0
+    faults: Any = None
+    calls: int = 0
+    model_seconds: float = 0.0
+    prompts: list = []
+    created: list = []
+    lock: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._setup()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-vertexai"
+
+    def _call(self, prompt: str, stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> str:
+        time.sleep(self._before(prompt))
+        return self.responder(prompt)
+
+    async def _acall(self, prompt: str, stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> str:
+        await asyncio.sleep(self._before(prompt))
+        return self.responder(prompt)
+
+
+class FakeChatVertexAI(_FakeModelMixin, BaseChatModel):
+    """
+    A deterministic stand-in for langchain_google_vertexai.ChatVertexAI, with tool calling.
+
+    responder gets the whole message list and returns either the reply text
+    or a list of tool_call() dicts, so an agent loop can be scripted: ask for
+    tools on the user's request, answer once their ToolMessages are back.
+
+    Args:
+        responder: Maps the messages to the reply text or to tool calls
+        latency: Seconds per call, or a sampler from latency_distribution
+        faults: FaultInjector deciding which calls raise
+    """
+
+    responder: Any = None
+    latency: Any = 0.0
+    faults: Any = None
+    calls: int = 0
+    model_seconds: float = 0.0
+    prompts: list = []
+    created: list = []
+    bound_tools: list = []
+    lock: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._setup()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-vertexai"
+
+    def bind_tools(self, tools, **kwargs):
+        self.bound_tools = [getattr(tool, "name", getattr(tool, "__name__", str(tool))) for tool in tools]
+        return self
+
+    def _reply(self, messages):
+        reply = self.responder(messages)
+        if isinstance(reply, list):
+            message = AIMessage(content="", tool_calls=reply)
+        else:
+            message = AIMessage(content=reply)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._before(messages[-1].content))
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._before(messages[-1].content))
+        return self._reply(messages)
+
+
+def tools_then_answer(calls, answer):
+    """
+    A FakeChatVertexAI responder for agent loops: requests `calls` (a callable of the
+    messages returning tool_call() dicts) first, then answers with `answer` once
+    tool results have arrived.
+    """
+    def respond(messages):
+        if isinstance(messages[-1], ToolMessage):
+            return answer(messages) if callable(answer) else answer
+        return calls(messages)
+    return respond
+
+
+def quiz_responder(prompt: str) -> str:
+    """Answer a quiz prompt with a valid QuizQuestion JSON document."""
+    return json.dumps({"question": "How many sides has a triangle?",
+                       "options": ["A. 2", "B. 3", "C. 4", "D. 5"], "answer": "B"})
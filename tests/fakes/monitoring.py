@@ -0,0 +1,251 @@
+import time
+import threading
+import numpy as np
+from google.cloud import monitoring_v3
+from google.api import metric_pb2
+
+ValueType = metric_pb2.MetricDescriptor.ValueType
+
+
+def make_series(metric_type, points, end=None, step=60, labels=None, value_type=ValueType.DOUBLE, value=None):
+    """
+    A raw monitoring TimeSeries protobuf with evenly spaced points, newest first like the API returns them.
+
+    Args:
+        metric_type: e.g. "aiplatform.googleapis.com/endpoint/prediction_latency"
+        points: Number of points
+        end: Epoch seconds of the newest point, now by default
+        step: Seconds between points
+        labels: Resource labels of the series, e.g. {"endpoint_id": "123"}
+        value_type: ValueType.DOUBLE, INT64 or DISTRIBUTION
+        value: value(i) of the i-th oldest point, a sine-like pattern by default
+    """
+    end = int(end if end is not None else time.time())
+    value = value or (lambda i: 100 + (i * 37) % 50)
+    series = monitoring_v3.TimeSeries.pb(monitoring_v3.TimeSeries())
+    series.metric.type = metric_type
+    series.resource.type = "aiplatform.googleapis.com/Endpoint"
+    series.resource.labels.update(labels or {})
+    series.value_type = value_type
+    for i in reversed(range(points)):
+        point = series.points.add()
+        point.interval.end_time.seconds = end - (points - 1 - i) * step
+        if value_type == ValueType.INT64:
+            point.value.int64_value = int(value(i))
+        elif value_type == ValueType.DISTRIBUTION:
+            point.value.distribution_value.count = 1
+            point.value.distribution_value.mean = value(i)
+        else:
+            point.value.double_value = value(i)
+    return series
+
+
+class FakeMetricServiceClient:
+    """
+    A monitoring_v3.MetricServiceClient serving fixed time series from memory.
+
+    list_time_series returns the series whose metric type matches the filter,
+    keeping only the points inside the request interval, after `latency`
+    seconds. Metric types in fail_on raise instead.
+    """
+
+    def __init__(self, series=(), latency=0.0, fail_on=(), write_latency=0.0):
+        self.series = list(series)
+        self.write_latency = write_latency
+        self.written = []
+        self.latency = latency
+        self.fail_on = set(fail_on)
+        self.requests = []
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def list_time_series(self, request=None, **kwargs):
+        request = request or kwargs
+        with self._lock:
+            self.requests.append(request)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        metric_type = request["filter"].split('"')[1]
+        if metric_type in self.fail_on:
+            raise RuntimeError(f"list_time_series failed for {metric_type}")
+        interval = request["interval"]
+        start = interval.start_time.timestamp() if interval.start_time else 0
+        end = interval.end_time.timestamp()
+        results = []
+        for series in self.series:
+            if series.metric.type != metric_type:
+                continue
+            kept = monitoring_v3.TimeSeries.pb(monitoring_v3.TimeSeries())
+            kept.CopyFrom(series)
+            del kept.points[:]
+            kept.points.extend(point for point in series.points
+                               if start <= point.interval.end_time.seconds <= end)
+            if request.get("aggregation"):
+                kept = align(kept, request["aggregation"])
+            results.append(kept)
+        return results
+
+
+    def create_time_series(self, request=None, name=None, time_series=None, **kwargs):
+        """Accept a write under the API's limits: at most 200 series, one point each, no series twice."""
+        request = request or {"name": name, "time_series": time_series}
+        series = list(request["time_series"])
+        if len(series) > 200:
+            raise ValueError(f"{len(series)} time series in one request, at most 200")
+        keys = [(ts.metric.type, tuple(sorted(ts.metric.labels.items()))) for ts in series]
+        if len(set(keys)) != len(keys):
+            raise ValueError("The same time series is written twice in one request")
+        if any(len(ts.points) != 1 for ts in series):
+            raise ValueError("A written time series must hold exactly one point")
+        time.sleep(self.write_latency)
+        with self._lock:
+            self.written.append(series)
+
+
+def _value(point, value_type):
+    if value_type == ValueType.INT64:
+        return point.value.int64_value
+    if value_type == ValueType.DISTRIBUTION:
+        return point.value.distribution_value.mean
+    return point.value.double_value
+
+
+def align(series, aggregation):
+    """Apply a per-series aligner like Monitoring does: one point per alignment period, at the end of the period."""
+    period = aggregation["alignment_period"]["seconds"]
+    aligner = monitoring_v3.Aggregation.Aligner(aggregation["per_series_aligner"])
+    buckets = {}
+    for point in series.points:
+        end = -(-point.interval.end_time.seconds // period) * period
+        buckets.setdefault(end, []).append(_value(point, series.value_type))
+
+    aligned = monitoring_v3.TimeSeries.pb(monitoring_v3.TimeSeries())
+    aligned.CopyFrom(series)
+    del aligned.points[:]
+    reducers = {
+        monitoring_v3.Aggregation.Aligner.ALIGN_MEAN: lambda values: sum(values) / len(values),
+        monitoring_v3.Aggregation.Aligner.ALIGN_SUM: sum,
+        monitoring_v3.Aggregation.Aligner.ALIGN_MAX: max,
+        monitoring_v3.Aggregation.Aligner.ALIGN_MIN: min,
+    }
+    integer = series.value_type == ValueType.INT64 and aligner != monitoring_v3.Aggregation.Aligner.ALIGN_MEAN
+    aligned.value_type = ValueType.INT64 if integer else ValueType.DOUBLE
+    for end in sorted(buckets, reverse=True):
+        point = aligned.points.add()
+        point.interval.end_time.seconds = end
+        value = reducers[aligner](buckets[end])
+        if integer:
+            point.value.int64_value = int(value)
+        else:
+            point.value.double_value = float(value)
+    return aligned
+
+
+# Value shapes of the synthetic metrics, by metric type
+SYNTHETIC_METRICS = {
+    "aiplatform.googleapis.com/endpoint/prediction_latency": "latency",
+    "aiplatform.googleapis.com/endpoint/error_count": "errors",
+    "aiplatform.googleapis.com/endpoint/token_count": "tokens",
+    "aiplatform.googleapis.com/endpoint/cost": "cost",
+}
+
+
+def synthetic_values(shape, seconds, rng):
+    """Values with a daily cycle and noise: lognormal latencies, sparse bursty error counts, token counts and cost."""
+    daily = 1 + 0.4 * np.sin(2 * np.pi * (seconds % 86400) / 86400)
+    if shape == "latency":
+        return rng.lognormal(np.log(250), 0.25, len(seconds)) * daily
+    if shape == "errors":
+        bursts = (rng.random(len(seconds)) < 0.002) * rng.integers(5, 50, len(seconds))
+        return rng.poisson(0.05 * daily) + bursts
+    tokens = rng.poisson(600 * daily).astype(np.float64)
+    return tokens if shape == "tokens" else tokens * 0.000125
+
+
+class SyntheticMetricServiceClient(FakeMetricServiceClient):
+    """
+    A MetricServiceClient with realistic synthetic series for every metric of SYNTHETIC_METRICS.
+
+    Each metric has fan_out series (one per endpoint_id) of `points` points,
+    `step` seconds apart and ending at `end`, with gap_ratio of them missing
+    in outage-like runs. The series are built once; a request slices them to
+    its interval, so the cost measured is the visualizer's, not the fake's.
+    A request aligned to `step` gets the points as they are, the synthetic
+    points standing for Monitoring's aligned ones.
+
+    Args:
+        points: Points per series before gaps
+        fan_out: Series per metric
+        step: Seconds between points
+        gap_ratio: Share of points missing
+        end: Epoch seconds of the newest point, now by default
+        seed: Seed of the generator, the same arguments give the same series
+    """
+
+    def __init__(self, points=1440, fan_out=4, step=60, gap_ratio=0.02, end=None, seed=0, **kwargs):
+        super().__init__(**kwargs)
+        self.step = step
+        rng = np.random.default_rng(seed)
+        end = int(end if end is not None else time.time()) // step * step
+        seconds = end - step * np.arange(points)[::-1]
+        self._series = {}
+        for metric_type, shape in SYNTHETIC_METRICS.items():
+            for n in range(fan_out):
+                keep = self._gaps(points, gap_ratio, rng)
+                kept_seconds = seconds[keep]
+                value_type = ValueType.INT64 if shape == "errors" else ValueType.DOUBLE
+                values = synthetic_values(shape, kept_seconds, rng)
+                series = make_series(metric_type, 0, labels={"endpoint_id": f"endpoint-{n}"}, value_type=value_type)
+                for ts, value in zip(kept_seconds[::-1].tolist(), values[::-1].tolist()):
+                    point = series.points.add()
+                    point.interval.end_time.seconds = ts
+                    if value_type == ValueType.INT64:
+                        point.value.int64_value = int(value)
+                    else:
+                        point.value.double_value = value
+                # Newest first like the API, with the timestamps kept for slicing
+                self._series.setdefault(metric_type, []).append((series.SerializeToString(), kept_seconds[::-1]))
+
+    @staticmethod
+    def _gaps(points, gap_ratio, rng):
+        keep = np.ones(points, dtype=bool)
+        missing = int(points * gap_ratio)
+        while missing > 0:
+            length = min(missing, int(rng.integers(5, 60)))
+            start = int(rng.integers(0, max(1, points - length)))
+            keep[start:start + length] = False
+            missing -= length
+        return keep
+
+    @property
+    def total_points(self):
+        return sum(len(seconds) for series in self._series.values() for _, seconds in series)
+
+    def list_time_series(self, request=None, **kwargs):
+        request = request or kwargs
+        with self._lock:
+            self.requests.append(request)
+        time.sleep(self.latency)
+        metric_type = request["filter"].split('"')[1]
+        interval = request["interval"]
+        start = interval.start_time.timestamp() if interval.start_time else 0
+        end = interval.end_time.timestamp()
+        aggregation = request.get("aggregation")
+        results = []
+        for serialized, seconds in self._series.get(metric_type, []):
+            series = monitoring_v3.TimeSeries.pb(monitoring_v3.TimeSeries()).FromString(serialized)
+            # seconds is descending, keep the points within [start, end]
+            first = int(np.searchsorted(-seconds, -end, side="left"))
+            last = int(np.searchsorted(-seconds, -start, side="right"))
+            del series.points[last:]
+            del series.points[:first]
+            if aggregation and aggregation["alignment_period"]["seconds"] != self.step:
+                series = align(series, aggregation)
+            results.append(series)
+        return results
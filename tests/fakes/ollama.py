@@ -0,0 +1,135 @@
+import re
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TOKENS = (
+    ["<think>"] + ["Let", " me", " plan", " the", " weeks", "."] + ["</think>", "\n\n"]
+    + ["**Week", " 1:**", " Shape", " hunt", "\n", "**Week", " 2:**", " Symmetry", " art"]
+)
+
+
+def keep_alive_seconds(value, default):
+    """Ollama's keep_alive: seconds as a number, a duration like "30m", negative for forever."""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = re.fullmatch(r"(-?\d+(?:\.\d+)?)(ms|s|m|h)?", str(value).strip())
+        if not match:
+            return default
+        unit = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[match.group(2)]
+        seconds = float(match.group(1)) * unit
+    return float("inf") if seconds < 0 else seconds
+
+
+class FakeOllamaServer:
+    """
+    A local Ollama /api/generate server for tests and benchmarks.
+
+    Loading the model takes load_seconds; it then stays loaded for the
+    request's keep_alive (default_keep_alive when not given, Ollama's 5
+    minutes scaled down as needed). Streamed tokens are sent as NDJSON lines,
+    token_delay apart. New TCP connections and model loads are counted.
+    """
+
+    def __init__(self, load_seconds=1.0, token_delay=0.01, default_keep_alive=300.0, tokens=DEFAULT_TOKENS):
+        self.load_seconds = load_seconds
+        self.token_delay = token_delay
+        self.default_keep_alive = default_keep_alive
+        self.tokens = list(tokens)
+        self.connections = 0
+        self.requests = 0
+        self.loads = 0
+        self.payloads = []
+        self._loaded_until = 0.0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if time.monotonic() < self._loaded_until:
+                return
+            self.loads += 1
+            time.sleep(self.load_seconds)
+            self._loaded_until = float("inf")  # stays loaded while the request runs
+
+    def _release(self, keep_alive):
+        with self._lock:
+            self._loaded_until = time.monotonic() + keep_alive_seconds(keep_alive, self.default_keep_alive)
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_chunk(self, body):
+                data = (json.dumps(body) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                    fake.payloads.append(payload)
+                fake._ensure_loaded()
+                try:
+                    if not payload.get("prompt") or payload.get("stream") is False:
+                        text = "" if not payload.get("prompt") else "".join(fake.tokens)
+                        self._send_json({"model": payload.get("model"), "response": text, "done": True})
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for token in fake.tokens:
+                        time.sleep(fake.token_delay)
+                        self._send_chunk({"model": payload.get("model"), "response": token, "done": False})
+                    self._send_chunk({"model": payload.get("model"), "response": "", "done": True})
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                finally:
+                    fake._release(payload.get("keep_alive"))
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,222 @@
+import json
+import time
+import heapq
+import base64
+import itertools
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from cloudevents.http import CloudEvent
+
+
+class PushSubscription:
+    """
+    A push subscription delivering each message to a handler as a Pub/Sub CloudEvent.
+
+    At most max_concurrency deliveries run at once, the rest wait in the
+    backlog like requests queued for busy Cloud Run instances. A delivery is
+    acknowledged when the handler returns, whatever it returns, as
+    functions_framework answers a cloud_event function that returns with a
+    200. When it raises, the message is redelivered after an exponential
+    backoff, until max_delivery_attempts sends it to the dead letters.
+
+    Args:
+        name: Subscription id
+        topic: Topic id
+        handler: Takes the CloudEvent like the Cloud Run functions, raises to have the message redelivered
+        max_concurrency: Deliveries in flight at once
+        max_delivery_attempts: Attempts before a message is dead-lettered
+        min_backoff: Seconds before the first redelivery, doubled on each attempt up to max_backoff
+        on_ack: Called with (message, attempts) when a message is acknowledged
+    """
+
+    def __init__(self, emulator, name, topic, handler, max_concurrency=10, max_delivery_attempts=5,
+                 min_backoff=0.1, max_backoff=10.0, on_ack=None):
+        self.emulator = emulator
+        self.name = name
+        self.topic = topic
+        self.handler = handler
+        self.max_concurrency = max_concurrency
+        self.max_delivery_attempts = max_delivery_attempts
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.on_ack = on_ack
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._slots = threading.Semaphore(max_concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"push-{name}")
+        self._stopped = False
+        self.unacked = {}
+        self.dead_letters = []
+        self.stats = {"delivered": 0, "acked": 0, "nacked": 0, "dead_lettered": 0, "in_flight": 0,
+                      "peak_in_flight": 0}
+        threading.Thread(target=self._dispatch, name=f"dispatch-{name}", daemon=True).start()
+
+    @property
+    def path(self):
+        return f"projects/{self.emulator.project}/subscriptions/{self.name}"
+
+    def _enqueue(self, message, delay=0.0):
+        with self._cond:
+            self.unacked[message["messageId"]] = message
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), message))
+            self._cond.notify()
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if self._stopped:
+                    return
+                _, _, message = heapq.heappop(self._heap)
+            # Wait for a free slot here, so the backlog stays in the queue meanwhile
+            self._slots.acquire()
+            self._pool.submit(self._deliver, message)
+
+    def _event(self, message):
+        attributes = {
+            "type": "google.cloud.pubsub.topic.v1.messagePublished",
+            "source": f"//pubsub.googleapis.com/projects/{self.emulator.project}/topics/{self.topic}",
+            "id": message["messageId"],
+        }
+        data = {
+            "message": {
+                "data": base64.b64encode(message["data"]).decode("ascii"),
+                "messageId": message["messageId"],
+                "publishTime": message["publishTime"],
+                "attributes": message["attributes"],
+            },
+            "subscription": self.path,
+        }
+        return CloudEvent(attributes, data)
+
+    def _deliver(self, message):
+        with self._cond:
+            message["attempts"] += 1
+            self.stats["delivered"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+        try:
+            self.handler(self._event(message))
+            acked = True
+        except Exception as e:
+            print(f"Push to {self.name} failed: {e}")
+            acked = False
+        finally:
+            with self._cond:
+                self.stats["in_flight"] -= 1
+            self._slots.release()
+
+        if acked:
+            with self._cond:
+                self.unacked.pop(message["messageId"], None)
+                self.stats["acked"] += 1
+            if self.on_ack:
+                self.on_ack(message, message["attempts"])
+        elif message["attempts"] >= self.max_delivery_attempts:
+            with self._cond:
+                self.unacked.pop(message["messageId"], None)
+                self.dead_letters.append(message)
+                self.stats["dead_lettered"] += 1
+        else:
+            with self._cond:
+                self.stats["nacked"] += 1
+            self._enqueue(message, min(self.max_backoff, self.min_backoff * 2 ** (message["attempts"] - 1)))
+
+    def backlog(self) -> int:
+        """Messages published to the subscription and not acknowledged yet, in flight ones included."""
+        with self._cond:
+            return len(self.unacked)
+
+    def oldest_unacked_age(self) -> float:
+        """Seconds since the oldest unacknowledged message was published, 0 when there is none."""
+        with self._cond:
+            oldest = min((message["published_at"] for message in self.unacked.values()), default=None)
+        return time.monotonic() - oldest if oldest is not None else 0.0
+
+    def shutdown(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class PubSubEmulator:
+    """
+    An in-process Pub/Sub for load tests: topics fan every message out to their push subscriptions.
+
+    Args:
+        project: Project id of the topic and subscription paths
+    """
+
+    def __init__(self, project="load-test"):
+        self.project = project
+        self._topics = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create_topic(self, topic):
+        with self._lock:
+            self._topics.setdefault(topic, [])
+
+    def create_subscription(self, name, topic, handler, **kwargs) -> PushSubscription:
+        """Add a push subscription to a topic, see PushSubscription for the arguments."""
+        subscription = PushSubscription(self, name, topic, handler, **kwargs)
+        with self._lock:
+            self._topics.setdefault(topic, []).append(subscription)
+        return subscription
+
+    def publish(self, topic, data: bytes, **attributes) -> str:
+        """Publish a message to every subscription of a topic, returns its message id."""
+        with self._lock:
+            if topic not in self._topics:
+                raise KeyError(f"Topic {topic} not found")
+            subscriptions = list(self._topics[topic])
+            message_id = str(next(self._ids))
+        published_at = time.monotonic()
+        publish_time = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        for subscription in subscriptions:
+            subscription._enqueue({"messageId": message_id, "data": data, "attributes": attributes,
+                                   "publishTime": publish_time, "published_at": published_at, "attempts": 0})
+        return message_id
+
+    def subscriptions(self):
+        with self._lock:
+            return [subscription for subscriptions in self._topics.values() for subscription in subscriptions]
+
+    def publisher(self, latency=0.0):
+        """A pubsub_v1.PublisherClient stand-in publishing to this emulator."""
+        return FakePublisherClient(self, latency)
+
+    def shutdown(self):
+        for subscription in self.subscriptions():
+            subscription.shutdown()
+
+
+class FakePublisherClient:
+    """A google.cloud.pubsub_v1 PublisherClient publishing to a PubSubEmulator, latency seconds per publish."""
+
+    def __init__(self, emulator, latency=0.0):
+        self.emulator = emulator
+        self.latency = latency
+        self.published = 0
+
+    @staticmethod
+    def topic_path(project, topic):
+        return f"projects/{project}/topics/{topic}"
+
+    def publish(self, topic, data, **attributes) -> Future:
+        if self.latency:
+            time.sleep(self.latency)
+        future = Future()
+        future.set_result(self.emulator.publish(topic.rsplit("/", 1)[-1], data, **attributes))
+        self.published += 1
+        return future
+
+
+def message_json(cloud_event) -> dict:
+    """The JSON payload of a Pub/Sub CloudEvent, as the services decode it."""
+    return json.loads(base64.b64decode(cloud_event.data["message"]["data"]).decode("utf-8"))
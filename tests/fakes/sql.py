@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+
+
+class FakeEngine:
+    """A SQLAlchemy engine answering every query with the same row, e.g. the curriculum of get_curriculum."""
+
+    def __init__(self, row=("Recognise and describe 2D and 3D shapes, angles and symmetry",)):
+        self.row = row
+        self.queries = 0
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt, parameters=None):
+        self.queries += 1
+        return SimpleNamespace(fetchone=lambda: self.row)
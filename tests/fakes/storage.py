@@ -0,0 +1,218 @@
+import time
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+
+class FakeBlob:
+    """A google.cloud.storage Blob kept in memory."""
+
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.generation = None
+        self.updated = None
+        self.data = None
+        self.size = None
+        self.md5_hash = None
+        self.content_type = None
+
+    def _stored(self):
+        return self.bucket._blobs.get(self.name)
+
+    def exists(self):
+        self.bucket._wait("metadata")
+        return self._stored() is not None
+
+    def reload(self):
+        self.bucket._wait("metadata")
+        stored = self._stored()
+        if stored is None:
+            raise FileNotFoundError(self.name)
+        self.generation, self.updated = stored.generation, stored.updated
+
+    def upload_from_string(self, data, content_type=None):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.bucket._wait("upload")
+        self.bucket._put(self.name, data)
+
+    def upload_from_filename(self, filename, content_type=None):
+        if self.bucket.store_data:
+            with open(filename, "rb") as f:
+                self.upload_from_string(f.read(), content_type=content_type)
+            return
+        # Stream the file like a chunked resumable upload, only its size and digest are kept
+        digest, size = hashlib.sha256(), 0
+        with open(filename, "rb") as f:
+            for chunk in iter(lambda: f.read(getattr(self, "chunk_size", None) or 1024 * 1024), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        self.bucket._wait("upload")
+        self.bucket._put(self.name, None, size=size, md5_hash=digest.hexdigest())
+
+    def open(self, mode="r", chunk_size=None, **kwargs):
+        if mode != "wb":
+            raise NotImplementedError(f"FakeBlob.open only writes, not {mode!r}")
+        return FakeBlobWriter(self, chunk_size or 100 * 1024 * 1024)
+
+    def compose(self, sources):
+        """Concatenate the source blobs into this one, server side."""
+        self.bucket._wait("upload")
+        stored = [source._stored() for source in sources]
+        if any(part is None for part in stored):
+            raise FileNotFoundError(", ".join(source.name for source in sources))
+        if all(part.data is not None for part in stored):
+            self.bucket._put(self.name, b"".join(part.data for part in stored))
+        else:
+            self.bucket._put(self.name, None, size=sum(part.size for part in stored))
+
+    def delete(self):
+        self.bucket._wait("metadata")
+        with self.bucket._lock:
+            if self.bucket._blobs.pop(self.name, None) is None:
+                raise FileNotFoundError(self.name)
+
+    def download_as_bytes(self):
+        self.bucket._wait("download")
+        stored = self._stored()
+        if stored is None:
+            raise FileNotFoundError(self.name)
+        self.bucket.downloads += 1
+        return stored.data
+
+    def download_as_text(self):
+        return self.download_as_bytes().decode("utf-8")
+
+    def download_to_filename(self, filename):
+        with open(filename, "wb") as f:
+            f.write(self.download_as_bytes())
+
+
+class FakeBlobWriter:
+    """
+    The writer of Blob.open("wb"): a resumable upload sending each full chunk as it fills.
+
+    At most one chunk is buffered. The blob appears when the writer is
+    closed; with store_data=False only its size and digest are kept.
+    """
+
+    def __init__(self, blob, chunk_size):
+        self.blob = blob
+        self.chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._parts = []
+        self._digest = hashlib.sha256()
+        self.size = 0
+        self.chunks_sent = 0
+        self.peak_buffered = 0
+
+    def write(self, data):
+        self._buffer += data
+        self.size += len(data)
+        self.peak_buffered = max(self.peak_buffered, len(self._buffer))
+        while len(self._buffer) >= self.chunk_size:
+            self._send(bytes(self._buffer[:self.chunk_size]))
+            del self._buffer[:self.chunk_size]
+        return len(data)
+
+    def _send(self, chunk):
+        self.blob.bucket._wait("upload")
+        self.chunks_sent += 1
+        if self.blob.bucket.store_data:
+            self._parts.append(chunk)
+        else:
+            self._digest.update(chunk)
+
+    def close(self):
+        if self._buffer:
+            self._send(bytes(self._buffer))
+            self._buffer.clear()
+        if self.blob.bucket.store_data:
+            self.blob.bucket._put(self.blob.name, b"".join(self._parts))
+        else:
+            self.blob.bucket._put(self.blob.name, None, size=self.size, md5_hash=self._digest.hexdigest())
+        self.blob.bucket.writers.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeBucket:
+    """
+    A google.cloud.storage Bucket kept in memory.
+
+    latency maps an operation (metadata, list, download, upload) to the seconds
+    it should take, to emulate network round-trips in benchmarks. With
+    store_data=False file uploads keep only their size and digest, so large
+    uploads do not count against a memory measurement.
+    """
+
+    def __init__(self, name="fake-bucket", latency=None, store_data=True):
+        self.name = name
+        self.latency = latency or {}
+        self.store_data = store_data
+        self._blobs = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.downloads = 0
+        self.listings = 0
+        self.writers = []
+
+    def _wait(self, operation):
+        seconds = self.latency.get(operation, 0)
+        if seconds:
+            time.sleep(seconds)
+
+    def _put(self, name, data, size=None, md5_hash=None):
+        with self._lock:
+            self._generation += 1
+            stored = FakeBlob(self, name)
+            stored.data = data
+            stored.size = len(data) if data is not None else size
+            stored.md5_hash = md5_hash
+            stored.generation = self._generation
+            stored.updated = datetime.now(timezone.utc)
+            self._blobs[name] = stored
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def get_blob(self, name):
+        self._wait("metadata")
+        stored = self._blobs.get(name)
+        if stored is None:
+            return None
+        blob = FakeBlob(self, name)
+        blob.generation, blob.updated = stored.generation, stored.updated
+        return blob
+
+    def list_blobs(self, prefix="", **kwargs):
+        self._wait("list")
+        self.listings += 1
+        blobs = []
+        for name, stored in sorted(self._blobs.items()):
+            if name.startswith(prefix):
+                blob = FakeBlob(self, name)
+                blob.generation, blob.updated = stored.generation, stored.updated
+                blobs.append(blob)
+        return iter(blobs)
+
+
+class FakeStorageClient:
+    """A google.cloud.storage Client whose buckets live in memory."""
+
+    def __init__(self, latency=None):
+        self.latency = latency
+        self._buckets = {}
+
+    def bucket(self, name):
+        if name not in self._buckets:
+            self._buckets[name] = FakeBucket(name, self.latency)
+        return self._buckets[name]
+
+    def list_blobs(self, bucket_name, prefix="", **kwargs):
+        return self.bucket(bucket_name).list_blobs(prefix=prefix, **kwargs)
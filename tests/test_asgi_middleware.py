@@ -0,0 +1,96 @@
+import gzip
+import pytest
+from a2wsgi import WSGIMiddleware
+from flask import Flask, jsonify, request
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+from portal.asgi_middleware import llm_route
+from portal.metrics_writer import MetricsWriter
+from portal.static_assets import GZIP_MIN_SIZE, init_static_assets
+from tests.fakes.monitoring import FakeMetricServiceClient
+
+PLAN = {'teaching_plan': 'Week 1: 2D Shapes and Angles. ' * 300}
+
+def written_counts(writer):
+    writer.flush()
+    return {
+        tuple(sorted(ts.metric.labels.items())): ts.points[0].value.double_value
+        for batch in writer.client.written for ts in batch if ts.metric.type.endswith('/requests')
+    }
+
+@pytest.fixture
+def asgi(tmp_path):
+    """A Starlette app wired like planner/asgi.py and portal/asgi.py, with its Flask app mounted."""
+    writer = MetricsWriter(client=FakeMetricServiceClient(), project_id='aidemy', flush_interval=60, gauge_max=False)
+    (tmp_path / 'static').mkdir()
+    flask_app = Flask(__name__, static_folder=str(tmp_path / 'static'))
+    init_static_assets(flask_app)
+
+    @flask_app.route('/page')
+    def page():
+        writer.increment('requests', labels={'route': request.path, 'status': '200'})
+        return jsonify(PLAN)
+
+    async def generate_plan(request):
+        return JSONResponse(PLAN)
+
+    async def generate_quiz(request):
+        return JSONResponse([{'question': 'What is an angle?', 'answer': 'B'}] * 100)
+
+    async def check_answers(request):
+        return JSONResponse({'error': 'Missing quiz or answer data'}, status_code=400)
+
+    application = Starlette(routes=[
+        llm_route('/', generate_plan, ['POST'], writer, GZIP_MIN_SIZE),
+        llm_route('/generate_quiz', generate_quiz, ['GET'], writer, GZIP_MIN_SIZE),
+        llm_route('/check_answers', check_answers, ['POST'], writer, GZIP_MIN_SIZE),
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ])
+    with TestClient(application) as client:
+        yield client, writer
+
+def test_llm_routes_are_compressed(asgi):
+    """Test that the event-loop routes are gzipped like the Flask responses, the small ones left as they are."""
+    client, _ = asgi
+    response = client.post('/', data={'year': 5}, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert int(response.headers['Content-Length']) < len(str(PLAN)) / 10
+    assert response.json() == PLAN
+
+    small = client.post('/check_answers', json={}, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+    # The Flask app compresses its own responses, they are not gzipped twice
+    page = client.get('/page', headers={'Accept-Encoding': 'gzip'})
+    assert page.headers['Content-Encoding'] == 'gzip'
+    assert page.json() == PLAN
+
+def test_get_routes_are_conditional(asgi):
+    """Test that GET responses carry a weak ETag and that a matching If-None-Match gets a 304."""
+    client, _ = asgi
+    response = client.get('/generate_quiz', headers={'Accept-Encoding': 'gzip'})
+    etag = response.headers['ETag']
+    assert etag.startswith('W/"')
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+    cached = client.get('/generate_quiz', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.content == b''
+    assert 'ETag' not in client.post('/', data={'year': 5}).headers
+
+def test_llm_routes_are_counted(asgi):
+    """Test that every event-loop request is counted once per route and status, like record_request_metrics."""
+    client, writer = asgi
+    client.post('/', data={'year': 5})
+    client.post('/', data={'year': 5})
+    client.post('/check_answers', json={})
+    client.get('/page')
+
+    counts = written_counts(writer)
+    assert counts[(('route', '/'), ('status', '200'))] == 2
+    assert counts[(('route', '/check_answers'), ('status', '400'))] == 1
+    assert counts[(('route', '/page'), ('status', '200'))] == 1
+    assert len(counts) == 3
@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import pytest
+
+# The assignment function imports its sibling modules by name, as it does when deployed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assignment'))
+import main as assignment_main
+import gemini
+from tests.fakes.genai import FakeGenaiClient
+
+PLAN = '* Week 1: 2D Shapes and Angles\n* Week 2: 3D Shapes and Symmetry'
+
+def slow_node(key, text, seconds):
+    def node(state, on_text=None):
+        time.sleep(seconds)
+        return {key: text}
+    node.__name__ = key
+    return node
+
+def streaming_node(key, chunks, seconds):
+    """A node streaming its chunks at once, then taking seconds to finish its answer."""
+    def node(state, on_text=None):
+        for chunk in chunks:
+            on_text(chunk)
+        time.sleep(seconds)
+        return {key: ''.join(chunks) + ' and the rest'}
+    node.__name__ = key
+    return node
+
+@pytest.fixture
+def combiner(monkeypatch):
+    client = FakeGenaiClient(responder=lambda contents: 'combined')
+    monkeypatch.setattr(gemini.genai, 'Client', lambda **kwargs: client)
+    return client
+
+def test_generators_run_in_parallel(monkeypatch, combiner):
+    """Test that the end-to-end latency is close to the slower branch, not the sum."""
+    monkeypatch.setattr(assignment_main, 'gen_assignment_gemini', slow_node('model_one_assignment', 'gemini draft', 0.3))
+    monkeypatch.setattr(assignment_main, 'gen_assignment_deepseek', slow_node('model_two_assignment', 'deepseek draft', 0.3))
+
+    start = time.perf_counter()
+    assert assignment_main.create_assignment(PLAN) == 'combined'
+    assert time.perf_counter() - start < 0.55
+    assert combiner.generate_calls == 1
+
+def test_timed_out_branch_is_skipped(monkeypatch, combiner):
+    """Test that combine_assignments proceeds with the draft that arrived in time."""
+    monkeypatch.setattr(assignment_main, 'DEEPSEEK_TIMEOUT_SECONDS', 0.1)
+    monkeypatch.setattr(assignment_main, 'gen_assignment_gemini', slow_node('model_one_assignment', 'gemini draft', 0.0))
+    monkeypatch.setattr(assignment_main, 'gen_assignment_deepseek', slow_node('model_two_assignment', 'deepseek draft', 2))
+
+    start = time.perf_counter()
+    assert assignment_main.create_assignment(PLAN) == 'gemini draft'
+    assert time.perf_counter() - start < 1
+    assert combiner.generate_calls == 0
+
+def test_no_draft_fails_the_event(monkeypatch, combiner):
+    """Test that the graph fails when neither branch produced a draft, so Pub/Sub retries."""
+    def broken(state):
+        raise RuntimeError('model unavailable')
+
+    monkeypatch.setattr(assignment_main, 'gen_assignment_gemini', broken)
+    monkeypatch.setattr(assignment_main, 'gen_assignment_deepseek', broken)
+    with pytest.raises(RuntimeError, match='No assignment draft'):
+        assignment_main.create_assignment(PLAN)
+
+def test_timed_out_stream_is_combined(monkeypatch):
+    """Test that the DeepSeek text streamed before its timeout reaches the state and is combined with Gemini's draft."""
+    prompts = []
+    client = FakeGenaiClient(responder=lambda contents: prompts.append(contents) or 'combined')
+    monkeypatch.setattr(gemini.genai, 'Client', lambda **kwargs: client)
+    monkeypatch.setattr(assignment_main, 'DEEPSEEK_TIMEOUT_SECONDS', 0.2)
+    monkeypatch.setattr(assignment_main, 'gen_assignment_gemini', slow_node('model_one_assignment', 'gemini draft', 0.0))
+    monkeypatch.setattr(assignment_main, 'gen_assignment_deepseek',
+                        streaming_node('model_two_assignment', ['**Week 1:** ', 'Shape hunt'], 2))
+
+    state = assignment_main.build_graph().invoke({'teaching_plan': PLAN})
+
+    assert state['model_two_assignment'] == '**Week 1:** Shape hunt'
+    assert state['truncated'] == ['model_two_assignment']
+    assert state['final_assignment'] == 'combined'
+    assert 'gemini draft' in prompts[-1] and '**Week 1:** Shape hunt' in prompts[-1]
+
+def test_truncated_stream_alone_fails_the_event(monkeypatch, combiner):
+    """Test that a draft cut short is never stored as the whole assignment."""
+    def broken(state):
+        raise RuntimeError('model unavailable')
+
+    monkeypatch.setattr(assignment_main, 'DEEPSEEK_TIMEOUT_SECONDS', 0.2)
+    monkeypatch.setattr(assignment_main, 'gen_assignment_gemini', broken)
+    monkeypatch.setattr(assignment_main, 'gen_assignment_deepseek',
+                        streaming_node('model_two_assignment', ['**Week 1:** '], 2))
+    with pytest.raises(RuntimeError, match='No assignment draft'):
+        assignment_main.create_assignment(PLAN)
@@ -0,0 +1,58 @@
+import pytest
+from bookprovider.catalog import BookCatalog, normalize_category
+
+def make_book(n, author='Author'):
+    return {'bookname': f'Book {n}', 'author': f'{author} {n}', 'publisher': 'Aidemy Press', 'publishing_date': '2020'}
+
+@pytest.fixture
+def catalog(tmp_path):
+    return BookCatalog(str(tmp_path / 'catalog.db'))
+
+def test_normalize_category():
+    """Test that categories are compared case and punctuation insensitively."""
+    assert normalize_category('  Geometry! ') == 'geometry'
+    assert normalize_category('Mathematics,  Geometry') == 'mathematics geometry'
+
+def test_add_books_dedupes_by_title_and_author(catalog):
+    """Test that the same book is stored once per category."""
+    assert catalog.add_books('Geometry', [make_book(1), make_book(2)]) == 2
+    duplicate = dict(make_book(1), bookname=' book 1 ', publisher='Other')
+    assert catalog.add_books('geometry', [duplicate, make_book(3)]) == 1
+    assert len(catalog.books('GEOMETRY')) == 3
+
+def test_lookup_needs_enough_entries(catalog):
+    """Test that the catalog only answers once it knows enough books."""
+    catalog.add_books('Geometry', [make_book(n) for n in range(3)])
+    assert catalog.lookup('Geometry', 2, min_entries=5) is None
+    catalog.add_books('Geometry', [make_book(n) for n in range(3, 6)])
+    books = catalog.lookup('Geometry', 2, min_entries=5)
+    assert len(books) == 2
+    assert books[0] != books[1]
+
+def test_lookup_uses_full_text_index_for_narrower_categories(catalog):
+    """Test that a category is served from a narrower stored one holding all its words."""
+    catalog.add_books('Mathematics Geometry', [make_book(n) for n in range(5)])
+    assert len(catalog.lookup('Geometry', 3)) == 3
+    assert catalog.lookup('Geom', 3) is None
+    assert catalog.lookup('Algebra', 3) is None
+    assert catalog.search('Author 3')[0]['bookname'] == 'Book 3'
+
+def test_lookup_ignores_near_miss_categories(catalog):
+    """Test that books of a category sharing only some words or a prefix are not served as hits."""
+    catalog.add_books('English Literature', [make_book(n, 'Poet') for n in range(5)])
+    catalog.add_books('Artificial Intelligence', [make_book(n, 'Engineer') for n in range(5)])
+    catalog.add_books('Geometry', [make_book(n) for n in range(5)])
+
+    assert catalog.lookup('English Grammar', 3) is None
+    assert catalog.lookup('Art', 3) is None
+    assert catalog.lookup('Mathematics Geometry', 3) is None
+
+    catalog.add_books('English Grammar', [make_book(n, 'Grammarian') for n in range(2)])
+    assert catalog.lookup('English Grammar', 3) is None
+    assert all(book['author'].startswith('Grammarian') for book in catalog.lookup('English Grammar', 2))
+
+def test_age_tracks_refresh(catalog):
+    """Test that the refresh timestamp is recorded per category."""
+    assert catalog.age('Geometry') is None
+    catalog.add_books('Geometry', [make_book(1)])
+    assert 0 <= catalog.age('Geometry') < 5
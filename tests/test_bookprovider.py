@@ -0,0 +1,193 @@
+import os
+import re
+import sys
+import json
+import sqlite3
+import time
+import itertools
+import importlib
+import flask
+import pytest
+import functions_framework
+from tests.fakes.llm import FakeChatVertexAI, FaultInjector
+
+BOOKPROVIDER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bookprovider')
+# The provider imports its sibling modules by name, as it does when deployed
+SIBLINGS = ('provider', 'catalog', 'llm_cache', 'warmup')
+
+def book_responder(messages):
+    """Distinct books named after the prompt's category, a list of them when the prompt asks for one."""
+    prompt = messages[-1].content
+    category = re.search(r'recommendations? on (.+?)(?:,| with)', prompt).group(1)
+    if category.startswith('Slow'):
+        time.sleep(0.05 * int(category[-1]))
+    if 'distinct book recommendations' in prompt:
+        count = int(prompt.split('Generate ')[-1].split(' distinct')[0])
+        return json.dumps({'books': [make_book(category, next(_books)) for _ in range(count)]})
+    return json.dumps(make_book(category, next(_books)))
+
+_books = itertools.count()
+
+def make_book(category, n):
+    return {'bookname': f'{category} Book {n}', 'author': f'Author {n}', 'publisher': 'Aidemy Press',
+            'publishing_date': '2020'}
+
+@pytest.fixture
+def provider(monkeypatch, tmp_path):
+    monkeypatch.setenv('WARMUP_ENABLED', 'false')
+    monkeypatch.setenv('BOOK_CATALOG_PATH', str(tmp_path / 'book_catalog.db'))
+    monkeypatch.syspath_prepend(BOOKPROVIDER_DIR)
+    for name in SIBLINGS:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    provider = importlib.import_module('provider')
+    monkeypatch.setattr(provider, 'refresh_in_background', lambda category, number_of_book: None)
+    yield provider
+    for name in SIBLINGS:
+        sys.modules.pop(name, None)
+
+@pytest.fixture
+def llm(provider, monkeypatch):
+    llm = FakeChatVertexAI(responder=book_responder, faults=FaultInjector(match=lambda prompt: 'Poetry' in prompt))
+    monkeypatch.setattr(provider, 'get_llm', lambda: llm)
+    return llm
+
+def post(provider, body):
+    with flask.Flask(__name__).test_request_context(json=body):
+        response = provider.recommended(flask.request)
+    if isinstance(response, tuple):
+        return response[1], response[0].get_json()
+    return response.status_code, response.get_json()
+
+def test_batch_results_follow_the_request_order(provider, llm):
+    """Test that every category gets its own books at its own index, however long each one takes."""
+    items = [{'category': f'Slow {n}', 'number_of_book': 2} for n in (3, 0, 2, 1)]
+
+    results = provider.recommend_batch(items)
+
+    assert [result['category'] for result in results] == ['Slow 3', 'Slow 0', 'Slow 2', 'Slow 1']
+    for result in results:
+        assert len(result['books']) == 2
+        assert all(book['bookname'].startswith(result['category']) for book in result['books'])
+
+def test_batch_errors_stay_with_their_item(provider, llm):
+    """Test that a failing category is reported in its own result and the others are still served."""
+    status, body = post(provider, {'requests': [
+        {'category': 'Geometry', 'number_of_book': 2},
+        {'category': 'Poetry', 'number_of_book': 2},
+        {'category': 'Algebra', 'number_of_book': 1},
+    ]})
+
+    assert status == 200
+    geometry, poetry, algebra = body['results']
+    assert [book['bookname'].split(' Book')[0] for book in geometry['books']] == ['Geometry', 'Geometry']
+    assert poetry['category'] == 'Poetry'
+    assert 'Injected failure' in poetry['error']
+    assert 'books' not in poetry
+    assert algebra['books'][0]['bookname'].startswith('Algebra')
+
+def test_batch_items_with_invalid_fields(provider, llm):
+    """Test that a missing or invalid field fails that item only, with the category when there is one."""
+    status, body = post(provider, {'requests': [
+        {'category': 'Geometry'},
+        {'number_of_book': 2},
+        'Geometry',
+        {'category': 'Algebra', 'number_of_book': 'two'},
+        {'category': 'Geometry', 'number_of_book': 1},
+    ]})
+
+    assert status == 200
+    missing_count, missing_category, not_a_dict, invalid_count, valid = body['results']
+    assert missing_count == {'category': 'Geometry', 'error': 'Missing category or number_of_book parameters'}
+    assert missing_category == {'category': None, 'error': 'Missing category or number_of_book parameters'}
+    assert not_a_dict == {'category': None, 'error': 'Missing category or number_of_book parameters'}
+    assert invalid_count['category'] == 'Algebra'
+    assert 'invalid literal' in invalid_count['error']
+    assert len(valid['books']) == 1
+
+@pytest.mark.parametrize('requests', [[], {'category': 'Geometry'}, None])
+def test_batch_must_be_a_non_empty_list(provider, llm, requests):
+    status, body = post(provider, {'requests': requests})
+    assert status == 400
+    assert 'non-empty list' in body['error']
+    assert llm.calls == 0
+
+def test_batch_size_is_limited(provider, llm):
+    """Test that a batch over MAX_BATCH_SIZE is rejected as a whole, before any model call."""
+    items = [{'category': f'Topic {n}', 'number_of_book': 1} for n in range(provider.MAX_BATCH_SIZE + 1)]
+
+    status, body = post(provider, {'requests': items})
+
+    assert status == 400
+    assert body['error'] == f'At most {provider.MAX_BATCH_SIZE} categories per batch'
+    assert llm.calls == 0
+
+    status, body = post(provider, {'requests': items[:provider.MAX_BATCH_SIZE]})
+    assert status == 200
+    assert len(body['results']) == provider.MAX_BATCH_SIZE
+
+def test_catalog_hit_makes_no_model_call(provider, llm):
+    """Test that a category the catalog knows enough books of is served without the LLM."""
+    provider.get_catalog().add_books('Geometry', [make_book('Geometry', n) for n in range(provider.CATALOG_MIN_ENTRIES)])
+
+    books = provider.recommend('Geometry', 3)
+
+    assert len({book['bookname'] for book in books}) == 3
+    assert llm.calls == 0
+
+def test_catalog_miss_is_filled_by_one_list_call(provider, llm):
+    """Test that the books of a new category come from a single list call and are kept in the catalog."""
+    books = provider.recommend('Geometry', 2)
+
+    assert len(books) == 2
+    assert llm.calls == 1
+    assert 'distinct book recommendations' in llm.prompts[0]
+    assert len(provider.get_catalog().books('Geometry')) == provider.CATALOG_MIN_ENTRIES
+
+    provider.recommend('Geometry', 2)
+    assert llm.calls == 1
+
+def test_short_list_is_topped_up_by_one_call(provider, llm):
+    """Test that a list call one valid book short costs a single per-book call, excluding the books picked."""
+    def short_list(messages):
+        prompt = messages[-1].content
+        if 'distinct book recommendations' in prompt:
+            duplicate = make_book('Geometry', 1)
+            return json.dumps({'books': [make_book('Geometry', 0), duplicate, dict(duplicate), {'bookname': 'No author'}]})
+        return json.dumps(make_book('Geometry', 2))
+    llm.responder = short_list
+
+    books = provider.generate_books('Geometry', 3)
+
+    assert [book['bookname'] for book in books] == ['Geometry Book 0', 'Geometry Book 1', 'Geometry Book 2']
+    assert llm.calls == 2
+    assert 'Do not recommend any of these books: Geometry Book 0, Geometry Book 1' in llm.prompts[1]
+
+def test_failed_list_call_falls_back_to_per_book_calls(provider, llm):
+    """Test that a failing list call is replaced by one concurrent call per book."""
+    llm.faults = FaultInjector(match=lambda prompt: 'distinct book recommendations' in prompt)
+
+    books = provider.generate_books('Geometry', 3)
+
+    assert len({book['bookname'] for book in books}) == 3
+    assert llm.calls == 4
+    assert llm.faults.failures == 1
+
+def test_catalog_failure_falls_back_to_the_llm(provider, llm, monkeypatch):
+    """Test that an unreadable catalog costs a model call, not the request."""
+    def broken_catalog():
+        raise sqlite3.OperationalError('unable to open database file')
+    monkeypatch.setattr(provider, 'get_catalog', broken_catalog)
+
+    books = provider.recommend('Geometry', 2)
+
+    assert len(books) == 2
+    assert llm.calls == 1
+
+def test_warm_up_starts_only_under_the_functions_framework(provider, monkeypatch):
+    """Test that a plain import leaves warm-up alone and loading the function for serving starts it."""
+    assert {state['status'] for state in provider.warmup.steps.values()} == {'pending'}
+
+    monkeypatch.setattr(sys, 'path', list(sys.path))
+    functions_framework.create_app('recommended', os.path.join(BOOKPROVIDER_DIR, 'provider.py'))
+
+    assert {state['status'] for state in sys.modules['provider'].warmup.steps.values()} == {'skipped'}
@@ -0,0 +1,106 @@
+import io
+import wave
+import asyncio
+import courses.audio as courses_audio
+from courses.audio import breakup_sessions, process_weeks, summarize, SAMPLE_RATE
+from tests.fakes.genai import FakeGenaiClient
+from tests.fakes.storage import FakeBucket
+
+TEACHING_PLAN = """**3-Week Teaching Plan**
+* Week 1: 2D Shapes and Angles
+* Week 2: 3D Shapes and Symmetry
+* Week 3: Position, Direction, and Problem Solving
+"""
+
+def test_every_week_is_stored_as_a_wav(monkeypatch):
+    """Test that each week's audio streams into a valid WAV blob and the upload parts are removed."""
+    monkeypatch.setattr('courses.audio.UPLOAD_CHUNK_SIZE', 256 * 1024)
+    client = FakeGenaiClient(audio_seconds=15)
+    bucket = FakeBucket()
+
+    results = breakup_sessions(TEACHING_PLAN, client=client, bucket=bucket)
+
+    assert [result['blob'] for result in results] == [f'course-week-{week}.wav' for week in (1, 2, 3)]
+    assert all(result['audio_seconds'] == 15 for result in results)
+    with wave.open(io.BytesIO(bucket._blobs['course-week-2.wav'].data)) as wf:
+        assert wf.getframerate() == SAMPLE_RATE
+        assert wf.getnframes() == 15 * SAMPLE_RATE
+        assert wf.readframes(wf.getnframes()) == bytes(15 * SAMPLE_RATE * 2)
+    assert sorted(bucket._blobs) == ['course-manifest.json'] + [f'course-week-{week}.wav' for week in (1, 2, 3)]
+    # The audio was sent chunk by chunk while it streamed in, never held whole
+    assert all(writer.chunks_sent == 3 and writer.peak_buffered < 256 * 1024 + 9600 for writer in bucket.writers)
+
+def test_failed_stream_leaves_no_parts():
+    """Test that the upload parts of a week failing mid-stream are deleted."""
+    client = FakeGenaiClient(audio_seconds=0.2, fail_on=lambda prompt: 'Week 2' in prompt)
+    bucket = FakeBucket()
+
+    breakup_sessions(TEACHING_PLAN, client=client, bucket=bucket)
+
+    assert not any(name.startswith(courses_audio.UPLOAD_PREFIX) for name in bucket._blobs)
+
+def test_live_sessions_are_bounded():
+    """Test that no more than `concurrency` Live API sessions are open at once."""
+    plan = '\n'.join(f'* Week {week}: Topic {week}' for week in range(1, 7))
+    client = FakeGenaiClient(audio_seconds=0.5, chunk_delay=0.001, connect_latency=0.01)
+
+    results = asyncio.run(process_weeks(plan, client=client, bucket=FakeBucket(), concurrency=2))
+
+    assert len(results) == 6
+    assert client.sessions == 6
+    assert client.peak_sessions == 2
+
+def test_failed_week_does_not_stop_the_others():
+    """Test that a Live API failure is reported for its week only."""
+    client = FakeGenaiClient(audio_seconds=0.2, fail_on=lambda prompt: 'Week 2' in prompt)
+    bucket = FakeBucket()
+
+    results = breakup_sessions(TEACHING_PLAN, client=client, bucket=bucket)
+
+    assert 'Injected Live API failure' in results[1]['error']
+    assert results[1]['status'] == 'failed'
+    assert 'error' not in results[0] and 'error' not in results[2]
+    assert sorted(bucket._blobs) == ['course-manifest.json', 'course-week-1.wav', 'course-week-3.wav']
+
+def test_unchanged_weeks_are_skipped():
+    """Test that a repeated plan reuses every blob and a changed week is the only one regenerated."""
+    client = FakeGenaiClient(audio_seconds=0.2)
+    bucket = FakeBucket()
+    breakup_sessions(TEACHING_PLAN, client=client, bucket=bucket)
+    generation = bucket._blobs['course-week-1.wav'].generation
+
+    results = breakup_sessions(TEACHING_PLAN, client=client, bucket=bucket)
+    assert summarize(results) == {'regenerated': 0, 'skipped': 3, 'failed': 0}
+    assert client.sessions == 3
+
+    results = breakup_sessions(TEACHING_PLAN.replace('Symmetry', 'Nets'), client=client, bucket=bucket)
+    assert [result['status'] for result in results] == ['skipped', 'regenerated', 'skipped']
+    assert client.sessions == 4
+    assert bucket._blobs['course-week-1.wav'].generation == generation
+
+def test_voice_change_and_missing_blob_regenerate(monkeypatch):
+    """Test that the voice config is part of the fingerprint and a deleted blob is regenerated."""
+    client = FakeGenaiClient(audio_seconds=0.2)
+    bucket = FakeBucket()
+    breakup_sessions(TEACHING_PLAN, client=client, bucket=bucket)
+
+    del bucket._blobs['course-week-3.wav']
+    results = breakup_sessions(TEACHING_PLAN, client=client, bucket=bucket)
+    assert [result['status'] for result in results] == ['skipped', 'skipped', 'regenerated']
+
+    voice = courses_audio.config.model_copy(deep=True)
+    voice.speech_config.voice_config.prebuilt_voice_config.voice_name = 'Puck'
+    monkeypatch.setattr('courses.audio.config', voice)
+    results = breakup_sessions(TEACHING_PLAN, client=client, bucket=bucket)
+    assert summarize(results)['regenerated'] == 3
+
+def test_failed_week_is_retried_by_the_next_event():
+    """Test that a failed week is left out of the manifest."""
+    failing = {'Week 2'}
+    client = FakeGenaiClient(audio_seconds=0.2, fail_on=lambda prompt: any(week in prompt for week in failing))
+    bucket = FakeBucket()
+    breakup_sessions(TEACHING_PLAN, client=client, bucket=bucket)
+
+    failing.clear()
+    results = breakup_sessions(TEACHING_PLAN, client=client, bucket=bucket)
+    assert [result['status'] for result in results] == ['skipped', 'regenerated', 'skipped']
@@ -0,0 +1,62 @@
+import json
+import pytest
+from langchain_core.messages import HumanMessage, ToolMessage
+from langchain_core.output_parsers import JsonOutputParser
+from tests.fakes.genai import FakeGenaiClient
+from tests.fakes.llm import (
+    FakeChatVertexAI, FakeVertexAI, FaultInjector, latency_distribution, quiz_responder, tool_call, tools_then_answer
+)
+
+def test_latency_distribution_is_seeded():
+    """Test that the same seed gives the same latencies, with the median and tail asked for."""
+    first, second = latency_distribution(0.2, p99=2.0, seed=7), latency_distribution(0.2, p99=2.0, seed=7)
+    samples = [first() for _ in range(5000)]
+    assert samples[:10] == [second() for _ in range(10)]
+    samples.sort()
+    assert samples[2500] == pytest.approx(0.2, rel=0.1)
+    assert samples[4950] == pytest.approx(2.0, rel=0.25)
+    assert latency_distribution(0.05)() == 0.05
+
+def test_fault_injector_fails_chosen_calls():
+    """Test that every n-th call and matching prompts raise the injected error."""
+    faults = FaultInjector(every=3, match=lambda prompt: "boom" in prompt, error=TimeoutError)
+    llm = FakeVertexAI(responder=lambda prompt: "ok", faults=faults)
+
+    outcomes = []
+    for prompt in ["a", "b", "c", "boom", "e", "f"]:
+        try:
+            outcomes.append(llm.invoke(prompt))
+        except TimeoutError:
+            outcomes.append("failed")
+    assert outcomes == ["ok", "ok", "failed", "failed", "ok", "failed"]
+    assert faults.failures == 3
+
+def test_fake_vertexai_serves_json_chains():
+    """Test that a JsonOutputParser chain parses the fake's JSON and the factory hands out the same fake."""
+    llm = FakeVertexAI(responder=quiz_responder)
+    model = llm.factory()(model_name="gemini-1.5-pro", location="us-east1")
+
+    assert (model | JsonOutputParser()).invoke("quiz")["answer"] == "B"
+    assert llm.calls == 1
+    assert llm.created == [{"model_name": "gemini-1.5-pro", "location": "us-east1"}]
+
+def test_fake_chat_model_scripts_tool_calls():
+    """Test that the chat fake asks for tools first and answers once their results are back."""
+    chat = FakeChatVertexAI(responder=tools_then_answer(lambda messages: [tool_call("get_curriculum", year=5)], "plan"))
+    model = chat.bind_tools([lambda year: None])
+
+    request = model.invoke([HumanMessage(content="prepare a class")])
+    assert request.tool_calls[0]["name"] == "get_curriculum"
+    assert request.tool_calls[0]["args"] == {"year": 5}
+    answer = model.invoke([HumanMessage(content="prepare a class"), request,
+                           ToolMessage(content="curriculum", tool_call_id=request.tool_calls[0]["id"])])
+    assert answer.content == "plan"
+
+def test_fake_genai_client_injects_faults():
+    """Test that generate_content honours the fault injector and a latency sampler."""
+    client = FakeGenaiClient(responder=lambda contents: json.dumps([contents]), latency=latency_distribution(0.0),
+                             faults=FaultInjector(every=2))
+
+    assert client.models.generate_content(model="gemini", contents="week 1").text == '["week 1"]'
+    with pytest.raises(RuntimeError):
+        client.models.generate_content(model="gemini", contents="week 2")
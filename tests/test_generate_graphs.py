@@ -0,0 +1,331 @@
+import time
+import pytest
+import numpy as np
+import pandas as pd
+from google.cloud import monitoring_v3
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from mlops.visualizations.generate_graphs import (
+    ALIGNMENT_SECONDS, METRICS, POINT_BUDGET, GraphExporter, MetricSnapshot, MetricStore, MLOpsVisualizer,
+    lttb, minmax_downsample, prune_graphs, series_frame
+)
+from tests.fakes.monitoring import FakeMetricServiceClient, SyntheticMetricServiceClient, ValueType, make_series
+
+LATENCY = "aiplatform.googleapis.com/endpoint/prediction_latency"
+ERRORS = "aiplatform.googleapis.com/endpoint/error_count"
+
+def test_series_frame_builds_one_sorted_frame():
+    """Test that the points of every series end up in one time-sorted frame with datetime timestamps."""
+    end = 1_700_000_000
+    results = [
+        make_series(LATENCY, 3, end=end, step=60, labels={"endpoint_id": "a"}, value=lambda i: i),
+        make_series(LATENCY, 2, end=end - 30, step=60, labels={"endpoint_id": "b"}, value=lambda i: 10 + i),
+    ]
+
+    df = series_frame(results, "latency")
+
+    assert list(df.columns) == ["timestamp", "latency", "series"]
+    assert pd.api.types.is_datetime64_dtype(df["timestamp"])
+    assert df["timestamp"].is_monotonic_increasing
+    assert df["latency"].tolist() == [0.0, 10.0, 1.0, 11.0, 2.0]
+    assert df["series"].tolist() == ["endpoint_id=a", "endpoint_id=b", "endpoint_id=a", "endpoint_id=b", "endpoint_id=a"]
+    assert df["timestamp"].iloc[-1] == pd.Timestamp(end, unit="s")
+
+def test_series_frame_reads_values_by_type():
+    """Test that INT64 and DISTRIBUTION series are read from their own value fields."""
+    ints = make_series(ERRORS, 2, end=100, value_type=ValueType.INT64, value=lambda i: 3 + i)
+    dists = make_series(LATENCY, 1, end=100, value_type=ValueType.DISTRIBUTION, value=lambda i: 2.5)
+
+    assert series_frame([ints], "error_count")["error_count"].tolist() == [3.0, 4.0]
+    assert series_frame([dists], "latency")["latency"].tolist() == [2.5]
+
+def test_series_frame_accepts_proto_plus_and_empty_results():
+    """Test that proto-plus TimeSeries are read too and that no points give an empty, typed frame."""
+    series = monitoring_v3.TimeSeries.wrap(make_series(LATENCY, 4, end=1000))
+    assert len(series_frame([series], "latency")) == 4
+
+    empty = series_frame([make_series(LATENCY, 0)], "latency")
+    assert empty.empty
+    assert pd.api.types.is_datetime64_dtype(empty["timestamp"])
+    assert empty["timestamp"].dt.hour.empty
+
+def test_graphs_are_built_from_the_frame(tmp_path, monkeypatch):
+    """Test that the latency and error graphs plot every point and that the heatmap works on the datetime column."""
+    monkeypatch.chdir(tmp_path)
+    # On a minute, the bucket of a later point would still be open and is not plotted
+    now = int(time.time()) // 60 * 60
+    client = FakeMetricServiceClient([
+        make_series(LATENCY, 120, end=now, labels={"endpoint_id": "a"}),
+        make_series(ERRORS, 120, end=now, value_type=ValueType.INT64, value=lambda i: i % 3),
+    ])
+    visualizer = MLOpsVisualizer(client=client)
+
+    fig_ts, fig_box = visualizer.create_latency_graph()
+    assert len(fig_ts.data[0].x) == 120
+    assert np.all(np.diff(np.asarray(fig_ts.data[0].x, dtype="datetime64[ns]")) > np.timedelta64(0))
+
+    fig_ts, fig_heat = visualizer.create_error_rate_graph()
+    assert sum(fig_ts.data[0].y) == sum(i % 3 for i in range(120))
+    assert fig_heat.data[0].z is not None
+
+def metric_series(now):
+    return [
+        make_series(LATENCY, 60, end=now),
+        make_series(ERRORS, 60, end=now, value_type=ValueType.INT64),
+        make_series("aiplatform.googleapis.com/endpoint/token_count", 60, end=now),
+        make_series("aiplatform.googleapis.com/endpoint/cost", 60, end=now, value=lambda i: 0.01),
+    ]
+
+def test_dashboard_tick_queries_each_metric_once(tmp_path, monkeypatch):
+    """Test that the graphs and the export of one tick share a single, concurrent round of queries."""
+    monkeypatch.chdir(tmp_path)
+    client = FakeMetricServiceClient(metric_series(int(time.time())), latency=0.1)
+    visualizer = MLOpsVisualizer(client=client)
+
+    start = time.perf_counter()
+    visualizer.snapshot()
+    assert time.perf_counter() - start < 0.35
+    assert client.peak_in_flight == 4
+
+    assert set(visualizer.create_graphs()) == set(METRICS)
+    assert set(visualizer.create_graphs()) == set(METRICS)
+    assert len(client.requests) == 4
+
+def test_concurrent_sessions_share_one_refresh(tmp_path, monkeypatch):
+    """Test that callers arriving during a refresh wait for it instead of querying again."""
+    monkeypatch.chdir(tmp_path)
+    client = FakeMetricServiceClient(metric_series(int(time.time())), latency=0.1)
+    visualizer = MLOpsVisualizer(client=client)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        snapshots = list(pool.map(lambda _: visualizer.snapshot(), range(8)))
+
+    assert len(client.requests) == 4
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    assert visualizer.metric_snapshots['24h'].stats['refreshes'] == 1
+
+def test_failed_query_keeps_previous_frame():
+    """Test that a metric whose query fails keeps its previous frame, and fails the refresh when there is none."""
+    frames = {name: pd.DataFrame({'value': [n]}) for n, name in enumerate(METRICS)}
+    failing = set()
+
+    def fetch(name):
+        if name in failing:
+            raise RuntimeError("unavailable")
+        return frames[name]
+
+    snapshot = MetricSnapshot(fetch, max_age=0)
+    first = snapshot.get()
+    failing.add('cost')
+    frames['latency'] = pd.DataFrame({'value': [42]})
+
+    second = snapshot.get()
+    assert second['cost'] is first['cost']
+    assert second['latency']['value'].tolist() == [42]
+
+    with pytest.raises(RuntimeError):
+        MetricSnapshot(fetch, max_age=0).get()
+
+def exported_files(graphs_dir):
+    return sorted(path.name for path in graphs_dir.iterdir())
+
+def test_export_skips_unchanged_metrics(tmp_path, monkeypatch):
+    """Test that the background export writes each metric once and skips it while its data is unchanged."""
+    monkeypatch.chdir(tmp_path)
+    now = int(time.time())
+    client = FakeMetricServiceClient(metric_series(now))
+    visualizer = MLOpsVisualizer(client=client)
+    visualizer.exporter = GraphExporter(tmp_path / "graphs", executor=ThreadPoolExecutor(max_workers=2))
+
+    snapshot = visualizer.snapshot()
+    results = visualizer.exporter.submit(visualizer.create_graphs(snapshot), snapshot).result(timeout=30)
+    assert set(results) == set(METRICS)
+    files = exported_files(tmp_path / "graphs")
+    assert {name.rsplit("_", 2)[0] for name in files if name.endswith(".csv")} == {
+        f"{metric}_data" for metric in METRICS}
+    assert sum(name.endswith(".html") for name in files) == 8
+
+    # New latency data only: the other metrics are not exported again
+    client.series[0] = make_series(LATENCY, 60, end=now, value=lambda i: 500 + i)
+    snapshot = dict(snapshot, latency=visualizer.fetch_frame("latency"))
+    results = visualizer.exporter.submit(visualizer.create_graphs(snapshot), snapshot).result(timeout=30)
+    assert results["error_rate"] == results["token_usage"] == results["cost"] == "unchanged"
+    assert results["latency"] != "unchanged"
+
+def test_prune_graphs_keeps_newest_exports(tmp_path):
+    """Test that only the newest exports of a metric survive, and none older than the retention."""
+    now = datetime.now()
+    stamps = [(now - timedelta(minutes=5 * n + 1)).strftime("%Y%m%d_%H%M%S") for n in range(6)]
+    old = (now - timedelta(days=30)).strftime("%Y%m%d_%H%M%S")
+    for stamp in stamps + [old]:
+        for name in (f"error_rate_ts_{stamp}.html", f"error_rate_data_{stamp}.csv"):
+            (tmp_path / name).write_text("x")
+    (tmp_path / f"cost_ts_{old}.html").write_text("x")
+
+    removed = prune_graphs(tmp_path, "error_rate", keep=3, retention_hours=24)
+
+    assert len(removed) == 8
+    assert exported_files(tmp_path) == sorted(
+        [f"error_rate_ts_{stamp}.html" for stamp in stamps[:3]]
+        + [f"error_rate_data_{stamp}.csv" for stamp in stamps[:3]]
+        + [f"cost_ts_{old}.html"])
+
+    prune_graphs(tmp_path, "error_rate", keep=3, retention_hours=0)
+    assert exported_files(tmp_path) == [f"cost_ts_{old}.html"]
+
+def test_export_runs_in_worker_processes(tmp_path):
+    """Test that the default process pool, spawned rather than forked from the dashboard, receives the figures and writes their files."""
+    frame = series_frame([make_series(LATENCY, 30, end=int(time.time()))], "latency")
+    visualizer = MLOpsVisualizer.__new__(MLOpsVisualizer)
+    graphs = {"latency": visualizer.create_latency_graph(frame)}
+    exporter = GraphExporter(tmp_path, workers=1)
+    try:
+        results = exporter.submit(graphs, {"latency": frame}).result(timeout=60)
+        assert exporter._pool()._mp_context.get_start_method() == "spawn"
+    finally:
+        exporter.shutdown()
+
+    assert any(path.endswith(".html") for path in results["latency"])
+    assert len(pd.read_csv(next(tmp_path.glob("latency_data_*.csv")))) == 30
+
+def request_range(request):
+    return (int(request["interval"].start_time.timestamp()), int(request["interval"].end_time.timestamp()))
+
+def test_refresh_only_fetches_new_points(tmp_path, monkeypatch):
+    """Test that the metric store turns a refresh into a query for the last minutes, and a longer window into a backfill."""
+    now = 1_700_000_040  # on a minute, where aligned points fall
+    clock = [now]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    client = FakeMetricServiceClient([make_series(LATENCY, 30 * 24 * 60, end=now + 600, step=60)])
+    visualizer = MLOpsVisualizer(client=client, metric_store=MetricStore(tmp_path / "metrics.db"))
+    visualizer.graphs_dir = tmp_path
+
+    first = visualizer.fetch_frame("latency", hours=24)
+    # One period before the window, so its first bucket is complete
+    assert request_range(client.requests[-1]) == (now - 24 * 3600 - 60, now)
+    assert len(first) == 24 * 60 + 1
+
+    clock[0] = now + 600
+    second = visualizer.fetch_frame("latency", hours=24)
+    assert request_range(client.requests[-1]) == (now - 360, now + 600)
+    assert len(second) == 24 * 60 + 1
+    assert second["timestamp"].iloc[-1] == pd.Timestamp(now + 600, unit="s")
+
+    week = visualizer.fetch_frame("latency", hours=7 * 24)
+    assert request_range(client.requests[-2]) == (now + 600 - 7 * 24 * 3600 - 60, now - 24 * 3600)
+    assert len(week) == 7 * 24 * 60 + 1
+    assert week["timestamp"].is_monotonic_increasing
+
+def test_refreshes_keep_aligned_sums_complete(tmp_path, monkeypatch):
+    """Test that refreshes at any second never replace a complete SUM bucket with a partial one."""
+    start = 1_700_000_025
+    clock = [start]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    client = FakeMetricServiceClient([make_series(ERRORS, 6 * 360, end=start + 3600, step=10,
+                                                  value_type=ValueType.INT64, value=lambda i: 1)])
+    visualizer = MLOpsVisualizer(client=client, metric_store=MetricStore(tmp_path / "metrics.db"))
+    visualizer.graphs_dir = tmp_path
+
+    for _ in range(6):
+        clock[0] += 97
+        frame = visualizer.fetch_frame("error_rate", hours=1)
+        assert frame["timestamp"].iloc[-1] <= pd.Timestamp(clock[0], unit="s")
+
+    # The series starts at start - 2590 s, its first bucket is complete from the next minute on
+    complete = frame[frame["timestamp"] > pd.Timestamp(start - 2590 + 60, unit="s")]
+    assert complete["error_count"].tolist() == [6.0] * len(complete)
+    assert complete["timestamp"].iloc[-1] == pd.Timestamp(clock[0] // 60 * 60, unit="s")
+
+def test_late_points_are_upserted(tmp_path):
+    """Test that points fetched again replace the stored ones instead of being duplicated."""
+    store = MetricStore(tmp_path / "metrics.db", late_seconds=120)
+    store.append(LATENCY, series_frame([make_series(LATENCY, 5, end=1000, value=lambda i: 1.0)], "latency"), 700, 1000)
+    assert store.missing(LATENCY, 500, 1300) == [(500, 700), (880, 1300)]
+
+    store.append(LATENCY, series_frame([make_series(LATENCY, 2, end=1000, value=lambda i: 2.0)], "latency"), 880, 1300)
+    frame = store.frame(LATENCY, "latency", 0)
+    assert frame["latency"].tolist() == [1.0, 1.0, 1.0, 2.0, 2.0]
+    assert store.watermark(LATENCY) == (700, 1300)
+
+def test_compaction_applies_retention(tmp_path):
+    """Test that compaction drops points older than the retention and moves the covered range forward."""
+    now = int(time.time())
+    store = MetricStore(tmp_path / "metrics.db", retention_hours=1)
+    frame = series_frame([make_series(LATENCY, 120, end=now, step=60)], "latency")
+    store.append(LATENCY, frame, now - 7200, now)
+
+    assert store.compact(force=True) == 59
+    assert len(store.frame(LATENCY, "latency", 0)) == 61
+    assert store.watermark(LATENCY)[0] >= now - 3600
+    assert store.compact() == 0
+
+def test_lttb_keeps_shape_within_budget():
+    """Test that LTTB keeps the end points and the peaks of a line within the budget."""
+    x = np.arange(10_000)
+    y = np.sin(x / 500)
+    y[7_321] = 5.0
+
+    kept = lttb(x, y, 500)
+
+    assert len(kept) == 500
+    assert kept[0] == 0 and kept[-1] == len(x) - 1
+    assert np.all(np.diff(kept) > 0)
+    assert 7_321 in kept
+
+def test_minmax_keeps_isolated_spikes():
+    """Test that min/max buckets keep every spike of a mostly flat error count."""
+    y = np.zeros(100_000)
+    spikes = [17, 40_000, 99_998]
+    y[spikes] = [3, 7, 2]
+
+    kept = minmax_downsample(y, 200)
+
+    assert len(kept) <= 202
+    assert set(spikes) <= set(kept.tolist())
+
+def test_figures_respect_the_point_budget(tmp_path, monkeypatch):
+    """Test that time series traces are downsampled while the distributions are computed from every point."""
+    monkeypatch.chdir(tmp_path)
+    values = np.random.default_rng(0).normal(100, 10, 20_000)
+    frame = series_frame([make_series(LATENCY, 20_000, end=1_700_000_000, value=lambda i: values[i])], "latency")
+    visualizer = MLOpsVisualizer.__new__(MLOpsVisualizer)
+
+    fig_ts, fig_box = visualizer.create_latency_graph(frame)
+    assert len(fig_ts.data[0].x) == POINT_BUDGET
+    assert fig_box.data[0].median[0] == pytest.approx(np.median(values))
+    assert fig_box.data[0].q3[0] == pytest.approx(np.percentile(values, 75))
+
+    _, fig_hist = visualizer.create_token_usage_graph(frame.rename(columns={"latency": "token_count"}))
+    assert sum(fig_hist.data[0].y) == 20_000
+    assert len(fig_hist.data[0].y) == 50
+
+def test_monitoring_aligns_the_fetched_points(tmp_path, monkeypatch):
+    """Test that refreshes ask Monitoring for aligned points rather than every raw point."""
+    monkeypatch.chdir(tmp_path)
+    now = (int(time.time()) // 60) * 60
+    client = FakeMetricServiceClient([make_series(ERRORS, 600, end=now, step=10, value_type=ValueType.INT64,
+                                                  value=lambda i: 1)])
+    visualizer = MLOpsVisualizer(client=client)
+
+    frame = visualizer.fetch_frame("error_rate", hours=2)
+
+    aggregation = client.requests[-1]["aggregation"]
+    assert aggregation["alignment_period"] == {"seconds": ALIGNMENT_SECONDS}
+    assert len(frame) == 100
+    assert frame["error_count"].sum() == 600
+
+def test_synthetic_client_serves_gapped_series(tmp_path, monkeypatch):
+    """Test that the benchmark's synthetic client fans out, leaves gaps and answers only the requested interval."""
+    monkeypatch.chdir(tmp_path)
+    now = (int(time.time()) // 60) * 60
+    client = SyntheticMetricServiceClient(points=1440, fan_out=3, gap_ratio=0.05, end=now)
+    visualizer = MLOpsVisualizer(client=client)
+
+    frame = visualizer.fetch_frame("latency", hours=24)
+    assert frame["series"].nunique() == 3
+    assert 3 * 1440 * 0.9 < len(frame) < 3 * 1440
+    assert (frame["latency"] > 0).all()
+
+    recent = visualizer.get_metric_data(LATENCY, start=now - 600, end=now)
+    seconds = [point.interval.end_time.seconds for series in recent for point in series.points]
+    assert seconds and min(seconds) >= now - 600 and max(seconds) <= now
@@ -0,0 +1,137 @@
+import time
+import asyncio
+import itertools
+import pytest
+from portal import llm_cache
+from portal.hedging import Hedger, percentile, record_cache_lookup
+from portal.llm_cache import LLMResponseCache, LRUBackend, add_lookup_listener, bypass_llm_cache
+from tests.fakes.llm import FakeSlowLLM
+
+def regions(latencies):
+    """One fake LLM per region, each answering with its region name after its latency."""
+    llms = {region: FakeSlowLLM(response=region, latency=latency) for region, latency in latencies.items()}
+    rotation = itertools.cycle(latencies)
+    return llms, lambda: next(rotation)
+
+def test_percentile():
+    """Test the nearest-rank percentile used for the hedge delay."""
+    assert percentile([], 95) is None
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert percentile([3, 1, 2], 50) == 2
+
+def test_disabled_hedger_calls_the_primary_only():
+    """Test that hedging is opt-in."""
+    llms, next_region = regions({'slow': 0.2, 'fast': 0.0})
+    hedger = Hedger('quiz', enabled=False, default_delay=0.01)
+
+    assert hedger.call(lambda region: llms[region].invoke('q'), next_region) == 'slow'
+    assert llms['fast'].calls == 0
+
+def test_slow_primary_is_hedged_to_the_next_region():
+    """Test that the backup answers when the primary is slower than the hedge delay."""
+    llms, next_region = regions({'slow': 1.0, 'fast': 0.05})
+    hedger = Hedger('quiz', enabled=True, default_delay=0.1)
+
+    start = time.perf_counter()
+    assert hedger.call(lambda region: llms[region].invoke('q'), next_region) == 'fast'
+    assert time.perf_counter() - start < 0.5
+
+    stats = hedger.stats()
+    assert stats['hedged'] == 1 and stats['hedge_wins'] == 1
+    assert stats['hedge_rate'] == 1.0
+
+def test_fast_primary_is_not_hedged():
+    """Test that no backup is sent when the primary answers within the delay."""
+    llms, next_region = regions({'fast': 0.01, 'other': 0.01})
+    hedger = Hedger('quiz', enabled=True, default_delay=0.5)
+
+    assert hedger.call(lambda region: llms[region].invoke('q'), next_region) == 'fast'
+    assert llms['other'].calls == 0
+    assert hedger.stats()['hedged'] == 0
+
+def test_budget_caps_hedges():
+    """Test that once the budget is spent slow calls wait for their primary."""
+    llms, next_region = regions({'slow': 0.15, 'fast': 0.0})
+    hedger = Hedger('quiz', enabled=True, default_delay=0.05, budget=0.0)
+
+    for _ in range(3):
+        hedger.call(lambda region: llms[region].invoke('q'), lambda: 'fast', region='slow')
+    stats = hedger.stats()
+    assert stats['hedged'] == 1
+    assert stats['budget_denied'] == 2
+
+def test_failed_primary_falls_back_to_the_hedge():
+    """Test that the hedge result is used when the slow primary then fails."""
+    def call(region):
+        if region == 'broken':
+            time.sleep(0.2)
+            raise RuntimeError('429 Resource exhausted')
+        return 'ok'
+
+    hedger = Hedger('quiz', enabled=True, default_delay=0.05)
+    assert hedger.call(call, lambda: 'healthy', region='broken') == 'ok'
+
+def test_delay_follows_the_latency_percentile():
+    """Test that the hedge delay is the p95 of recent attempts once enough are known."""
+    hedger = Hedger('quiz', enabled=True, default_delay=5, min_samples=3, min_delay=0.0)
+    for latency in (0.01, 0.02, 0.05):
+        hedger.call(lambda region: time.sleep(latency) or region, lambda: 'a')
+    assert 0.04 <= hedger.delay() < 1
+
+def test_async_hedge_cancels_the_loser():
+    """Test that the slower async attempt is cancelled once the hedge wins."""
+    llms, next_region = regions({'slow': 5.0, 'fast': 0.01})
+    hedger = Hedger('quiz', enabled=True, default_delay=0.05)
+
+    async def run():
+        start = time.perf_counter()
+        result = await hedger.acall(lambda region: llms[region].ainvoke('q'), next_region)
+        await asyncio.sleep(0)
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(run())
+    assert result == 'fast' and elapsed < 1
+    assert llms['slow'].in_flight == 0
+
+@pytest.fixture
+def cached_llm(monkeypatch):
+    """A slow fake LLM behind an LLM cache that reports its lookups to the hedgers, as portal/quiz.py wires it."""
+    monkeypatch.setattr(llm_cache, '_lookup_listeners', [])
+    add_lookup_listener(record_cache_lookup)
+    return FakeSlowLLM(response='quiz', latency=0.05, cache=LLMResponseCache(LRUBackend()))
+
+def test_cache_hits_stay_out_of_the_hedge_delay(cached_llm):
+    """Test that answers from the LLM cache do not pull the hedge delay below the model's latency."""
+    hedger = Hedger('quiz', enabled=True, default_delay=5, min_samples=1, min_delay=0.0)
+    for _ in range(20):
+        assert hedger.call(lambda region: cached_llm.invoke('q'), lambda: 'a') == 'quiz'
+
+    assert cached_llm.calls == 1
+    assert hedger.stats()['cache_hits'] == 19
+    assert hedger.delay() >= 0.05
+
+    with bypass_llm_cache():
+        hedger.call(lambda region: cached_llm.invoke('q'), lambda: 'a')
+    assert cached_llm.calls == 2
+    assert hedger.stats()['cache_hits'] == 19
+
+def test_async_cache_hits_stay_out_of_the_hedge_delay(cached_llm):
+    """Test that the async attempts report their cache hits to their own hedger too."""
+    hedger = Hedger('quiz', enabled=True, default_delay=5, min_samples=1, min_delay=0.0)
+
+    async def run():
+        for _ in range(10):
+            await hedger.acall(lambda region: cached_llm.ainvoke('q'), lambda: 'a')
+
+    asyncio.run(run())
+    assert cached_llm.calls == 1
+    assert hedger.stats()['cache_hits'] == 9
+    assert hedger.delay() >= 0.05
+
+def test_cache_lookups_outside_a_hedge_are_ignored(cached_llm):
+    """Test that an unhedged call through the cache leaves every hedger alone."""
+    hedger = Hedger('quiz', enabled=False)
+    for _ in range(2):
+        hedger.call(lambda region: cached_llm.invoke('q'), lambda: 'a')
+    assert cached_llm.calls == 1
+    assert hedger.stats()['cache_hits'] == 0
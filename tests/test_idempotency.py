@@ -0,0 +1,106 @@
+import time
+import threading
+import pytest
+from courses.idempotency import (
+    Idempotency, IdempotencyStore, SQLiteIdempotencyStore, plan_fingerprint,
+    PROCESSED, DUPLICATE_MESSAGE, DUPLICATE_PLAN, IN_PROGRESS,
+)
+
+@pytest.fixture
+def idempotency(tmp_path):
+    return Idempotency('courses', SQLiteIdempotencyStore(str(tmp_path / 'idempotency.db')), lease_seconds=30)
+
+def test_plan_fingerprint_ignores_whitespace():
+    """Test that reformatted plans share a fingerprint."""
+    assert plan_fingerprint('Week 1:  Shapes\n') == plan_fingerprint('Week 1: Shapes')
+    assert plan_fingerprint('Week 1: Shapes') != plan_fingerprint('Week 1: Angles')
+
+def test_redelivery_and_republished_plan_are_skipped(idempotency):
+    """Test that the work runs once per message and once per plan."""
+    calls = []
+    work = lambda: calls.append(1) or 'assignment-1.txt'
+
+    assert idempotency.run('m1', 'plan', work) == (PROCESSED, 'assignment-1.txt')
+    assert idempotency.run('m1', 'plan', work) == (DUPLICATE_MESSAGE, 'assignment-1.txt')
+    assert idempotency.run('m2', ' plan ', work) == (DUPLICATE_PLAN, 'assignment-1.txt')
+    assert idempotency.run('m2', 'plan', work) == (DUPLICATE_MESSAGE, 'assignment-1.txt')
+    assert idempotency.run('m3', 'another plan', work)[0] == PROCESSED
+    assert len(calls) == 2
+
+    stats = idempotency.stats()
+    assert stats[PROCESSED] == 2
+    assert stats[DUPLICATE_MESSAGE] == 2
+    assert stats[DUPLICATE_PLAN] == 1
+
+def test_failed_work_is_retried(idempotency):
+    """Test that a failure drops the lease so the redelivery runs the work again."""
+    def failing():
+        raise RuntimeError('Live API unavailable')
+
+    with pytest.raises(RuntimeError):
+        idempotency.run('m1', 'plan', failing)
+    assert idempotency.run('m1', 'plan', lambda: 'done') == (PROCESSED, 'done')
+    assert idempotency.stats()['failed'] == 1
+
+def test_concurrent_retry_is_short_circuited(idempotency):
+    """Test that a second worker backs off while the first one holds the lease."""
+    started, release = threading.Event(), threading.Event()
+    outcomes = []
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    worker = threading.Thread(target=lambda: outcomes.append(idempotency.run('m1', 'plan', slow)))
+    worker.start()
+    started.wait(5)
+    assert idempotency.run('m1', 'plan', lambda: 'again')[0] == IN_PROGRESS
+    assert idempotency.run('m2', 'plan', lambda: 'again')[0] == IN_PROGRESS
+    release.set()
+    worker.join()
+
+    assert outcomes == [(PROCESSED, 'done')]
+    assert idempotency.run('m2', 'plan', lambda: 'again') == (DUPLICATE_PLAN, 'done')
+
+def test_long_work_keeps_both_leases(tmp_path):
+    """Test that the message lease is renewed with the plan lease, so a redelivery during long work backs off."""
+    idempotency = Idempotency('courses', SQLiteIdempotencyStore(str(tmp_path / 'idempotency.db')), lease_seconds=0.3)
+    started, release = threading.Event(), threading.Event()
+    worker = threading.Thread(target=idempotency.run, args=('m1', 'plan', lambda: started.set() or release.wait(5)))
+    worker.start()
+    started.wait(5)
+    time.sleep(0.6)
+
+    assert idempotency.run('m1', 'plan', lambda: 'again')[0] == IN_PROGRESS
+    assert idempotency.run('m2', 'plan', lambda: 'again')[0] == IN_PROGRESS
+    release.set()
+    worker.join()
+    # The message marker survived the retries and was completed by its owner
+    assert idempotency.run('m1', 'plan', lambda: 'again')[0] == DUPLICATE_MESSAGE
+
+def test_expired_lease_is_taken_over(tmp_path):
+    """Test that the event of a crashed worker is processed once its lease expires."""
+    store = SQLiteIdempotencyStore(str(tmp_path / 'idempotency.db'))
+    assert store.acquire('courses:message:m1', 'crashed', lease_seconds=0.05)[0] == 'acquired'
+    assert store.acquire('courses:message:m1', 'other', lease_seconds=30)[0] == 'in_progress'
+    time.sleep(0.1)
+
+    idempotency = Idempotency('courses', store, lease_seconds=30)
+    assert idempotency.run('m1', 'plan', lambda: 'done') == (PROCESSED, 'done')
+
+def test_seconds_avoided_is_reported(idempotency):
+    """Test that skipped duplicates count the duration of the original work."""
+    idempotency.run('m1', 'plan', lambda: time.sleep(0.05) or 'done')
+    idempotency.run('m1', 'plan', lambda: 'done')
+    idempotency.run('m2', 'plan', lambda: 'done')
+    assert idempotency.stats()['seconds_avoided'] >= 0.1
+
+def test_incomplete_store_fails_when_created(tmp_path):
+    """Test that a backend missing part of the interface is refused up front, not on its first message."""
+    class LeaseOnlyStore(IdempotencyStore):
+        def acquire(self, key, owner, lease_seconds):
+            return 'acquired', None
+
+    with pytest.raises(TypeError, match='abstract'):
+        LeaseOnlyStore()
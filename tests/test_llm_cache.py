@@ -0,0 +1,69 @@
+import pytest
+from langchain_core.language_models.fake import FakeListLLM
+from portal.llm_cache import (
+    LRUBackend,
+    SQLiteBackend,
+    LLMResponseCache,
+    bypass_llm_cache,
+    load_cache_settings,
+)
+
+def test_lru_backend_evicts_least_recently_used():
+    """Test that the in-process backend keeps at most max_size entries."""
+    backend = LRUBackend(max_size=2, ttl=60)
+    backend.set('a', '1')
+    backend.set('b', '2')
+    backend.get('a')
+    backend.set('c', '3')
+    assert backend.get('a') == '1'
+    assert backend.get('b') is None
+    assert len(backend) == 2
+
+def test_lru_backend_expires_entries(monkeypatch):
+    """Test that entries older than the TTL are dropped."""
+    backend = LRUBackend(max_size=10, ttl=10)
+    backend.set('a', '1')
+    monkeypatch.setattr('portal.llm_cache.time.time', lambda: 10**12)
+    assert backend.get('a') is None
+
+def test_sqlite_backend_size_eviction(tmp_path):
+    """Test that the SQLite backend trims to max_size entries."""
+    backend = SQLiteBackend(str(tmp_path / 'cache.db'), max_size=2, ttl=60)
+    for key in ['a', 'b', 'c']:
+        backend.set(key, key.upper())
+    assert len(backend) == 2
+    assert backend.get('c') == 'C'
+
+def test_llm_cache_hit_and_bypass():
+    """Test that repeated prompts are served from the cache unless bypassed."""
+    cache = LLMResponseCache(LRUBackend())
+    llm = FakeListLLM(responses=['first', 'second', 'third'], cache=cache)
+
+    assert llm.invoke('category?') == 'first'
+    assert llm.invoke('category?') == 'first'
+    with bypass_llm_cache():
+        assert llm.invoke('category?') == 'second'
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['bypassed'] == 1
+
+def test_llm_cache_ignores_location():
+    """Test that the rotating region does not split the cache."""
+    cache = LLMResponseCache(LRUBackend())
+    east = "[('location', 'us-east1'), ('model_name', 'gemini-1.5-pro')]"
+    west = "[('location', 'us-west1'), ('model_name', 'gemini-1.5-pro')]"
+    assert cache._key('prompt', east) == cache._key('prompt', west)
+    assert cache._key('prompt', east) != cache._key('other prompt', east)
+
+def test_load_cache_settings_env_override(monkeypatch):
+    """Test that CACHE_* environment variables override config.yaml."""
+    monkeypatch.setenv('CACHE_TYPE', 'sqlite')
+    monkeypatch.setenv('CACHE_TTL', '60')
+    monkeypatch.setenv('CACHE_ENABLED', 'false')
+    settings = load_cache_settings('config/config.yaml')
+    assert settings['type'] == 'sqlite'
+    assert settings['ttl'] == 60
+    assert settings['enabled'] is False
+    assert settings['port'] == 6379
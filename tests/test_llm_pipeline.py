@@ -0,0 +1,77 @@
+import time
+import yaml
+import pytest
+from mlops.pipelines import llm_pipeline
+from mlops.pipelines.llm_pipeline import LLMPipeline, ModelStepError
+from tests.fakes.aiplatform import FakeAiplatform
+
+def write_config(tmp_path, models=4, max_parallel=None):
+    config = {
+        'models': [{'name': f'model-{n}', 'endpoint': f'endpoint-{n % 3}'} for n in range(models)],
+        'monitoring': {'region': 'us-central1', 'metrics': ['latency'], 'alerts': []},
+        'logging': {'level': 'INFO'},
+        'deployment': {'min_instances': 1, 'max_instances': 2},
+        'security': {'authentication': {'service_account': 'sa@example.com'}},
+    }
+    if max_parallel:
+        config['deployment']['max_parallel_models'] = max_parallel
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    return str(path)
+
+@pytest.fixture
+def platform(monkeypatch):
+    fake = FakeAiplatform(existing=['endpoint-0'], deploy_latency=0.2, list_latency=0.02)
+    monkeypatch.setattr(llm_pipeline, 'aiplatform', fake)
+    return fake
+
+def test_endpoints_are_resolved_once_and_reused(tmp_path, platform):
+    """Test that each display name is listed once, existing endpoints are reused and missing ones created once."""
+    pipeline = LLMPipeline(write_config(tmp_path, models=6))
+
+    pipeline.create_endpoints()
+    pipeline.deploy_models()
+    pipeline.setup_monitoring()
+
+    assert platform.calls['list'] == 3
+    assert platform.calls['create'] == 2
+    assert sorted(platform.endpoints) == ['endpoint-0', 'endpoint-1', 'endpoint-2']
+    assert sorted(platform.endpoints['endpoint-0'].deployed) == ['model-0', 'model-3']
+
+def test_models_deploy_concurrently_within_the_bound(tmp_path, platform):
+    """Test that deploys overlap, at most max_parallel_models at a time."""
+    pipeline = LLMPipeline(write_config(tmp_path, models=4, max_parallel=2))
+
+    start = time.perf_counter()
+    results = pipeline.deploy_models()
+    elapsed = time.perf_counter() - start
+
+    assert all(result['status'] == 'ok' for result in results.values())
+    assert platform.peak_in_flight['deploy'] == 2
+    assert 0.35 < elapsed < 0.7
+
+def test_a_failed_model_does_not_stop_the_others(tmp_path, platform, capsys):
+    """Test that a failing deploy is reported while the other models are deployed and monitored."""
+    platform.fail_on.add('model-1')
+    pipeline = LLMPipeline(write_config(tmp_path, models=3))
+
+    results = pipeline.deploy_and_monitor()
+
+    assert results['model-1']['status'] == 'failed'
+    assert 'model-1 failed' in results['model-1']['error']
+    assert {name for name, result in results.items() if result['status'] == 'ok'} == {'model-0', 'model-2'}
+    assert platform.endpoints['endpoint-2'].monitoring is not None
+    assert platform.endpoints['endpoint-1'].monitoring is None
+    assert '[deploy_and_monitor 3/3]' in capsys.readouterr().out
+
+def test_run_pipeline_raises_after_every_model_finished(tmp_path, platform, monkeypatch):
+    """Test that run_pipeline completes the other models and cost management, then reports the failures."""
+    platform.fail_on.add('model-0')
+    pipeline = LLMPipeline(write_config(tmp_path, models=3))
+    monkeypatch.setattr(pipeline, 'setup_cost_management', lambda: None)
+
+    with pytest.raises(ModelStepError) as error:
+        pipeline.run_pipeline()
+
+    assert set(error.value.failures) == {'model-0'}
+    assert platform.endpoints['endpoint-1'].deployed == ['model-1']
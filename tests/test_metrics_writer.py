@@ -0,0 +1,87 @@
+import time
+import pytest
+from mlops.metrics_writer import BATCH_SIZE, MetricsWriter
+from tests.fakes.monitoring import FakeMetricServiceClient
+
+def written_points(client):
+    return {
+        (ts.metric.type, tuple(sorted(ts.metric.labels.items()))): ts.points[0].value.double_value
+        for batch in client.written for ts in batch
+    }
+
+def test_points_are_aggregated_per_series():
+    """Test that each logical metric gets its own series, gauges write their mean and max, counters their total."""
+    client = FakeMetricServiceClient()
+    writer = MetricsWriter(client=client, project_id="aidemy", labels={"service": "portal"}, flush_interval=60)
+    for latency in (100, 200, 600):
+        writer.record("request_latency_ms", latency, {"route": "/quiz"})
+        writer.increment("requests", labels={"route": "/quiz"})
+    writer.increment("requests", labels={"route": "/"})
+
+    assert client.written == []
+    assert writer.flush() == 4
+
+    points = written_points(client)
+    quiz = (("route", "/quiz"), ("service", "portal"))
+    assert points[("custom.googleapis.com/aidemy/request_latency_ms", quiz)] == 300
+    assert points[("custom.googleapis.com/aidemy/request_latency_ms_max", quiz)] == 600
+    assert points[("custom.googleapis.com/aidemy/requests", quiz)] == 3
+    assert points[("custom.googleapis.com/aidemy/requests", (("route", "/"), ("service", "portal")))] == 1
+    assert len(client.written) == 1
+
+def test_flush_batches_at_the_api_limit():
+    """Test that a flush splits the pending series into calls of at most 200."""
+    client = FakeMetricServiceClient()
+    writer = MetricsWriter(client=client, project_id="aidemy", flush_interval=60, gauge_max=False)
+    for n in range(450):
+        writer.increment("events", labels={"kind": str(n)})
+
+    assert writer.flush() == 450
+    assert [len(batch) for batch in client.written] == [BATCH_SIZE, BATCH_SIZE, 50]
+    assert writer.flush() == 0
+
+def test_counters_keep_their_running_total():
+    """Test that a counter writes its total since the writer started, as a cumulative series."""
+    client = FakeMetricServiceClient()
+    writer = MetricsWriter(client=client, project_id="aidemy", flush_interval=60)
+    writer.increment("requests", 2)
+    writer.flush()
+    writer.increment("requests", 3)
+    writer.flush()
+
+    totals = [batch[0].points[0].value.double_value for batch in client.written]
+    assert totals == [2, 5]
+    assert client.written[-1][0].points[0].interval.start_time.timestamp() == pytest.approx(writer.started_at, abs=1e-3)
+
+def test_new_series_are_dropped_on_overload():
+    """Test that beyond max_series pending series the points of new series are dropped, existing ones still aggregate."""
+    writer = MetricsWriter(client=FakeMetricServiceClient(), project_id="aidemy", flush_interval=60, max_series=2)
+    writer.record("a", 1)
+    writer.record("b", 1)
+    writer.record("c", 1)
+    writer.record("a", 3)
+
+    assert writer.stats["dropped"] == 1
+    assert writer.stats["recorded"] == 3
+
+def test_recording_does_not_wait_for_the_api():
+    """Test that the hot path stays in memory while a slow write runs in the background, and close() flushes the rest."""
+    client = FakeMetricServiceClient(write_latency=0.3)
+    writer = MetricsWriter(client=client, project_id="aidemy", flush_interval=0.05)
+
+    start = time.perf_counter()
+    for n in range(2000):
+        writer.record("request_latency_ms", n, {"route": "/quiz"})
+    assert time.perf_counter() - start < 0.25
+
+    writer.close()
+    assert writer.stats["points_written"] >= 2
+    writer.record("request_latency_ms", 1)
+    assert writer.flush() == 0
+
+def test_disabled_writer_discards_points():
+    """Test that a disabled writer neither buffers nor starts its thread."""
+    writer = MetricsWriter(client=FakeMetricServiceClient(), project_id="aidemy", enabled=False)
+    writer.record("request_latency_ms", 1)
+    assert writer.flush() == 0
+    assert writer._thread is None
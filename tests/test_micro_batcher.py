@@ -0,0 +1,57 @@
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from assignment.batching import MicroBatcher
+from tests.fakes.aiplatform import FakeEndpoint
+
+def predictor(endpoint):
+    return lambda instances: endpoint.predict(instances=instances, use_dedicated_endpoint=True).predictions
+
+def test_concurrent_callers_share_a_batch():
+    """Test that concurrent prompts go out as one instances list and each caller gets its own prediction."""
+    endpoint = FakeEndpoint(latency=0.05, per_instance=0.0)
+    batcher = MicroBatcher(predictor(endpoint), max_batch_size=8, max_wait_ms=50)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda n: batcher.predict_one({'prompt': f'plan {n}'}, timeout=5), range(8)))
+
+    assert results == [f'prediction for plan {n}' for n in range(8)]
+    assert endpoint.batch_sizes == [8]
+
+def test_batch_is_flushed_after_max_wait():
+    """Test that a lone caller waits at most max_wait_ms for company."""
+    endpoint = FakeEndpoint(latency=0.0, per_instance=0.0)
+    batcher = MicroBatcher(predictor(endpoint), max_batch_size=8, max_wait_ms=30)
+
+    start = time.perf_counter()
+    assert batcher.predict_one({'prompt': 'alone'}, timeout=5) == 'prediction for alone'
+    assert 0.025 < time.perf_counter() - start < 0.5
+    assert endpoint.batch_sizes == [1]
+
+def test_batches_are_capped_at_max_size():
+    """Test that a burst larger than max_batch_size is split."""
+    endpoint = FakeEndpoint(latency=0.02, per_instance=0.0, replicas=2)
+    batcher = MicroBatcher(predictor(endpoint), max_batch_size=4, max_wait_ms=50, max_in_flight=2)
+
+    futures = [batcher.submit({'prompt': f'plan {n}'}) for n in range(10)]
+    assert [future.result(timeout=5) for future in futures] == [f'prediction for plan {n}' for n in range(10)]
+    assert max(endpoint.batch_sizes) == 4
+    assert sum(endpoint.batch_sizes) == 10
+
+def test_failed_batch_fails_its_callers():
+    """Test that a predict error reaches every caller of the batch and the next batch still works."""
+    calls = []
+
+    def predict(instances):
+        calls.append(len(instances))
+        if len(calls) == 1:
+            raise RuntimeError('503 endpoint unavailable')
+        return [instance['prompt'] for instance in instances]
+
+    batcher = MicroBatcher(predict, max_batch_size=2, max_wait_ms=50)
+    futures = [batcher.submit({'prompt': 'a'}), batcher.submit({'prompt': 'b'})]
+    for future in futures:
+        with pytest.raises(RuntimeError, match='503'):
+            future.result(timeout=5)
+    assert batcher.predict_one({'prompt': 'c'}, timeout=5) == 'c'
+    assert batcher.stats['errors'] == 1
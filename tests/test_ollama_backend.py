@@ -0,0 +1,54 @@
+import pytest
+from assignment.ollama_backend import OllamaBackend, ThinkStripper
+from tests.fakes.ollama import FakeOllamaServer
+
+def strip(chunks):
+    stripper = ThinkStripper()
+    return ''.join(stripper.feed(chunk) for chunk in chunks) + stripper.finish()
+
+def test_think_blocks_are_stripped_across_chunk_boundaries():
+    """Test that reasoning is dropped even when the tags are split between stream chunks."""
+    text = '<think>\nplan the weeks\n</think>\n\n**Week 1:** Shapes'
+    assert strip([text]) == '**Week 1:** Shapes'
+    assert strip(list(text)) == '**Week 1:** Shapes'
+    assert strip(['<thi', 'nk>x</thi', 'nk>', 'answer']) == 'answer'
+
+def test_text_without_think_is_kept():
+    """Test that plain answers and lone angle brackets pass through."""
+    assert strip(['a < b', ' and <t', 'able>']) == 'a < b and <table>'
+    assert strip(['<think>never closed']) == ''
+
+@pytest.fixture
+def server():
+    with FakeOllamaServer(load_seconds=0.05, token_delay=0.0) as server:
+        yield server
+
+def test_generate_streams_and_strips(server):
+    """Test that the answer is streamed without its reasoning."""
+    backend = OllamaBackend(host=server.url, keep_alive='30m')
+    tokens = []
+    answer = backend.generate('Week plan', on_token=tokens.append)
+
+    assert answer == '**Week 1:** Shape hunt\n**Week 2:** Symmetry art'
+    assert len(tokens) > 1
+    assert server.payloads[0]['keep_alive'] == '30m'
+    assert server.payloads[0]['stream'] is True
+
+def test_session_and_model_are_reused(server):
+    """Test that generations share one connection and the warmed-up model stays loaded."""
+    backend = OllamaBackend(host=server.url, keep_alive='30m')
+    backend.warm_up()
+    for _ in range(3):
+        backend.generate('Week plan')
+
+    assert server.loads == 1
+    assert server.connections == 1
+    assert server.requests == 4
+
+def test_keep_alive_zero_unloads_the_model(server):
+    """Test that the keep_alive policy is what decides whether the model is reloaded."""
+    backend = OllamaBackend(host=server.url, keep_alive=0)
+    backend.generate('Week plan')
+    backend.generate('Week plan')
+    assert server.loads == 2
+    assert server.payloads[0]['keep_alive'] == 0
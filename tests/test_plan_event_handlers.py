@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import base64
+import itertools
+import pytest
+import functions_framework
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLAN = '* Week 1: 2D Shapes and Angles\n* Week 2: 3D Shapes and Symmetry'
+HANDLERS = {
+    'courses': ('process_teaching_plan', 'generate_course_audio'),
+    'assignment': ('generate_assignment', 'store_assignment'),
+}
+_message_ids = itertools.count()
+
+def push(client, message_id=None, teaching_plan=PLAN):
+    """POST a Pub/Sub push of the plan topic, as Eventarc delivers it to the function."""
+    message_id = message_id or f'message-{next(_message_ids)}'
+    data = base64.b64encode(json.dumps({'teaching_plan': teaching_plan}).encode('utf-8')).decode('utf-8')
+    event = {
+        'specversion': '1.0', 'type': 'google.cloud.pubsub.topic.v1.messagePublished',
+        'source': '//pubsub.googleapis.com/projects/aidemy/topics/plan', 'id': f'event-{next(_message_ids)}',
+        'data': {'message': {'data': data, 'messageId': message_id}},
+    }
+    return client.post('/', data=json.dumps(event), headers={'Content-Type': 'application/cloudevents+json'})
+
+@pytest.fixture(params=sorted(HANDLERS))
+def service(request, monkeypatch, tmp_path):
+    """A plan topic function served by functions_framework, its siblings imported by name as when deployed."""
+    name = request.param
+    target, work = HANDLERS[name]
+    directory = os.path.join(ROOT, name)
+    siblings = [file[:-3] for file in os.listdir(directory) if file.endswith('.py')]
+    monkeypatch.setenv('IDEMPOTENCY_DB_PATH', str(tmp_path / 'idempotency.db'))
+    monkeypatch.setattr(sys, 'path', [directory] + sys.path)
+    for sibling in siblings:
+        monkeypatch.delitem(sys.modules, sibling, raising=False)
+
+    client = functions_framework.create_app(target, os.path.join(directory, 'main.py'), 'cloudevent').test_client()
+    calls = []
+    monkeypatch.setattr(sys.modules['main'], work, lambda teaching_plan: calls.append(teaching_plan) or 'done')
+    yield name, client, sys.modules['idempotency'], calls
+    for sibling in siblings:
+        sys.modules.pop(sibling, None)
+
+def test_processed_plan_is_acknowledged(service):
+    name, client, idempotency, calls = service
+    assert push(client).status_code == 200
+    assert push(client).status_code == 200
+    assert calls == [PLAN]
+
+def test_plan_in_progress_elsewhere_is_redelivered(service):
+    """Test that a plan another worker holds the lease of is answered with a 500, so Pub/Sub redelivers it."""
+    name, client, idempotency, calls = service
+    plan_key = f'{name}:plan:{idempotency.plan_fingerprint(PLAN)}'
+    assert idempotency.get_idempotency(name).store.acquire(plan_key, 'other-worker', 60)[0] == 'acquired'
+
+    assert push(client, 'message-1').status_code == 500
+    assert calls == []
+
+    # The lease holder died, the redelivery runs the work
+    idempotency.get_idempotency(name).store.release(plan_key, 'other-worker')
+    assert push(client, 'message-1').status_code == 200
+    assert calls == [PLAN]
@@ -0,0 +1,63 @@
+import os
+import sys
+import types
+import pytest
+from starlette.testclient import TestClient
+
+PLANNER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'planner')
+# The planner imports its sibling modules by name, as it does when deployed
+SIBLINGS = [name[:-3] for name in os.listdir(PLANNER_DIR) if name.endswith('.py')]
+
+@pytest.fixture
+def planner_modules(monkeypatch):
+    """Let the test import the planner's modules by name, fresh and with warm-up disabled."""
+    monkeypatch.setenv('WARMUP_ENABLED', 'false')
+    monkeypatch.syspath_prepend(PLANNER_DIR)
+    for name in SIBLINGS:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    yield
+    for name in SIBLINGS:
+        sys.modules.pop(name, None)
+
+@pytest.fixture
+def planner(monkeypatch, planner_modules):
+    """The planner's ASGI module, with a fake aidemy agent and no Pub/Sub."""
+    requests = []
+
+    async def aprep_class(request):
+        requests.append(request)
+        return 'Week 1: 2D Shapes and Angles'
+
+    monkeypatch.setitem(sys.modules, 'aidemy', types.SimpleNamespace(aprep_class=aprep_class))
+    import asgi
+    monkeypatch.setattr(asgi, 'send_plan_event', lambda teaching_plan: None)
+    with TestClient(asgi.application) as client:
+        yield client, requests
+
+def test_plan_is_generated(planner):
+    client, requests = planner
+    response = client.post('/', data={'year': '5', 'subject': 'Mathematics', 'addon': 'Geometry'})
+    assert response.status_code == 200
+    assert response.json() == {'teaching_plan': 'Week 1: 2D Shapes and Angles'}
+    assert 'year 5 course on Mathematics covering Geometry' in requests[0]
+
+@pytest.mark.parametrize('form', [
+    {'year': '5', 'subject': 'Mathematics'},
+    {'subject': 'Mathematics', 'addon': 'Geometry'},
+    {'year': 'five', 'subject': 'Mathematics', 'addon': 'Geometry'},
+    {},
+])
+def test_invalid_form_is_a_bad_request(planner, form):
+    """Test that the event-loop route answers an incomplete form with a 400, like the Flask route it replaces."""
+    client, requests = planner
+    response = client.post('/', data=form)
+    assert response.status_code == 400
+    assert requests == []
+
+def test_warm_up_starts_with_the_server_not_the_import(planner_modules):
+    """Test that importing the app leaves warm-up alone and the ASGI lifespan starts it."""
+    import asgi
+    assert {state['status'] for state in asgi.warmup.steps.values()} == {'pending'}
+
+    with TestClient(asgi.application):
+        assert {state['status'] for state in asgi.warmup.steps.values()} == {'skipped'}
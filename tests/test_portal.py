@@ -1,7 +1,9 @@
+import sys
 import pytest
 from portal.app import app
 from portal.quiz import generate_quiz_question
 from portal.answer import answer_thinking
+from portal.rate_limit import RateLimiter
 
 def test_home_page(portal_client):
     """Test that the home page loads successfully."""
@@ -57,7 +59,7 @@ def test_download_course_audio(portal_client, mock_storage_client):
     assert response.status_code == 200
     assert response.mimetype == 'audio/wav'
 
-def test_generate_quiz_question(mock_vertex_ai):
+def test_generate_quiz_question(portal_workdir, mock_vertex_ai):
     """Test quiz question generation function."""
     question = generate_quiz_question("teaching_plan.txt", "easy", "test-region")
     assert isinstance(question, dict)
@@ -88,7 +90,7 @@ def test_error_handling(portal_client):
     response = portal_client.get('/download_course_audio/invalid')
     assert response.status_code == 404
 
-def test_rate_limiting(portal_client):
+def test_rate_limiting(portal_client, mock_vertex_ai):
     """Test rate limiting functionality."""
     # Make multiple requests in quick succession
     for _ in range(10):
@@ -98,4 +100,13 @@ def test_rate_limiting(portal_client):
     # Check rate limit headers
     assert 'X-RateLimit-Limit' in response.headers
     assert 'X-RateLimit-Remaining' in response.headers
-    assert 'X-RateLimit-Reset' in response.headers 
\ No newline at end of file
+    assert 'X-RateLimit-Reset' in response.headers 
+def test_rate_limit_exceeded(portal_client, monkeypatch):
+    """Test that a client over its limit is answered with a 429 and that health checks are not counted."""
+    monkeypatch.setattr(sys.modules['portal.app'], 'rate_limiter', RateLimiter(limit=1, enabled=True))
+
+    assert portal_client.get('/quiz').status_code == 200
+    response = portal_client.get('/quiz')
+    assert response.status_code == 429
+    assert response.headers['X-RateLimit-Remaining'] == '0'
+    assert 'X-RateLimit-Limit' not in portal_client.get('/health').headers
@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import time
+import threading
+import importlib
+import pytest
+from tests.fakes.pubsub import PubSubEmulator, message_json
+
+COURSES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'courses')
+PLAN = '* Week 1: 2D Shapes and Angles'
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the emulator")
+        time.sleep(0.005)
+
+@pytest.fixture
+def emulator():
+    emulator = PubSubEmulator()
+    emulator.create_topic("plan")
+    yield emulator
+    emulator.shutdown()
+
+def test_messages_fan_out_as_push_cloud_events(emulator):
+    """Test that every subscription of the topic gets each message, decoded as the services decode it."""
+    received = {"courses": [], "assignment": []}
+    for name in received:
+        emulator.create_subscription(name, "plan", lambda event, name=name: received[name].append(
+            (event["id"], message_json(event))) or ("ok", 200))
+
+    future = emulator.publisher().publish("projects/load-test/topics/plan", json.dumps({"teaching_plan": "p"}).encode())
+    message_id = future.result()
+
+    wait_for(lambda: all(received.values()))
+    assert received["courses"] == received["assignment"] == [(message_id, {"teaching_plan": "p"})]
+
+def test_failed_deliveries_are_retried_then_dead_lettered(emulator):
+    """Test that a handler raising is redelivered with backoff until the attempt limit."""
+    attempts = []
+
+    def flaky(event):
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise RuntimeError("instance crashed")
+        return ("ok", 200)
+
+    def broken(event):
+        raise RuntimeError("always failing")
+
+    acked = []
+    flaky_sub = emulator.create_subscription("flaky", "plan", flaky, min_backoff=0.05,
+                                             on_ack=lambda message, tries: acked.append(tries))
+    broken = emulator.create_subscription("broken", "plan", broken, max_delivery_attempts=3, min_backoff=0.01)
+    emulator.publish("plan", b"{}")
+
+    wait_for(lambda: acked and broken.stats["dead_lettered"] == 1)
+    assert acked == [3]
+    assert attempts[2] - attempts[1] >= 0.09  # the second redelivery waits twice the minimum backoff
+    assert flaky_sub.stats["nacked"] == 2
+    assert broken.stats["delivered"] == 3 and broken.backlog() == 0
+
+def test_returned_error_status_is_acknowledged(emulator):
+    """Test that an error status a handler returns is acknowledged, as functions_framework ignores it."""
+    acked = []
+    subscription = emulator.create_subscription("courses", "plan", lambda event: ("Error processing event", 500),
+                                                on_ack=lambda message, tries: acked.append(tries))
+    emulator.publish("plan", b"{}")
+
+    wait_for(lambda: acked)
+    assert acked == [1]
+    assert subscription.stats["nacked"] == 0
+
+@pytest.fixture
+def courses(monkeypatch, tmp_path):
+    """The courses function, its siblings imported by name as when deployed, its audio work recorded."""
+    siblings = [file[:-3] for file in os.listdir(COURSES_DIR) if file.endswith('.py')]
+    monkeypatch.setenv('IDEMPOTENCY_DB_PATH', str(tmp_path / 'idempotency.db'))
+    monkeypatch.syspath_prepend(COURSES_DIR)
+    for sibling in siblings:
+        monkeypatch.delitem(sys.modules, sibling, raising=False)
+    main = importlib.import_module('main')
+    calls = []
+    monkeypatch.setattr(main, 'generate_course_audio', lambda teaching_plan: calls.append(teaching_plan) or 'done')
+    yield main, calls
+    for sibling in siblings:
+        sys.modules.pop(sibling, None)
+
+def test_plan_in_progress_elsewhere_is_redelivered(emulator, courses):
+    """Test that a plan another worker holds the lease of is redelivered until the lease is released."""
+    main, calls = courses
+    acked = []
+    subscription = emulator.create_subscription("courses", "plan", main.process_teaching_plan, min_backoff=0.01,
+                                                max_backoff=0.05, on_ack=lambda message, tries: acked.append(tries))
+    idempotency = sys.modules['idempotency']
+    plan_key = f'courses:plan:{idempotency.plan_fingerprint(PLAN)}'
+    store = idempotency.get_idempotency('courses').store
+    assert store.acquire(plan_key, 'other-worker', 60)[0] == 'acquired'
+
+    emulator.publish("plan", json.dumps({"teaching_plan": PLAN}).encode())
+    wait_for(lambda: subscription.stats["nacked"] >= 2)
+    assert acked == [] and calls == []
+
+    store.release(plan_key, 'other-worker')
+    wait_for(lambda: acked)
+    assert acked[0] >= 3
+    assert calls == [PLAN]
+
+def test_concurrency_is_capped_and_the_rest_waits_in_the_backlog(emulator):
+    """Test that deliveries beyond max_concurrency queue up and show in the backlog."""
+    release = threading.Event()
+    subscription = emulator.create_subscription("courses", "plan", lambda event: release.wait() and ("ok", 200),
+                                                max_concurrency=2)
+    for _ in range(5):
+        emulator.publish("plan", b"{}")
+
+    wait_for(lambda: subscription.stats["in_flight"] == 2)
+    time.sleep(0.05)
+    assert subscription.stats["delivered"] == 2
+    assert subscription.backlog() == 5
+    assert subscription.oldest_unacked_age() > 0
+    release.set()
+    wait_for(lambda: subscription.backlog() == 0)
+    assert subscription.stats["peak_in_flight"] == 2
@@ -0,0 +1,59 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.testclient import TestClient
+from portal.asgi_middleware import llm_route
+from portal.metrics_writer import MetricsWriter
+from portal.rate_limit import RateLimiter
+from portal.static_assets import GZIP_MIN_SIZE
+from tests.fakes.monitoring import FakeMetricServiceClient
+
+def test_clients_are_limited_per_window():
+    """Test that each client gets its own count and that every count starts over with the next window."""
+    limiter = RateLimiter(limit=2, window=60, enabled=True)
+
+    assert limiter.hit('10.0.0.1', now=120) == (True, {'X-RateLimit-Limit': '2', 'X-RateLimit-Remaining': '1',
+                                                       'X-RateLimit-Reset': '180'})
+    assert limiter.hit('10.0.0.1', now=150)[0]
+    allowed, headers = limiter.hit('10.0.0.1', now=170)
+    assert not allowed
+    assert headers['X-RateLimit-Remaining'] == '0'
+    assert headers['Retry-After'] == '10'
+    assert limiter.hit('10.0.0.2', now=170)[0]
+
+    assert limiter.hit('10.0.0.1', now=180) == (True, {'X-RateLimit-Limit': '2', 'X-RateLimit-Remaining': '1',
+                                                       'X-RateLimit-Reset': '240'})
+
+def test_disabled_limiter_allows_every_request():
+    limiter = RateLimiter(limit=1, enabled=False)
+    assert [limiter.hit('10.0.0.1') for _ in range(3)] == [(True, {})] * 3
+
+@pytest.mark.parametrize('forwarded_for, client', [
+    (None, '169.254.1.1'),
+    ('203.0.113.7', '203.0.113.7'),
+    ('198.51.100.1, 203.0.113.7', '203.0.113.7'),
+])
+def test_client_address_is_the_last_forwarded_hop(forwarded_for, client):
+    """Test that a client cannot pick the address it is counted against by sending its own X-Forwarded-For."""
+    assert RateLimiter.client_address(forwarded_for, '169.254.1.1') == client
+
+def test_llm_route_is_limited():
+    """Test that an event-loop route counts its requests in the service's limiter, as the Flask routes do."""
+    writer = MetricsWriter(client=FakeMetricServiceClient(), project_id='aidemy', flush_interval=60, gauge_max=False)
+
+    async def generate_quiz(request):
+        return JSONResponse([{'question': 'What is an angle?', 'answer': 'B'}])
+
+    application = Starlette(routes=[
+        llm_route('/generate_quiz', generate_quiz, ['GET'], writer, GZIP_MIN_SIZE, RateLimiter(limit=2, enabled=True)),
+    ])
+    with TestClient(application) as client:
+        first, second, over = (client.get('/generate_quiz') for _ in range(3))
+        other_client = client.get('/generate_quiz', headers={'X-Forwarded-For': '203.0.113.7'})
+
+    assert (first.status_code, first.headers['X-RateLimit-Remaining']) == (200, '1')
+    assert (second.status_code, second.headers['X-RateLimit-Remaining']) == (200, '0')
+    assert over.status_code == 429
+    assert over.json() == {'error': 'Rate limit exceeded'}
+    assert 'Retry-After' in over.headers
+    assert other_client.status_code == 200
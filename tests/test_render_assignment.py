@@ -0,0 +1,105 @@
+import time
+import pytest
+from portal import render
+from portal.render import AssignmentRenderCache, NO_ASSIGNMENT_HTML, render_assignment_page, sanitize_html
+from tests.fakes.storage import FakeBucket
+
+ASSIGNMENT = '# Week 1: Geometry\n\n* Measure the angles of five triangles\n'
+
+class CountingFormatter:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, markdown):
+        self.calls.append(markdown)
+        return f'<h1>Assignment {len(self.calls)}</h1><p>{markdown}</p>'
+
+@pytest.fixture
+def bucket():
+    bucket = FakeBucket()
+    bucket.blob('assignment-1.txt').upload_from_string(ASSIGNMENT)
+    return bucket
+
+@pytest.fixture
+def formatter():
+    return CountingFormatter()
+
+def test_page_is_rendered_once_per_generation(bucket, formatter, tmp_path):
+    """Test that the LLM formats each blob generation once and a new upload is rendered again."""
+    cache = AssignmentRenderCache(bucket, cache_dir=str(tmp_path), revalidate_seconds=0, formatter=formatter)
+
+    first = cache.render()
+    assert cache.render() == first
+    assert len(formatter.calls) == 1
+    assert bucket.downloads == 1
+
+    time.sleep(0.01)
+    bucket.blob('assignment-1.txt').upload_from_string(ASSIGNMENT + '* Draw a cube net\n')
+    assert 'Assignment 2' in cache.render()
+    assert len(formatter.calls) == 2
+
+def test_revalidation_window_skips_gcs(bucket, formatter, tmp_path):
+    """Test that no listing is made inside the revalidation window unless it is forced."""
+    cache = AssignmentRenderCache(bucket, cache_dir=str(tmp_path), revalidate_seconds=60, formatter=formatter)
+    cache.render()
+    listings = bucket.listings
+
+    time.sleep(0.01)
+    bucket.blob('assignment-2.txt').upload_from_string('# Week 2')
+    assert 'Assignment 1' in cache.render()
+    assert bucket.listings == listings
+
+    assert 'Assignment 2' in cache.render(force_revalidate=True)
+    assert bucket.listings == listings + 1
+
+def test_rendered_file_is_reused_by_a_new_instance(bucket, formatter, tmp_path):
+    """Test that a restarted portal serves the page rendered on disk without downloading or formatting."""
+    page = AssignmentRenderCache(bucket, cache_dir=str(tmp_path), formatter=formatter).render()
+
+    restarted = AssignmentRenderCache(bucket, cache_dir=str(tmp_path), formatter=formatter)
+    assert restarted.render() == page
+    assert len(formatter.calls) == 1
+    assert bucket.downloads == 1
+    assert len(list(tmp_path.glob('*.html'))) == 1
+
+def test_empty_bucket_has_a_placeholder(formatter, tmp_path):
+    cache = AssignmentRenderCache(FakeBucket(), cache_dir=str(tmp_path), formatter=formatter)
+    assert cache.render() == NO_ASSIGNMENT_HTML
+    assert formatter.calls == []
+
+def test_llm_html_is_sanitized(bucket, tmp_path):
+    """Test that scripts, handlers and javascript: links in the formatted page never reach the portal or the disk."""
+    formatted = ('<h2 onclick="steal()">Week 1</h2><script>alert(1)</script><img src=x onerror=alert(2)>'
+                 '<p style="x">Measure <a href="javascript:alert(3)">angles</a> and '
+                 '<a href="https://example.com/angles">read</a></p><table><tr><td colspan="2">1 &lt; 2')
+    cache = AssignmentRenderCache(bucket, cache_dir=str(tmp_path), formatter=lambda markdown: formatted)
+
+    page = cache.render()
+
+    assert page == ('<h2>Week 1</h2><p>Measure <a rel="noopener noreferrer nofollow">angles</a> and '
+                    '<a href="https://example.com/angles" rel="noopener noreferrer nofollow">read</a></p>'
+                    '<table><tr><td colspan="2">1 &lt; 2</td></tr></table>')
+    assert next(tmp_path.glob('*.html')).read_text() == page
+
+def test_cached_file_is_sanitized_on_load(bucket, formatter, tmp_path):
+    """Test that a page on disk is not trusted as it is."""
+    AssignmentRenderCache(bucket, cache_dir=str(tmp_path), formatter=formatter).render()
+    next(tmp_path.glob('*.html')).write_text('<p>Week 1</p><script>alert(1)</script>')
+
+    restarted = AssignmentRenderCache(bucket, cache_dir=str(tmp_path), formatter=formatter)
+    assert restarted.render() == '<p>Week 1</p>'
+
+def test_sanitize_keeps_the_assignment_markup():
+    fragment = '<h3>Tasks</h3><ol start="2"><li><strong>Draw</strong> a <em>cube</em><br/>net</li></ol><hr>'
+    assert sanitize_html(fragment) == fragment.replace('<br/>', '<br>')
+
+def test_error_message_is_escaped(monkeypatch):
+    """Test that the error shown in place of the assignment is text, not markup."""
+    def failing_cache():
+        raise RuntimeError('<img src=x onerror=alert(1)>')
+    monkeypatch.setattr(render, 'get_render_cache', failing_cache)
+
+    page = render_assignment_page()
+
+    assert '<img' not in page
+    assert '&lt;img src=x onerror=alert(1)&gt;' in page
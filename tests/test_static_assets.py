@@ -0,0 +1,69 @@
+import pytest
+import gzip
+from flask import Flask, jsonify, render_template_string
+from portal.static_assets import build_assets, init_static_assets, IMMUTABLE_CACHE_CONTROL
+
+@pytest.fixture
+def assets_client(tmp_path):
+    """Create a Flask app whose static folder went through the build step."""
+    static_dir = tmp_path / 'static'
+    static_dir.mkdir()
+    (static_dir / 'style.css').write_text('body { color: black; }\n' * 100)
+    build_assets(str(static_dir))
+
+    app = Flask(__name__, static_folder=str(static_dir))
+    init_static_assets(app)
+
+    @app.route('/')
+    def index():
+        return render_template_string("{{ url_for('static', filename='style.css') }}")
+
+    @app.route('/plan')
+    def plan():
+        return jsonify({'teaching_plan': 'Week 1: Geometry. ' * 200})
+
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def test_template_urls_are_fingerprinted(assets_client):
+    """Test that url_for points at the fingerprinted file."""
+    url = assets_client.get('/').get_data(as_text=True)
+    assert url.startswith('/static/dist/style.')
+    assert url.endswith('.css')
+
+def test_fingerprinted_asset_is_immutable_and_precompressed(assets_client):
+    """Test that fingerprinted assets are served precompressed with long-lived headers."""
+    url = assets_client.get('/').get_data(as_text=True)
+    response = assets_client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert gzip.decompress(response.data).startswith(b'body')
+
+def test_large_json_is_gzipped(assets_client):
+    """Test that large dynamic JSON responses are compressed."""
+    response = assets_client.get('/plan', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'Geometry' in gzip.decompress(response.data)
+
+def test_etag_returns_not_modified(assets_client):
+    """Test that a matching If-None-Match returns 304."""
+    etag = assets_client.get('/plan').headers['ETag']
+    response = assets_client.get('/plan', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+@pytest.mark.parametrize('accept, encoding', [
+    ('br;q=0, gzip', 'gzip'),
+    ('gzip;q=0', None),
+    ('x-gzip', None),
+    ('identity, *;q=0.5, br;q=0', 'gzip'),
+    ('*, gzip;q=0, br;q=0', None),
+])
+def test_accept_encoding_q_values(assets_client, accept, encoding):
+    """Test that codings are matched whole and one with q=0 is never used."""
+    url = assets_client.get('/').get_data(as_text=True)
+    for path in (url, '/plan'):
+        response = assets_client.get(path, headers={'Accept-Encoding': accept})
+        assert response.headers.get('Content-Encoding') == encoding
@@ -0,0 +1,67 @@
+from portal.warmup import Warmup
+
+def test_health_is_warming_until_steps_ran():
+    """Test that readiness reports 503 before the warm-up thread has finished."""
+    warmup = Warmup(enabled=True)
+
+    @warmup.step('noop')
+    def noop():
+        pass
+
+    report, status = warmup.health()
+    assert status == 503
+    assert report['status'] == 'warming'
+    assert report['steps']['noop'] == {'status': 'pending'}
+
+def test_health_reports_ready_and_step_timings():
+    """Test that all steps run in order and the service becomes ready."""
+    warmup = Warmup(enabled=True)
+    calls = []
+    warmup.step('first')(lambda: calls.append('first'))
+    warmup.step('second')(lambda: calls.append('second'))
+    warmup.start()
+    warmup._done.wait(5)
+
+    report, status = warmup.health()
+    assert calls == ['first', 'second']
+    assert status == 200
+    assert report['status'] == 'ready'
+    assert report['steps']['first']['status'] == 'ok'
+    assert 'ms' in report['steps']['second']
+
+def test_failed_step_degrades_but_stays_ready():
+    """Test that a failing step is reported without blocking the other steps."""
+    warmup = Warmup(enabled=True)
+
+    @warmup.step('broken')
+    def broken():
+        raise RuntimeError('no credentials')
+
+    warmup.step('ok')(lambda: None)
+    warmup.start()
+    warmup._done.wait(5)
+
+    report, status = warmup.health()
+    assert status == 200
+    assert report['status'] == 'degraded'
+    assert report['steps']['broken'] == {'status': 'failed', 'error': 'no credentials', 'ms': report['steps']['broken']['ms']}
+    assert report['steps']['ok']['status'] == 'ok'
+
+def test_start_runs_the_steps_once():
+    """Test that a second start, e.g. from another entry point, does not run the steps again."""
+    warmup = Warmup(enabled=True)
+    calls = []
+    warmup.step('once')(lambda: calls.append('once'))
+    warmup.start()
+    warmup._done.wait(5)
+    warmup.start()
+    warmup._done.wait(5)
+    assert calls == ['once']
+
+def test_disabled_warm_up_skips_the_steps():
+    warmup = Warmup(enabled=False)
+    warmup.step('client')(lambda: None)
+    warmup.start()
+    report, status = warmup.health()
+    assert status == 200
+    assert report['steps']['client'] == {'status': 'skipped'}